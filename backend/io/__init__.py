@@ -1,7 +1,36 @@
 from .communicator import SerialCommunicator
-from .ebr_file import load_ebr_file_to_df
+from .protocol import Frame, FrameDecoder, encode_frame
+from .recorder import SessionRecorder
+from .sinks import (
+    PredictionSink, ZMQPublisher, UDPPublisher, pack_prediction, unpack_prediction,
+    unpack_stream_prediction
+)
+from .catalog import SessionCatalog
+from .sessions import (
+    load_session_to_arrays, load_experiment_to_arrays, build_sessions_dataset
+)
+from .hdf5_sessions import HDF5Sessions, convert_to_hdf5
+from .ebr_file import load_ebr_file_to_df, load_ebr_file_to_arrays, load_ebr_file_to_trials
 
 __all__ = [
     'SerialCommunicator',
+    'Frame',
+    'FrameDecoder',
+    'encode_frame',
+    'SessionRecorder',
+    'PredictionSink',
+    'ZMQPublisher',
+    'UDPPublisher',
+    'pack_prediction',
+    'unpack_prediction',
+    'unpack_stream_prediction',
+    'SessionCatalog',
+    'HDF5Sessions',
+    'convert_to_hdf5',
     'load_ebr_file_to_df',
+    'load_ebr_file_to_arrays',
+    'load_ebr_file_to_trials',
+    'load_session_to_arrays',
+    'load_experiment_to_arrays',
+    'build_sessions_dataset',
 ]
\ No newline at end of file
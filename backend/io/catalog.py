@@ -0,0 +1,391 @@
+import os
+import json
+import sqlite3
+import numpy as np
+from typing import Optional, Any, Iterator
+import logging
+from .ebr_file import (
+    _read_header, load_ebr_file, load_raw_file, _MARK_CHANNEL, _GROUP_MARK
+)
+from .sessions import METADATA_FILE, SIGNAL_FILE
+
+logger = logging.getLogger(__name__)
+
+_MAGIC_KEYS = {b'ebr binary 1.0': 'ebr', b'raw binary 1.0': 'raw'}
+
+_EXPERIMENT_FILES = (METADATA_FILE, SIGNAL_FILE, 'trainer.pkl', 'pipeline.joblib')
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS sessions (
+    path TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    data_type TEXT,
+    sampling_rate REAL,
+    n_samples INTEGER,
+    n_trials INTEGER,
+    n_channels INTEGER,
+    n_bands INTEGER,
+    metadata TEXT
+);
+CREATE TABLE IF NOT EXISTS channels (
+    path TEXT NOT NULL REFERENCES sessions(path) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS trials (
+    path TEXT NOT NULL REFERENCES sessions(path) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS marks (
+    path TEXT NOT NULL REFERENCES sessions(path) ON DELETE CASCADE,
+    sample INTEGER NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS labels (
+    path TEXT NOT NULL REFERENCES sessions(path) ON DELETE CASCADE,
+    label TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS channels_name ON channels(name, path);
+CREATE INDEX IF NOT EXISTS trials_name ON trials(name, path);
+CREATE INDEX IF NOT EXISTS marks_name ON marks(name, path);
+CREATE INDEX IF NOT EXISTS labels_label ON labels(label, path);
+CREATE INDEX IF NOT EXISTS channels_path ON channels(path);
+CREATE INDEX IF NOT EXISTS trials_path ON trials(path);
+CREATE INDEX IF NOT EXISTS marks_path ON marks(path);
+CREATE INDEX IF NOT EXISTS labels_path ON labels(path);
+'''
+
+class SessionCatalog:
+    """
+    SQLite index of recorded sessions.
+
+    EBR and RAW files are indexed from their headers, and the labels of
+    their MARK channel. Experiment directories saved by `Trainer.save` are
+    indexed from their metadata and the header of their signal data.
+    Indexing is incremental, only new or modified sessions are read.
+    """
+
+    def __init__(self, db_path: str = ':memory:', index_labels: bool = True):
+        """
+        Args:
+            db_path: Path of the SQLite database, created if it does not exist
+            index_labels: Whether to index the labels of the MARK channel of
+                EBR and RAW files, which reads that channel from disk
+        """
+        self.db_path = db_path
+        self.index_labels = index_labels
+
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        self.connection.executescript(_SCHEMA)
+
+    def index(self, *roots: str) -> dict[str, int]:
+        """
+        Index the sessions under the given files or directories.
+
+        Sessions indexed under the roots that no longer exist are removed.
+
+        Args:
+            roots: EBR or RAW files, experiment directories, or directories
+                searched recursively for both
+
+        Returns:
+            Number of added, updated, unchanged and removed sessions
+        """
+        counts = {'added': 0, 'updated': 0, 'unchanged': 0, 'removed': 0}
+        found = set()
+
+        with self.connection:
+            for path, kind in self._discover(roots):
+                found.add(path)
+                mtime, size = self._stat(path, kind)
+
+                row = self.connection.execute(
+                    'SELECT mtime, size FROM sessions WHERE path = ?', (path,)
+                ).fetchone()
+                if row == (mtime, size):
+                    counts['unchanged'] += 1
+                    continue
+
+                try:
+                    session = self._read_session(path, kind)
+                except Exception as e:
+                    logger.warning(f'Skipping {path!r}: {e}')
+                    continue
+
+                self._remove(path)
+                self._insert(path, kind, mtime, size, session)
+                counts['updated' if row else 'added'] += 1
+
+            for path in self._indexed_under(roots):
+                if path not in found:
+                    self._remove(path)
+                    counts['removed'] += 1
+
+        logger.info(f'Indexed sessions: {counts}')
+        return counts
+
+    def _discover(self, roots: tuple[str, ...]) -> Iterator[tuple[str, str]]:
+        for root in roots:
+            root = os.path.abspath(root)
+
+            if os.path.isfile(root):
+                kind = self._file_kind(root)
+                if kind is not None:
+                    yield root, kind
+                continue
+
+            for directory, dirs, files in os.walk(root):
+                dirs.sort()
+                # Trainers trained on sessions are saved without signal data
+                if METADATA_FILE in files and SIGNAL_FILE in files:
+                    yield directory, 'experiment'
+
+                for name in sorted(files):
+                    if name.lower().endswith(('.ebr', '.raw')):
+                        path = os.path.join(directory, name)
+                        kind = self._file_kind(path)
+                        if kind is not None:
+                            yield path, kind
+
+    @staticmethod
+    def _file_kind(path: str) -> Optional[str]:
+        with open(path, 'rb') as f:
+            return _MAGIC_KEYS.get(f.readline().strip().lower())
+
+    @staticmethod
+    def _stat(path: str, kind: str) -> tuple[float, int]:
+        if kind != 'experiment':
+            stat = os.stat(path)
+            return stat.st_mtime, stat.st_size
+
+        # Saved experiments can be completed file by file
+        stats = [
+            os.stat(os.path.join(path, name))
+            for name in _EXPERIMENT_FILES
+            if os.path.exists(os.path.join(path, name))
+        ]
+        return max(s.st_mtime for s in stats), sum(s.st_size for s in stats)
+
+    def _indexed_under(self, roots: tuple[str, ...]) -> list[str]:
+        paths = []
+        for root in roots:
+            root = os.path.abspath(root)
+            paths.extend(
+                path for (path,) in self.connection.execute(
+                    'SELECT path FROM sessions WHERE path = ? OR path LIKE ? ESCAPE ?',
+                    (root, _like_prefix(root.rstrip(os.sep) + os.sep), '\\')
+                )
+            )
+        return paths
+
+    def _read_session(self, path: str, kind: str) -> dict[str, Any]:
+        if kind == 'experiment':
+            return self._read_experiment(path)
+
+        header = _read_header(path, f'{kind} binary 1.0'.encode())
+        session = {
+            'data_type': header['data_type'],
+            'sampling_rate': header['sampling_rate'],
+            'n_samples': header['number_of_samples'],
+            'n_trials': header['number_of_trials'] if kind == 'ebr' else None,
+            'n_bands': header['number_of_bands'] if kind == 'ebr' else None,
+            'channels': header['channels'],
+            'trials': header['trials'],
+            'marks': header['marks'],
+            'labels': [],
+            'metadata': None,
+        }
+
+        if self.index_labels and _MARK_CHANNEL in header['channels']:
+            if kind == 'ebr':
+                marks = load_ebr_file(path, mmap=True, channels=[_MARK_CHANNEL], bands=[0])['data']
+            else:
+                marks = load_raw_file(path, mmap=True, channels=[_MARK_CHANNEL])['data']
+
+            labels = np.unique(np.asarray(marks).astype(np.int64))
+            session['labels'] = [
+                str(label) for label in labels.tolist() if label not in (0, _GROUP_MARK)
+            ]
+
+        return session
+
+    @staticmethod
+    def _read_experiment(path: str) -> dict[str, Any]:
+        with open(os.path.join(path, METADATA_FILE)) as f:
+            metadata = json.load(f)
+
+        # Column names are the first line of the signal data
+        channels = []
+        signal_file = os.path.join(path, SIGNAL_FILE)
+        if os.path.exists(signal_file):
+            with open(signal_file) as f:
+                columns = f.readline().strip().split(',')[1:]
+            channels = [c for c in columns if c not in ('label', 'group')]
+
+        labels = metadata.get('labels')
+        if labels is None and metadata.get('label_mapping'):
+            labels = list(metadata['label_mapping'].values())
+
+        shape = metadata.get('shape')
+        return {
+            'data_type': metadata.get('dtype'),
+            'sampling_rate': metadata.get('sampling_rate'),
+            'n_samples': shape[0] if shape else None,
+            'n_trials': None,
+            'n_bands': None,
+            'channels': channels,
+            'trials': [],
+            'marks': [],
+            'labels': [str(label) for label in labels or []],
+            'metadata': metadata,
+        }
+
+    def _insert(
+        self,
+        path: str,
+        kind: str,
+        mtime: float,
+        size: int,
+        session: dict[str, Any]
+    ) -> None:
+        self.connection.execute(
+            'INSERT INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (
+                path, kind, mtime, size,
+                session['data_type'],
+                session['sampling_rate'],
+                session['n_samples'],
+                session['n_trials'],
+                len(session['channels']),
+                session['n_bands'],
+                json.dumps(session['metadata'], default=str)
+                if session['metadata'] is not None else None,
+            )
+        )
+        self.connection.executemany(
+            'INSERT INTO channels VALUES (?, ?, ?)',
+            [(path, i, name) for i, name in enumerate(session['channels'])]
+        )
+        self.connection.executemany(
+            'INSERT INTO trials VALUES (?, ?, ?)',
+            [(path, i, name) for i, name in enumerate(session['trials'])]
+        )
+        self.connection.executemany(
+            'INSERT INTO marks VALUES (?, ?, ?)',
+            [(path, sample, name) for sample, name in session['marks']]
+        )
+        self.connection.executemany(
+            'INSERT INTO labels VALUES (?, ?)',
+            [(path, label) for label in dict.fromkeys(session['labels'])]
+        )
+
+    def _remove(self, path: str) -> None:
+        self.connection.execute('DELETE FROM sessions WHERE path = ?', (path,))
+
+    def find(
+        self,
+        labels: Optional[list[Any]] = None,
+        channels: Optional[list[str]] = None,
+        marks: Optional[list[str]] = None,
+        trials: Optional[list[str]] = None,
+        sampling_rate: Optional[float] = None,
+        kind: Optional[str] = None,
+        min_samples: Optional[int] = None
+    ) -> list[str]:
+        """
+        Find the sessions matching all the given conditions.
+
+        Args:
+            labels: Labels that must all be present
+            channels: Channel names that must all be present
+            marks: Header mark names that must all be present
+            trials: Trial names that must all be present
+            sampling_rate: Sampling rate in Hz
+            kind: 'ebr', 'raw' or 'experiment'
+            min_samples: Minimum number of samples
+
+        Returns:
+            Paths of the matching sessions, sorted
+        """
+        conditions = []
+        params: list[Any] = []
+
+        for table, column, values in [
+            ('labels', 'label', labels),
+            ('channels', 'name', channels),
+            ('marks', 'name', marks),
+            ('trials', 'name', trials),
+        ]:
+            for value in dict.fromkeys(str(v) for v in values or []):
+                conditions.append(
+                    f'EXISTS (SELECT 1 FROM {table} t '
+                    f'WHERE t.path = s.path AND t.{column} = ?)'
+                )
+                params.append(value)
+
+        for column, operator, value in [
+            ('sampling_rate', '=', sampling_rate),
+            ('kind', '=', kind),
+            ('n_samples', '>=', min_samples),
+        ]:
+            if value is not None:
+                conditions.append(f's.{column} {operator} ?')
+                params.append(value)
+
+        where = ' AND '.join(conditions) or '1'
+        return [
+            path for (path,) in self.connection.execute(
+                f'SELECT s.path FROM sessions s WHERE {where} ORDER BY s.path', params
+            )
+        ]
+
+    def session(self, path: str) -> Optional[dict[str, Any]]:
+        """Indexed fields of a session, or None if it is not indexed."""
+        path = os.path.abspath(path)
+        cursor = self.connection.execute('SELECT * FROM sessions WHERE path = ?', (path,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+
+        session = dict(zip([c[0] for c in cursor.description], row))
+        session['metadata'] = json.loads(session['metadata']) if session['metadata'] else None
+
+        for table, columns, order in [
+            ('channels', 'name', 'position'),
+            ('trials', 'name', 'position'),
+            ('marks', 'sample, name', 'rowid'),
+            ('labels', 'label', 'rowid'),
+        ]:
+            rows = self.connection.execute(
+                f'SELECT {columns} FROM {table} WHERE path = ? ORDER BY {order}', (path,)
+            ).fetchall()
+            session[table] = [r if len(r) > 1 else r[0] for r in rows]
+
+        return session
+
+    def __len__(self) -> int:
+        return self.connection.execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> 'SessionCatalog':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __str__(self):
+        return f'{self.__class__.__name__}(db_path={self.db_path!r})'
+
+    def __repr__(self):
+        return self.__str__()
+
+def _like_prefix(prefix: str) -> str:
+    """LIKE pattern matching the paths that start with a prefix."""
+    escaped = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return escaped + '%'
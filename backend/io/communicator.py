@@ -1,56 +1,129 @@
 import serial
-from typing import Optional, Any
+import queue
+import threading
+import time
+from typing import Optional, Any, Literal
 import logging
+from .protocol import encode_frame
 
 logger = logging.getLogger(__name__)
 
 class SerialCommunicator:
     def __init__(
-        self, 
-        port: str, 
-        baudrate: int = 9600, 
+        self,
+        port: str,
+        baudrate: int = 9600,
         timeout: float = 1,
         chunk_size: int = 1,
-        message_mapping: Optional[dict[Any, Any]] = None
+        message_mapping: Optional[dict[Any, Any]] = None,
+        background: bool = True,
+        queue_size: int = 8,
+        coalesce: bool = True,
+        protocol: Literal['text', 'binary'] = 'text',
+        include_confidence: bool = True,
+        send_on_change: bool = False
     ):
+        """
+        Args:
+            port: Serial port
+            baudrate: Baud rate of the link
+            timeout: Read timeout in seconds
+            chunk_size: Number of messages written at a time
+            message_mapping: Mapping from messages to the strings sent
+            background: Write from a background thread, so that sending never
+                blocks on the serial port
+            queue_size: Maximum number of chunks waiting to be written
+            coalesce: When the link is saturated, write only the newest chunk
+                and discard older ones. Otherwise new chunks are dropped
+                while the queue is full
+            protocol: 'text' sends each message as a line, 'binary' sends
+                class ids as frames of `backend.io.protocol`
+            include_confidence: Whether binary frames carry the confidence
+            send_on_change: Only send a message when it differs from the
+                last one sent
+        """
+        assert queue_size > 0, 'Queue size must be positive'
+        assert protocol in ('text', 'binary'), f'Unknown protocol {protocol!r}'
         self.port = port
         self.baudrate = baudrate
         self.timeout = timeout
         self.chunk_size = chunk_size
         self.message_mapping = message_mapping or dict()
+        self.background = background
+        self.queue_size = queue_size
+        self.coalesce = coalesce
+        self.protocol = protocol
+        self.include_confidence = include_confidence
+        self.send_on_change = send_on_change
 
         self.serial_connection: Optional[serial.Serial] = None
         self.chunk_buffer: list[bytes] = []
         self._connection_warned = False
+        self._last_sent: Optional[Any] = None
+
+        # Chunks are queued with the time they were sent
+        self._queue: queue.Queue[Optional[tuple[bytes, float]]] = queue.Queue(maxsize=queue_size)
+        self._writer: Optional[threading.Thread] = None
+
+        # Counters are updated by both the sending and the writer thread
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
 
     @property
     def is_active(self):
         return (
-            self.serial_connection is not None and 
+            self.serial_connection is not None and
             self.serial_connection.is_open
         )
 
     def open(self):
         if self.is_active:
             return
-        
+
         self.serial_connection = serial.Serial(
             port=self.port,
             baudrate=self.baudrate,
             timeout=self.timeout
         )
 
+        if self.background:
+            self._writer = threading.Thread(
+                target=self._write_loop, name='serial-writer', daemon=True
+            )
+            self._writer.start()
+
+        self._last_sent = None
         logger.info(f'Opened serial connection to {self.port} at {self.baudrate} baud.')
 
     def close(self):
         if not self.is_active:
             return
-        
+
+        if self._writer is not None:
+            self._enqueue(None)
+            self._writer.join(timeout=max(self.timeout, 1))
+            self._writer = None
+            self._discard_queue()
+
         self.serial_connection.close()
         self.serial_connection = None
-        logger.info('Serial connection closed.')
+        logger.info(f'Serial connection closed. Stats: {self.stats}')
+
+    def send(
+        self,
+        message: Any,
+        class_id: Optional[int] = None,
+        confidence: Optional[float] = None
+    ) -> None:
+        """
+        Send a message, or queue it until the chunk is complete.
 
-    def send(self, message: str) -> None:
+        Args:
+            message: Message of the text protocol, mapped with `message_mapping`
+            class_id: Class id of the binary protocol. If None, the message
+                is mapped with `message_mapping` to an integer id
+            confidence: Confidence of the binary protocol, in [0, 1]
+        """
         if not self.is_active:
             self._warn_once()
             return
@@ -59,7 +132,24 @@ class SerialCommunicator:
 
         # Apply message mapping
         mapped = self.message_mapping.get(message, message)
-        self.chunk_buffer.append(mapped.encode('utf-8'))
+
+        if self.protocol == 'binary':
+            if class_id is None:
+                class_id = mapped
+            key = class_id
+        else:
+            key = mapped
+
+        if self.send_on_change and key == self._last_sent:
+            return
+        self._last_sent = key
+
+        if self.protocol == 'binary':
+            self.chunk_buffer.append(encode_frame(
+                int(class_id), confidence if self.include_confidence else None
+            ))
+        else:
+            self.chunk_buffer.append(str(mapped).encode('utf-8'))
 
         if len(self.chunk_buffer) >= self.chunk_size:
             self._flush_buffer()
@@ -68,9 +158,112 @@ class SerialCommunicator:
         if not self.is_active or not self.chunk_buffer:
             return
 
-        self.serial_connection.write(b'\n'.join(self.chunk_buffer) + b'\n')
+        # Frames delimit themselves, lines need a separator
+        if self.protocol == 'binary':
+            payload = b''.join(self.chunk_buffer)
+        else:
+            payload = b'\n'.join(self.chunk_buffer) + b'\n'
         self.chunk_buffer.clear()
 
+        if self._writer is not None:
+            self._enqueue((payload, time.perf_counter()))
+        else:
+            self._write(payload, time.perf_counter())
+
+    def _enqueue(self, item: Optional[tuple[bytes, float]]) -> None:
+        """Queue a chunk without blocking, making room for it if needed."""
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                pass
+
+            if item is not None and not self.coalesce:
+                self._dropped()
+                return
+
+            # Replace the oldest chunk, the writer may empty the queue meanwhile
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                continue
+
+            with self._stats_lock:
+                if item is None:
+                    self.n_dropped += 1
+                else:
+                    self.n_coalesced += 1
+
+    def _write_loop(self) -> None:
+        while (item := self._queue.get()) is not None:
+            if self.coalesce:
+                # Skip to the newest chunk queued while the last one was written
+                while not self._queue.empty():
+                    newer = self._queue.get_nowait()
+                    if newer is None:
+                        self._write(*item)
+                        return
+                    item = newer
+                    with self._stats_lock:
+                        self.n_coalesced += 1
+
+            self._write(*item)
+
+    def _write(self, payload: bytes, sent_at: float) -> None:
+        try:
+            self.serial_connection.write(payload)
+        except Exception as e:
+            with self._stats_lock:
+                self.n_errors += 1
+            # The receiver never saw the chunk, so its messages must be sent again
+            self._last_sent = None
+            logger.error(f'Error writing to serial port: {e}')
+            return
+
+        latency = time.perf_counter() - sent_at
+        with self._stats_lock:
+            self.n_written += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+
+    def _dropped(self) -> None:
+        """Count a chunk that was never written."""
+        with self._stats_lock:
+            self.n_dropped += 1
+        # The receiver never saw the chunk, so its messages must be sent again
+        self._last_sent = None
+
+    def _discard_queue(self) -> None:
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Counters of written, dropped and coalesced chunks, and send to write latency in seconds."""
+        with self._stats_lock:
+            return {
+                'written': self.n_written,
+                'dropped': self.n_dropped,
+                'coalesced': self.n_coalesced,
+                'errors': self.n_errors,
+                'queued': self._queue.qsize(),
+                'mean_latency': self.total_latency / self.n_written if self.n_written else None,
+                'max_latency': self.max_latency if self.n_written else None,
+            }
+
+    def reset_stats(self) -> None:
+        with self._stats_lock:
+            self.n_written = 0
+            self.n_dropped = 0
+            self.n_coalesced = 0
+            self.n_errors = 0
+            self.total_latency = 0.0
+            self.max_latency = 0.0
+
     def _warn_once(self) -> None:
         if not self._connection_warned:
             logger.warning('Serial connection not open.')
@@ -79,4 +272,4 @@ class SerialCommunicator:
     def _restore_warning(self) -> None:
         if self._connection_warned:
             logger.info('Serial connection restored.')
-            self._connection_warned = False
\ No newline at end of file
+            self._connection_warned = False
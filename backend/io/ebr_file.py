@@ -71,6 +71,371 @@
 import os
 import numpy as np
 
+# Numpy types of the data types that can be stored in RAW and EBR files
+_DATA_TYPES = {
+    'int8': np.int8, 'char': np.int8,
+    'uint8': np.uint8, 'unsigned char': np.uint8,
+    'int16': np.int16, 'short': np.int16,
+    'uint16': np.uint16, 'unsigned short': np.uint16,
+    'int32': np.int32, 'int': np.int32,
+    'uint32': np.uint32, 'unsigned int': np.uint32,
+    'int64': np.int64, '__int64': np.int64,
+    'uint64': np.uint64, 'unsigned __int64': np.uint64,
+    'float': np.float32,
+    'double': np.float64,
+    'complex': np.cdouble, 'class std::complex<double>': np.cdouble,
+}
+
+def _read_header(file, magic_key):
+    """ Read file header
+        
+        This function reads the header of a RAW or EBR file without reading its data.
+
+        Parameters
+        ----------
+        file : str
+            The name of the file to read.
+
+        magic_key : bytes
+            The magic key expected in the first line of the file.
+
+        Returns
+        -------
+        dict
+           A dictionary with the header fields, and the position of the first data 
+           byte in the file under the key 'data_offset'.
+    """
+
+    # Check arguments
+
+    if not isinstance(file, str):        
+        raise Exception("The argument 'file' must be a string.")
+
+    if not os.path.exists(file):
+        raise Exception("The specified path is not valid or does not exit.")        
+
+    # Open file
+    data_file = open(file, "rb")
+
+    # Read magic key
+    magic = data_file.readline().strip().lower()
+    if not magic == magic_key:
+        data_file.close()
+        raise Exception("The specified file is not a binary " + magic_key.split()[0].decode("utf-8").upper() + " file.")
+
+    # Read header
+    data_type = "double"
+    fs = 0
+    ns = 0
+    nb = 0
+    bands = []
+    nc = 0
+    channels = []
+    nt = 0
+    trials = []    
+    ncomments = 0
+    comments = []
+    nmarks = 0
+    marks = []
+
+    while True:
+        line = data_file.readline()
+        if not line:
+            data_file.close()
+            raise Exception("The header of the specified file is incomplete.")
+
+        line = line.strip()
+       
+        if line.startswith(b'data_type'):
+            splited_line = line.split(b'data_type', 1)
+            data_type = splited_line[1].strip().decode("utf-8") 
+
+        elif line.startswith(b'sampling_rate'):
+            splited_line = line.split(b'sampling_rate', 1)
+            fs = float(splited_line[1].strip())
+
+        elif line.startswith(b'samples'):
+            splited_line = line.split(b'samples', 1)
+            ns = int(splited_line[1].strip())
+
+        elif line.startswith(b'bands'):
+            splited_line = line.split(b'bands', 1)
+            nb = int(splited_line[1].strip())
+            bands = ['']*nb
+
+        elif line.startswith(b'band_'):
+            splited_line = line.split(b'band_', 1)
+            info = splited_line[1].split(b' ', 1)
+            index = int(info[0])-1
+            bands[index] = info[1].strip().decode("utf-8")  
+
+        elif line.startswith(b'channels'):
+            splited_line = line.split(b'channels', 1)
+            nc = int(splited_line[1].strip())
+            channels = ['']*nc
+
+        elif line.startswith(b'channel_'):
+            splited_line = line.split(b'channel_', 1)
+            info = splited_line[1].split(b' ', 1)
+            index = int(info[0])-1
+            channels[index] = info[1].strip().decode("utf-8")  
+            
+        elif line.startswith(b'trials'):
+            splited_line = line.split(b'trials', 1)
+            nt = int(splited_line[1].strip())
+            trials = ['']*nt
+
+        elif line.startswith(b'trial_'):
+            splited_line = line.split(b'trial_', 1)
+            info = splited_line[1].split(b' ', 1)
+            index = int(info[0])-1
+            trials[index] = info[1].strip().decode("utf-8")  
+
+        elif line.startswith(b'comments'):
+            splited_line = line.split(b'comments', 1)
+            ncomments = int(splited_line[1].strip())
+            comments = ['']*ncomments
+
+        elif line.startswith(b'comment_'):
+            splited_line = line.split(b'comment_', 1)
+            info = splited_line[1].split(b' ', 1)
+            index = int(info[0])-1
+            comments[index] = info[1].strip().decode("utf-8")  
+
+        elif line.startswith(b'marks'):
+            splited_line = line.split(b'marks', 1)
+            nmarks = int(splited_line[1].strip())
+            marks = ['']*nmarks
+
+        elif line.startswith(b'mark_'):
+            splited_line = line.split(b'mark_', 1)
+            info = splited_line[1].split(b' ', 2)
+            index = int(info[0])-1
+            mark_index = int(info[1])
+            marks[index] = (mark_index, info[2].strip().decode("utf-8"))
+
+        elif line.startswith(b'end_header'):
+            break
+
+    data_offset = data_file.tell()
+    data_file.close()
+
+    if data_type not in _DATA_TYPES:
+        raise Exception("The data type '" + data_type + "' is not supported.")
+
+    # Build header structure
+    header = dict()
+
+    header["data_type"] = data_type
+    header["sampling_rate"] = fs
+    header["number_of_trials"] = nt
+    header["trials"] = trials
+    header["number_of_channels"] = nc
+    header["channels"] = channels
+    header["number_of_bands"] = nb
+    header["bands"] = bands
+    header["number_of_samples"] = ns
+    header["number_of_comments"] = ncomments
+    header["comments"] = comments
+    header["number_of_marks"] = nmarks
+    header["marks"] = marks
+    header["data_offset"] = data_offset
+
+    return header
+
+def _selection(selection, names, argument):
+    """ Resolve a selection of trials, channels or bands
+        
+        Parameters
+        ----------
+        selection : None | slice | list
+            None to select everything, a slice, or a list of indices and names.
+
+        names : list
+            The names of all the elements in the file.
+
+        argument : str
+            The name of the argument, for error messages.
+
+        Returns
+        -------
+        tuple
+           The selection as a slice when possible, otherwise as a list of indices,
+           and the names of the selected elements.
+    """
+
+    if selection is None:
+        return slice(None), list(names)
+
+    if isinstance(selection, slice):
+        return selection, [names[i] for i in range(len(names))[selection]]
+
+    if not isinstance(selection, (list, tuple, np.ndarray)):
+        raise Exception("The argument '" + argument + "' must be a slice or a list of indices or names.")
+
+    indices = []
+    for item in selection:
+        if isinstance(item, str):
+            if item not in names:
+                raise Exception("The argument '" + argument + "' refers to '" + item + "', which is not in the file.")
+            indices.append(names.index(item))
+        else:
+            index = int(item)
+            if index < -len(names) or index >= len(names):
+                raise Exception("The argument '" + argument + "' has the index " + str(index) + ", which is out of range.")
+            indices.append(index % len(names))
+
+    # Consecutive indices are read as a slice, so that memory maps stay views
+    if len(indices) > 0 and indices == list(range(indices[0], indices[-1] + 1)):
+        return slice(indices[0], indices[-1] + 1), [names[i] for i in indices]
+
+    return indices, [names[i] for i in indices]
+
+def _sample_selection(samples, ns):
+    """ Resolve a selection of samples, given as None, a slice or a (start, stop) pair. """
+
+    if samples is None:
+        return slice(None), ns
+
+    if isinstance(samples, (list, tuple)) and len(samples) == 2:
+        samples = slice(samples[0], samples[1])
+
+    if not isinstance(samples, slice):
+        raise Exception("The argument 'samples' must be a slice or a (start, stop) pair.")
+
+    return samples, len(range(ns)[samples])
+
+def _read_data(file, header, shape, selections, mmap):
+    """ Read the selected part of the data block of a file
+        
+        Parameters
+        ----------
+        file : str
+            The name of the file to read.
+
+        header : dict
+            The header of the file, from _read_header.
+
+        shape : tuple
+            The shape of the data block as stored in the file.
+
+        selections : list
+            The selection of each dimension of the data block, as slices or lists of indices.
+
+        mmap : bool
+            If True, return a read-only memory map in the data type of the file, 
+            otherwise an array in memory. Integer and float data are converted to 
+            double in memory, as in previous versions of this library.
+
+        Returns
+        -------
+        array
+           The selected data.
+    """
+
+    dtype = np.dtype(_DATA_TYPES[header['data_type']])
+
+    if int(np.prod(shape)) == 0:
+        data = np.zeros(shape, dtype=dtype)
+    else:
+        data = np.memmap(file, dtype=dtype, mode='r', offset=header['data_offset'], shape=shape)
+
+    if all(isinstance(selection, slice) for selection in selections):
+        # Views of the memory map, nothing is read yet
+        data = data[tuple(selections)]
+    else:
+        # A single gather that only reads the selected elements
+        data = data[np.ix_(*[
+            np.arange(n)[selection] if isinstance(selection, slice) else np.asarray(selection, dtype=int)
+            for n, selection in zip(shape, selections)
+        ])]
+
+    if mmap:
+        return data
+
+    if dtype.kind in 'iuf' and dtype != np.float64:
+        return data.astype('float64')
+
+    return np.array(data)
+
+# Size of the blocks converted at a time when saving data in another data type
+_WRITE_CHUNK_BYTES = 1 << 24
+
+def _header_bytes(magic_key, data, lists):
+    """ Build file header
+        
+        This function builds the header lines of a RAW or EBR file, without the 
+        end of header line.
+
+        Parameters
+        ----------
+        magic_key : str
+            The magic key of the first line of the file.
+
+        data : dict
+            The data structure with the header fields.
+
+        lists : list
+            The names of the listed fields before the marks, in file order.
+
+        Returns
+        -------
+        bytes
+           The encoded header.
+    """
+
+    lines = [magic_key]
+    lines.append('data_type ' + data['data_type'])
+    lines.append('sampling_rate ' + str(data['sampling_rate']))
+    lines.append('samples ' + str(data['number_of_samples']))
+
+    for name in lists:
+        lines.append(name + ' ' + str(data['number_of_' + name]))
+        for i in range(data['number_of_' + name]):
+            lines.append('\t' + name[:-1] + '_' + str(i+1) + ' ' + str(data[name][i]))
+
+    lines.append('marks ' + str(data['number_of_marks']))
+    for i in range(data['number_of_marks']):
+        lines.append('\tmark_' + str(i+1) + ' ' + str(data['marks'][i][0]) + ' ' + str(data['marks'][i][1]))
+
+    return ('\n'.join(lines) + '\n').encode(encoding = 'UTF-8')
+
+def _write_data(data_file, array, dtype):
+    """ Write data
+        
+        This function writes an array in row-major order and in the specified data 
+        type. Arrays that already have the data type and layout are written directly 
+        from their buffer, and other arrays are converted in bounded blocks.
+
+        Parameters
+        ----------
+        data_file : file
+            The file to write to.
+
+        array : numpy.ndarray
+            The array to write.
+
+        dtype : numpy.dtype
+            The data type to write.
+    """
+
+    array = np.asarray(array)
+    if array.size == 0:
+        return
+
+    if array.dtype == dtype and array.flags['C_CONTIGUOUS']:
+        data_file.write(memoryview(array.reshape(-1)).cast('B'))
+        return
+
+    # Blocks of whole rows of the last dimension
+    rows = array.reshape(-1, array.shape[-1]) if array.ndim != 1 else array.reshape(1, -1)
+    row_bytes = max(rows.shape[1] * dtype.itemsize, 1)
+    step = max(_WRITE_CHUNK_BYTES // row_bytes, 1)
+
+    for start in range(0, rows.shape[0], step):
+        block = np.ascontiguousarray(rows[start:start + step], dtype=dtype)
+        data_file.write(memoryview(block.reshape(-1)).cast('B'))
+
 def ebr_data(trials, channels, bands, samples, samp_rate):
     """ Initialize EBR data structure
         
@@ -201,81 +566,21 @@ def save_ebr_file(file, data):
     if file_path!='' and not os.path.exists(file_path):
         raise Exception("The specified path is not valid or does not exit.")        
 
-    # Open file
-    data_file = open(file, "wb")
-
-    # Save header
-    data_file.write(b'ebr binary 1.0\n')
-
-    data_file.write(('data_type ' + data['data_type'] + '\n').encode(encoding = 'UTF-8'))
-
-    data_file.write(('sampling_rate ' + str(data['sampling_rate']) +'\n').encode(encoding = 'UTF-8'))
-    data_file.write(('samples ' + str(data['number_of_samples']) +'\n').encode(encoding = 'UTF-8'))
-    
-    data_file.write(('bands ' + str(data['number_of_bands']) +'\n').encode(encoding = 'UTF-8'))
-    for i in range(data['number_of_bands']):
-        data_file.write(('\tband_' + str(i+1) + ' ' + str(data['bands'][i]) +'\n').encode(encoding = 'UTF-8'))
-
-    data_file.write(('channels ' + str(data['number_of_channels']) +'\n').encode(encoding = 'UTF-8'))
-    for i in range(data['number_of_channels']):
-        data_file.write(('\tchannel_' + str(i+1) + ' ' + str(data['channels'][i]) +'\n').encode(encoding = 'UTF-8'))
-
-    data_file.write(('trials ' + str(data['number_of_trials']) +'\n').encode(encoding = 'UTF-8'))
-    for i in range(data['number_of_trials']):
-        data_file.write(('\ttrial_' + str(i+1) + ' ' + str(data['trials'][i]) +'\n').encode(encoding = 'UTF-8'))
-
-    data_file.write(('comments ' + str(data['number_of_comments']) +'\n').encode(encoding = 'UTF-8'))
-    for i in range(data['number_of_comments']):
-        data_file.write(('\tcomment_' + str(i+1) + ' ' + str(data['comments'][i]) +'\n').encode(encoding = 'UTF-8'))
-
-
-    data_file.write(('marks ' + str(data['number_of_marks']) +'\n').encode(encoding = 'UTF-8'))
-    for i in range(data['number_of_marks']):
-        data_file.write(('\tmark_' + str(i+1) + ' ' + str(data['marks'][i][0]) + ' ' + str(data['marks'][i][1])  +'\n').encode(encoding = 'UTF-8'))
-
-    data_file.write(b'end_header\n')
-
-    # Save data 
-    data_type =  data['data_type']
-
-    if data_type == 'int8' or data_type== 'char':
-        data_file.write(data['data'].astype(np.int8).tobytes())
-
-    elif data_type == 'uint8' or data_type== 'unsigned char':
-        data_file.write(data['data'].astype(np.uint8).tobytes())
-
-    elif data_type == 'int16' or data_type== 'short':
-        data_file.write(data['data'].astype(np.int16).tobytes())
+    if data['data_type'] not in _DATA_TYPES:
+        raise Exception("The data type '" + data['data_type'] + "' is not supported.")
+    dtype = np.dtype(_DATA_TYPES[data['data_type']])
 
-    elif data_type == 'uint16' or data_type== 'unsigned short':
-        data_file.write(data['data'].astype(np.uint16).tobytes())
+    # Save header in a single write, then data without intermediate copies
+    header = _header_bytes('ebr binary 1.0', data, ['bands', 'channels', 'trials', 'comments'])
 
-    elif data_type == 'int32' or data_type== 'int':
-        data_file.write(data['data'].astype(np.int32).tobytes())
+    with open(file, "wb") as data_file:
+        data_file.write(header + b'end_header\n')
+        _write_data(data_file, data['data'], dtype)
 
-    elif data_type == 'uint32' or data_type== 'unsigned int':
-        data_file.write(data['data'].astype(np.uint32).tobytes())
-
-    elif data_type == 'int64' or data_type== '__int64':
-        data_file.write(data['data'].astype(np.int64).tobytes())
-
-    elif data_type == 'uint64' or data_type== 'unsigned __int64':
-        data_file.write(data['data'].astype(np.uint64).tobytes())
-
-    elif data_type == 'float':
-        data_file.write(data['data'].astype(np.float32).tobytes())
-
-    elif data_type == 'double':
-        data_file.write(data['data'].astype(np.float64).tobytes())
-
-    elif data_type == 'complex' or data_type== 'class std::complex<double>':
-        data_file.write(data['data'].astype(np.cdouble).tobytes()) 
-
-    data_file.close()
     return
 
 
-def load_ebr_file(file):
+def load_ebr_file(file, mmap=False, trials=None, channels=None, bands=None, samples=None):
     """ Load EBR file
         
         This function loads an EBR file and returns its content in a dictionary.
@@ -285,200 +590,74 @@ def load_ebr_file(file):
         file : str
             The name of the file to load.
 
-        Returns
-        -------
-        dict
-           A dictionary with the loaded data.                
-    """
+        mmap : bool, optional
+            If True, the data is returned as a read-only memory map in the data type
+            of the file, and is only read from disk when accessed. The memory map is a 
+            view when the selection is made of slices or consecutive elements.
 
-    # Check arguments
+        trials : slice | list, optional
+            The trials to load, as a slice or a list of indices or names. All by default.
 
-    if not isinstance(file, str):        
-        raise Exception("The argument 'file' must be a string.")
+        channels : slice | list, optional
+            The channels to load, as a slice or a list of indices or names. All by default.
 
-    if not os.path.exists(file):
-        raise Exception("The specified path is not valid or does not exit.")        
+        bands : slice | list, optional
+            The bands to load, as a slice or a list of indices or names. All by default.
 
-    # Open file
-    data_file = open(file, "rb")
+        samples : slice | tuple, optional
+            The samples to load, as a slice or a (start, stop) pair. All by default.
+            Marks keep their positions in the file.
 
-    # Read magic key
-    magic = data_file.readline().strip().lower()
-    if not magic == b'ebr binary 1.0':
-        raise Exception("The specified file is not a binary EBR file.")
+        Returns
+        -------
+        dict
+           A dictionary with the loaded data.                
+    """
 
     # Read header
-    data_type = "double"
-    fs = 0
-    ns = 0
-    nb = 0
-    bands = []
-    nc = 0
-    channels = []
-    nt = 0
-    trials = []    
-    ncomments = 0
-    comments = []
-    nmarks = 0
-    marks = []
-
-    while True:
-        line = data_file.readline().strip()
-       
-        if line.startswith(b'data_type'):
-            splited_line = line.split(b'data_type', 1)
-            data_type = splited_line[1].strip().decode("utf-8") 
-
-        elif line.startswith(b'sampling_rate'):
-            splited_line = line.split(b'sampling_rate', 1)
-            fs = float(splited_line[1].strip())
+    header = _read_header(file, b'ebr binary 1.0')
 
-        elif line.startswith(b'samples'):
-            splited_line = line.split(b'samples', 1)
-            ns = int(splited_line[1].strip())
-
-        elif line.startswith(b'bands'):
-            splited_line = line.split(b'bands', 1)
-            nb = int(splited_line[1].strip())
-            bands = ['']*nb
-
-        elif line.startswith(b'band_'):
-            splited_line = line.split(b'band_', 1)
-            info = splited_line[1].split(b' ', 1)
-            index = int(info[0])-1
-            bands[index] = info[1].strip().decode("utf-8")  
-
-        elif line.startswith(b'channels'):
-            splited_line = line.split(b'channels', 1)
-            nc = int(splited_line[1].strip())
-            channels = ['']*nc
-
-        elif line.startswith(b'channel_'):
-            splited_line = line.split(b'channel_', 1)
-            info = splited_line[1].split(b' ', 1)
-            index = int(info[0])-1
-            channels[index] = info[1].strip().decode("utf-8")  
-            
-        elif line.startswith(b'trials'):
-            splited_line = line.split(b'trials', 1)
-            nt = int(splited_line[1].strip())
-            trials = ['']*nt
-
-        elif line.startswith(b'trial_'):
-            splited_line = line.split(b'trial_', 1)
-            info = splited_line[1].split(b' ', 1)
-            index = int(info[0])-1
-            trials[index] = info[1].strip().decode("utf-8")  
-
-        elif line.startswith(b'comments'):
-            splited_line = line.split(b'comments', 1)
-            ncomments = int(splited_line[1].strip())
-            comments = ['']*ncomments
-
-        elif line.startswith(b'comment_'):
-            splited_line = line.split(b'comment_', 1)
-            info = splited_line[1].split(b' ', 1)
-            index = int(info[0])-1
-            comments[index] = info[1].strip().decode("utf-8")  
-
-        elif line.startswith(b'marks'):
-            splited_line = line.split(b'marks', 1)
-            nmarks = int(splited_line[1].strip())
-            marks = ['']*nmarks
-
-        elif line.startswith(b'mark_'):
-            splited_line = line.split(b'mark_', 1)
-            info = splited_line[1].split(b' ', 2)
-            index = int(info[0])-1
-            mark_index = int(info[1])
-            marks[index] = (mark_index, info[2].strip().decode("utf-8"))
-
-        elif line.startswith(b'end_header'):
-            break
+    trial_selection, trial_names = _selection(trials, header['trials'], 'trials')
+    channel_selection, channel_names = _selection(channels, header['channels'], 'channels')
+    band_selection, band_names = _selection(bands, header['bands'], 'bands')
+    sample_selection, ns = _sample_selection(samples, header['number_of_samples'])
 
     # Read data
-    data_size = nt*nc*nb*ns
-     
-    if data_type == 'int8' or data_type== 'char':
-        raw_data = data_file.read(data_size)
-        data = np.frombuffer(raw_data, dtype=np.dtype(np.int8))
-        data = data.astype('float64')
-
-    elif data_type == 'uint8' or data_type== 'unsigned char':
-        raw_data = data_file.read(data_size)
-        data = np.frombuffer(raw_data, dtype=np.dtype(np.uint8))
-        data = data.astype('float64')
-
-    elif data_type == 'int16' or data_type== 'short':
-        raw_data = data_file.read(2*data_size)
-        data = np.frombuffer(raw_data, dtype=np.dtype(np.int16))
-        data = data.astype('float64')
-
-    elif data_type == 'uint16' or data_type== 'unsigned short':
-        raw_data = data_file.read(2*data_size)
-        data = np.frombuffer(raw_data, dtype=np.dtype(np.uint16))
-        data = data.astype('float64')
-
-    elif data_type == 'int32' or data_type== 'int':
-        raw_data = data_file.read(4*data_size)
-        data = np.frombuffer(raw_data, dtype=np.dtype(np.int32))
-        data = data.astype('float64')
-
-    elif data_type == 'uint32' or data_type== 'unsigned int':
-        raw_data = data_file.read(4*data_size)
-        data = np.frombuffer(raw_data, dtype=np.dtype(np.uint32))
-        data = data.astype('float64')
-
-    elif data_type == 'int64' or data_type== '__int64':
-        raw_data = data_file.read(8*data_size)
-        data = np.frombuffer(raw_data, dtype=np.dtype(np.int64))
-        data = data.astype('float64')
-
-    elif data_type == 'uint64' or data_type== 'unsigned __int64':
-        raw_data = data_file.read(8*data_size)
-        data = np.frombuffer(raw_data, dtype=np.dtype(np.uint64))
-        data = data.astype('float64')
-
-    elif data_type == 'float':
-        raw_data = data_file.read(4*data_size)
-        data = np.frombuffer(raw_data, dtype=np.dtype(np.float32))
-        data = data.astype('float64')
-
-    elif data_type == 'double':
-        raw_data = data_file.read(8*data_size)
-        data = np.frombuffer(raw_data, dtype=np.dtype(np.float64))
-
-    elif data_type == 'complex' or data_type== 'class std::complex<double>':
-        raw_data = data_file.read(16*data_size)
-        data = np.frombuffer(raw_data, dtype=np.dtype(np.cdouble))
-
-    data = data.reshape((nt, nc, nb, ns))
-
-    data_file.close()
+    shape = (
+        header['number_of_trials'], 
+        header['number_of_channels'], 
+        header['number_of_bands'], 
+        header['number_of_samples']
+    )
+    data = _read_data(
+        file, header, shape, 
+        [trial_selection, channel_selection, band_selection, sample_selection], 
+        mmap
+    )
 
     # Build data structure
     ebr_data = dict()
     
-    ebr_data["data_type"] = data_type
+    ebr_data["data_type"] = header["data_type"]
 
-    ebr_data["sampling_rate"] = fs
+    ebr_data["sampling_rate"] = header["sampling_rate"]
 
-    ebr_data["number_of_trials"] = nt
-    ebr_data["trials"] = trials
+    ebr_data["number_of_trials"] = len(trial_names)
+    ebr_data["trials"] = trial_names
 
-    ebr_data["number_of_channels"] = nc
-    ebr_data["channels"] = channels
+    ebr_data["number_of_channels"] = len(channel_names)
+    ebr_data["channels"] = channel_names
 
-    ebr_data["number_of_bands"] = nb
-    ebr_data["bands"] = bands
+    ebr_data["number_of_bands"] = len(band_names)
+    ebr_data["bands"] = band_names
 
     ebr_data["number_of_samples"] = ns
     
-    ebr_data["number_of_comments"] = ncomments
-    ebr_data["comments"] = comments
+    ebr_data["number_of_comments"] = header["number_of_comments"]
+    ebr_data["comments"] = header["comments"]
 
-    ebr_data["number_of_marks"] = nmarks
-    ebr_data["marks"] = marks
+    ebr_data["number_of_marks"] = header["number_of_marks"]
+    ebr_data["marks"] = header["marks"]
 
     ebr_data["data"] = data
 
@@ -585,265 +764,213 @@ def save_raw_file(file, data):
     if file_path!='' and not os.path.exists(file_path):
         raise Exception("The specified path is not valid or does not exit.")        
 
-    # Open file
-    data_file = open(file, "wb")
+    if data['data_type'] not in _DATA_TYPES:
+        raise Exception("The data type '" + data['data_type'] + "' is not supported.")
+    dtype = np.dtype(_DATA_TYPES[data['data_type']])
 
-    # Save header
-    data_file.write(b'raw binary 1.0\n')
+    # Save header in a single write, then data sample by sample without intermediate copies
+    header = _header_bytes('raw binary 1.0', data, ['channels', 'comments'])
 
-    data_file.write(('data_type ' + data['data_type'] + '\n').encode(encoding = 'UTF-8'))
+    with open(file, "wb") as data_file:
+        data_file.write(header + b'end_header\n')
+        _write_data(data_file, data['data'].transpose(), dtype)
 
-    data_file.write(('sampling_rate ' + str(data['sampling_rate']) +'\n').encode(encoding = 'UTF-8'))
-    data_file.write(('samples ' + str(data['number_of_samples']) +'\n').encode(encoding = 'UTF-8'))
-    
-    data_file.write(('channels ' + str(data['number_of_channels']) +'\n').encode(encoding = 'UTF-8'))
-    for i in range(data['number_of_channels']):
-        data_file.write(('\tchannel_' + str(i+1) + ' ' + str(data['channels'][i]) +'\n').encode(encoding = 'UTF-8'))
-
-    data_file.write(('comments ' + str(data['number_of_comments']) +'\n').encode(encoding = 'UTF-8'))
-    for i in range(data['number_of_comments']):
-        data_file.write(('\tcomment_' + str(i+1) + ' ' + str(data['comments'][i]) +'\n').encode(encoding = 'UTF-8'))
+    return
 
-    data_file.write(('marks ' + str(data['number_of_marks']) +'\n').encode(encoding = 'UTF-8'))
-    for i in range(data['number_of_marks']):
-        data_file.write(('\tmark_' + str(i+1) + ' ' + str(data['marks'][i][0]) + ' ' + str(data['marks'][i][1])  +'\n').encode(encoding = 'UTF-8'))
 
-    data_file.write(b'end_header\n')
+def load_raw_file(file, mmap=False, channels=None, samples=None):
+    """ Load RAW file
+        
+        This function loads a RAW file and returns its content in a dictionary.
 
-    # Save data 
-    data_type =  data['data_type']
+        Parameters
+        ----------
+        file : str
+            The name of the file to load.
 
-    if data_type == 'int8' or data_type== 'char':
-        data_file.write(data['data'].astype(np.int8).transpose().tobytes())
+        mmap : bool, optional
+            If True, the data is returned as a read-only memory map in the data type
+            of the file, and is only read from disk when accessed. The memory map is a 
+            view when the selection is made of slices or consecutive elements.
 
-    elif data_type == 'uint8' or data_type== 'unsigned char':
-        data_file.write(data['data'].astype(np.uint8).transpose().tobytes())
+        channels : slice | list, optional
+            The channels to load, as a slice or a list of indices or names. All by default.
 
-    elif data_type == 'int16' or data_type== 'short':
-        data_file.write(data['data'].astype(np.int16).transpose().tobytes())
+        samples : slice | tuple, optional
+            The samples to load, as a slice or a (start, stop) pair. All by default.
+            Marks keep their positions in the file.
 
-    elif data_type == 'uint16' or data_type== 'unsigned short':
-        data_file.write(data['data'].astype(np.uint16).transpose().tobytes())
+        Returns
+        -------
+        dict
+           A dictionary with the loaded data.                
+    """
 
-    elif data_type == 'int32' or data_type== 'int':
-        data_file.write(data['data'].astype(np.int32).transpose().tobytes())
+    # Read header
+    header = _read_header(file, b'raw binary 1.0')
 
-    elif data_type == 'uint32' or data_type== 'unsigned int':
-        data_file.write(data['data'].astype(np.uint32).transpose().tobytes())
+    channel_selection, channel_names = _selection(channels, header['channels'], 'channels')
+    sample_selection, ns = _sample_selection(samples, header['number_of_samples'])
 
-    elif data_type == 'int64' or data_type== '__int64':
-        data_file.write(data['data'].astype(np.int64).transpose().tobytes())
+    # Read data, stored sample by sample
+    shape = (header['number_of_samples'], header['number_of_channels'])
+    data = _read_data(
+        file, header, shape, [sample_selection, channel_selection], mmap
+    ).transpose()
 
-    elif data_type == 'uint64' or data_type== 'unsigned __int64':
-        data_file.write(data['data'].astype(np.uint64).transpose().tobytes())
+    # Build data structure
 
-    elif data_type == 'float':
-        data_file.write(data['data'].astype(np.float32).transpose().tobytes())
+    ebr_data = dict()
+    
+    ebr_data["data_type"] = header["data_type"]
 
-    elif data_type == 'double':
-        data_file.write(data['data'].astype(np.float64).transpose().tobytes())
+    ebr_data["sampling_rate"] = header["sampling_rate"]
 
-    elif data_type == 'complex' or data_type== 'class std::complex<double>':
-        data_file.write(data['data'].astype(np.cdouble).transpose().tobytes()) 
+    ebr_data["number_of_channels"] = len(channel_names)
+    ebr_data["channels"] = channel_names
 
-    data_file.close()
-    return
+    ebr_data["number_of_samples"] = ns
+    
+    ebr_data["number_of_comments"] = header["number_of_comments"]
+    ebr_data["comments"] = header["comments"]
 
+    ebr_data["number_of_marks"] = header["number_of_marks"]
+    ebr_data["marks"] = header["marks"]
 
-def load_raw_file(file):
-    """ Load RAW file
-        
-        This function loads a RAW file and returns its content in a dictionary.
+    ebr_data["data"] = data
 
-        Parameters
-        ----------
-        file : str
-            The name of the file to load.
+    return ebr_data
 
-        Returns
-        -------
-        dict
-           A dictionary with the loaded data.                
-    """
+# Channels of recorded sessions that are not signals
+_MARK_CHANNEL = 'MARK'
+_TIMESTAMP_CHANNEL = 'TIMESTAMP'
 
-    # Check arguments
+# Mark that starts a new group of a recorded session
+_GROUP_MARK = 101
 
-    if not isinstance(file, str):        
-        raise Exception("The argument 'file' must be a string.")
+def _labels_and_groups(marks):
+    """ Derive sample labels and groups from the MARK channel
+        
+        Labels are the last nonzero mark, or 0 before the first one, and 
+        a new group starts at every group mark. Marks of several trials 
+        are processed independently along the last axis.
+    """
 
-    if not os.path.exists(file):
-        raise Exception("The specified path is not valid or does not exit.")        
+    marks = np.asarray(marks).astype(np.int64)
 
-    # Open file
-    data_file = open(file, "rb")
+    # Forward fill of the nonzero marks along the samples axis
+    positions = np.where(marks != 0, np.arange(marks.shape[-1]), 0)
+    if marks.shape[-1] > 0:
+        positions = np.maximum.accumulate(positions, axis=-1)
+    labels = np.take_along_axis(marks, positions, axis=-1)
 
-    # Read magic key
-    magic = data_file.readline().strip().lower()
-    if not magic == b'raw binary 1.0':
-        raise Exception("The specified file is not a binary RAW file.")
+    groups = np.cumsum(marks == _GROUP_MARK, axis=-1)
+    return labels, groups
 
-    # Read header
-    data_type = "double"
-    fs = 0
-    ns = 0
-    nc = 0
-    channels = []
-    ncomments = 0
-    comments = []
-    nmarks = 0
-    marks = []
+def _load_session(file, dtype):
+    """ Load trial 0 and band 0 of a recorded session as a (channels, samples) block. """
 
-    while True:
-        line = data_file.readline().strip()
-       
-        if line.startswith(b'data_type'):
-            splited_line = line.split(b'data_type', 1)
-            data_type = splited_line[1].strip().decode("utf-8") 
+    results = load_ebr_file(file, mmap=True, trials=[0], bands=[0])
+    block = np.array(results['data'][0, :, 0, :], dtype=dtype)
+    return block, results['channels'], results['sampling_rate']
 
-        elif line.startswith(b'sampling_rate'):
-            splited_line = line.split(b'sampling_rate', 1)
-            fs = float(splited_line[1].strip())
+def load_ebr_file_to_arrays(file, dtype='float64'):
+    """ Load a recorded session as arrays
+        
+        Parameters
+        ----------
+        file : str
+            The name of the EBR file to load.
 
-        elif line.startswith(b'samples'):
-            splited_line = line.split(b'samples', 1)
-            ns = int(splited_line[1].strip())
+        dtype : str, optional
+            The data type of the signals.
 
-        elif line.startswith(b'channels'):
-            splited_line = line.split(b'channels', 1)
-            nc = int(splited_line[1].strip())
-            channels = ['']*nc
+        Returns
+        -------
+        tuple
+           The (samples, channels) signals, the names of the signal channels, 
+           the label and group of each sample, and the sampling rate.
+    """
 
-        elif line.startswith(b'channel_'):
-            splited_line = line.split(b'channel_', 1)
-            info = splited_line[1].split(b' ', 1)
-            index = int(info[0])-1
-            channels[index] = info[1].strip().decode("utf-8")  
-            
-        elif line.startswith(b'comments'):
-            splited_line = line.split(b'comments', 1)
-            ncomments = int(splited_line[1].strip())
-            comments = ['']*ncomments
+    block, channels, sampling_rate = _load_session(file, dtype)
 
-        elif line.startswith(b'comment_'):
-            splited_line = line.split(b'comment_', 1)
-            info = splited_line[1].split(b' ', 1)
-            index = int(info[0])-1
-            comments[index] = info[1].strip().decode("utf-8")  
+    if _MARK_CHANNEL not in channels:
+        raise Exception("The specified file does not have a " + _MARK_CHANNEL + " channel.")
 
-        elif line.startswith(b'marks'):
-            splited_line = line.split(b'marks', 1)
-            nmarks = int(splited_line[1].strip())
-            marks = ['']*nmarks
+    labels, groups = _labels_and_groups(block[channels.index(_MARK_CHANNEL)])
 
-        elif line.startswith(b'mark_'):
-            splited_line = line.split(b'mark_', 1)
-            info = splited_line[1].split(b' ', 2)
-            index = int(info[0])-1
-            mark_index = int(info[1])
-            marks[index] = (mark_index, info[2].strip().decode("utf-8"))
+    signal_rows = [
+        i for i, name in enumerate(channels) 
+        if name not in (_MARK_CHANNEL, _TIMESTAMP_CHANNEL)
+    ]
+    if signal_rows != list(range(len(channels))):
+        block = block[signal_rows]
 
-        elif line.startswith(b'end_header'):
-            break
+    # Channels are contiguous columns of the (samples, channels) view
+    signals = block.T
+    return signals, [channels[i] for i in signal_rows], labels, groups, sampling_rate
 
-    # Read data
-    data_size = nc*ns
-     
-    if data_type == 'int8' or data_type== 'char':
-        raw_data = data_file.read(data_size)
-        data = np.frombuffer(raw_data, dtype=np.dtype(np.int8))
-        data = data.astype('float64')
-
-    elif data_type == 'uint8' or data_type== 'unsigned char':
-        raw_data = data_file.read(data_size)
-        data = np.frombuffer(raw_data, dtype=np.dtype(np.uint8))
-        data = data.astype('float64')
-
-    elif data_type == 'int16' or data_type== 'short':
-        raw_data = data_file.read(2*data_size)
-        data = np.frombuffer(raw_data, dtype=np.dtype(np.int16))
-        data = data.astype('float64')
-
-    elif data_type == 'uint16' or data_type== 'unsigned short':
-        raw_data = data_file.read(2*data_size)
-        data = np.frombuffer(raw_data, dtype=np.dtype(np.uint16))
-        data = data.astype('float64')
-
-    elif data_type == 'int32' or data_type== 'int':
-        raw_data = data_file.read(4*data_size)
-        data = np.frombuffer(raw_data, dtype=np.dtype(np.int32))
-        data = data.astype('float64')
-
-    elif data_type == 'uint32' or data_type== 'unsigned int':
-        raw_data = data_file.read(4*data_size)
-        data = np.frombuffer(raw_data, dtype=np.dtype(np.uint32))
-        data = data.astype('float64')
-
-    elif data_type == 'int64' or data_type== '__int64':
-        raw_data = data_file.read(8*data_size)
-        data = np.frombuffer(raw_data, dtype=np.dtype(np.int64))
-        data = data.astype('float64')
-
-    elif data_type == 'uint64' or data_type== 'unsigned __int64':
-        raw_data = data_file.read(8*data_size)
-        data = np.frombuffer(raw_data, dtype=np.dtype(np.uint64))
-        data = data.astype('float64')
-
-    elif data_type == 'float':
-        raw_data = data_file.read(4*data_size)
-        data = np.frombuffer(raw_data, dtype=np.dtype(np.float32))
-        data = data.astype('float64')
-
-    elif data_type == 'double':
-        raw_data = data_file.read(8*data_size)
-        data = np.frombuffer(raw_data, dtype=np.dtype(np.float64))
-
-    elif data_type == 'complex' or data_type== 'class std::complex<double>':
-        raw_data = data_file.read(16*data_size)
-        data = np.frombuffer(raw_data, dtype=np.dtype(np.cdouble))
-
-    data = data.reshape((ns, nc)).transpose()
+def load_ebr_file_to_trials(file, dtype='float64'):
+    """ Load all trials and bands of an EBR file as a single tensor
+        
+        Bands are flattened into channels, so that each (channel, band) pair 
+        is processed as a separate signal.
 
-    data_file.close()
+        Parameters
+        ----------
+        file : str
+            The name of the EBR file to load.
 
-    # Build data structure
+        dtype : str, optional
+            The data type of the signals.
 
-    ebr_data = dict()
-    
-    ebr_data["data_type"] = data_type
+        Returns
+        -------
+        tuple
+           The (trials, channels * bands, samples) signals, the names of the signal 
+           channels, the labels, and the sampling rate. Labels are the 
+           (trials, samples) forward filled marks when the file has a MARK 
+           channel, or the (trials,) trial names otherwise.
+    """
 
-    ebr_data["sampling_rate"] = fs
+    results = load_ebr_file(file, mmap=True)
+    data = results['data']
+    channels = results['channels']
+    bands = results['bands']
 
-    ebr_data["number_of_channels"] = nc
-    ebr_data["channels"] = channels
+    signal_rows = [
+        i for i, name in enumerate(channels) 
+        if name not in (_MARK_CHANNEL, _TIMESTAMP_CHANNEL)
+    ]
+    n_trials, _, n_bands, n_samples = data.shape
 
-    ebr_data["number_of_samples"] = ns
-    
-    ebr_data["number_of_comments"] = ncomments
-    ebr_data["comments"] = comments
+    # A single gather from the memory map, bands become channels
+    trials = np.array(data[:, signal_rows], dtype=dtype).reshape(n_trials, -1, n_samples)
 
-    ebr_data["number_of_marks"] = nmarks
-    ebr_data["marks"] = marks
+    if n_bands > 1:
+        names = [channels[i] + '_' + band for i in signal_rows for band in bands]
+    else:
+        names = [channels[i] for i in signal_rows]
 
-    ebr_data["data"] = data
+    if _MARK_CHANNEL in channels:
+        labels, _ = _labels_and_groups(data[:, channels.index(_MARK_CHANNEL), 0])
+    else:
+        labels = np.array(results['trials'])
 
-    return ebr_data
+    return trials, names, labels, results['sampling_rate']
 
 def load_ebr_file_to_df(file):
     import pandas as pd
 
-    results = load_ebr_file(file)
-    sampling_rate = results['sampling_rate']
+    block, channels, sampling_rate = _load_session(file, 'float64')
 
-    df = pd.DataFrame(
-        {
-            name: column[0]
-            for name, column in zip(results['channels'], results['data'][0])
-        }
-    )
-    df.rename(columns={'MARK': 'label'}, inplace=True)
+    # The block becomes the frame data without per column copies
+    df = pd.DataFrame(block.T, columns=channels, copy=False)
+    df.rename(columns={_MARK_CHANNEL: 'label'}, inplace=True)
 
-    df['group'] = (df['label'] == 101).cumsum()
-    df['label'] = df['label'].replace(0, pd.NA).ffill().fillna(0)
+    labels, groups = _labels_and_groups(block[channels.index(_MARK_CHANNEL)])
+    df['label'] = labels
+    df['group'] = groups
     return df, sampling_rate
 
 #------------------------------------------------------------------------------------------------------------------
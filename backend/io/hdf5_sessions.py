@@ -0,0 +1,268 @@
+import os
+import h5py
+import numpy as np
+from typing import Optional, Iterator, NamedTuple
+import logging
+from backend.signal_processing import SignalProcessor, Dataset, FeatureBlock
+from backend.signal_processing.feature_extractors import window_plan
+from .sessions import load_session_to_arrays, check_channels
+
+logger = logging.getLogger(__name__)
+
+# Rows written at a time when converting a session
+_WRITE_BLOCK_ROWS = 1 << 20
+
+class WindowBatch(NamedTuple):
+    """Consecutive windows of a session, with the signal rows that cover them."""
+    session: str
+    signals: np.ndarray
+    windows: np.ndarray
+    y: np.ndarray
+    groups: np.ndarray
+
+def window_chunk_rows(
+    window_size: float,
+    step_size: float,
+    sampling_rate: float
+) -> int:
+    """
+    Rows of an HDF5 chunk aligned to a window layout: the smallest multiple
+    of the step that holds a window, so that any window spans at most two
+    chunks and consecutive windows share them.
+    """
+    window_samples = int(window_size * sampling_rate)
+    step_samples = max(int(step_size * sampling_rate), 1)
+    return step_samples * -(-window_samples // step_samples)
+
+def convert_to_hdf5(
+    sources: list[str],
+    output: str,
+    window_size: float,
+    step_size: float,
+    compression: Optional[str] = 'lzf',
+    compression_level: int = 4,
+    dtype: str = 'float64'
+) -> list[str]:
+    """
+    Convert recorded sessions to a single HDF5 file.
+
+    Each session is stored as a group with chunked 'signals', 'labels' and
+    'groups' datasets, and its sampling rate, channels and source as
+    attributes. Sessions already in the output file are replaced.
+
+    Args:
+        sources: EBR files or experiment directories
+        output: Path of the HDF5 file, created if it does not exist
+        window_size: Window duration in seconds that chunks are aligned to
+        step_size: Step duration in seconds that chunks are aligned to
+        compression: 'gzip', 'lzf' or None
+        compression_level: Level of gzip compression, from 0 to 9
+        dtype: Data type of the stored signals
+
+    Returns:
+        Names of the converted sessions, in source order
+    """
+    assert compression in ('gzip', 'lzf', None), f'Unknown compression {compression!r}'
+    filters = {}
+    if compression is not None:
+        filters = {'compression': compression, 'shuffle': True}
+        if compression == 'gzip':
+            filters['compression_opts'] = compression_level
+
+    names = []
+    # Sessions keep their conversion order
+    with h5py.File(output, 'a', track_order=True) as f:
+        for source in sources:
+            signals, channels, labels, groups, sampling_rate = load_session_to_arrays(source, dtype)
+            name = _session_name(source, names)
+            chunk_rows = min(window_chunk_rows(window_size, step_size, sampling_rate), len(signals)) or None
+
+            if name in f:
+                del f[name]
+            group = f.create_group(name)
+            group.attrs['source'] = os.path.abspath(source)
+            group.attrs['sampling_rate'] = sampling_rate
+            group.attrs['channels'] = channels
+            group.attrs['window_size'] = window_size
+            group.attrs['step_size'] = step_size
+
+            dataset = group.create_dataset(
+                'signals', shape=signals.shape, dtype=dtype,
+                chunks=(chunk_rows, signals.shape[1]) if chunk_rows else None,
+                **filters
+            )
+            for start in range(0, len(signals), _WRITE_BLOCK_ROWS):
+                dataset[start:start + _WRITE_BLOCK_ROWS] = signals[start:start + _WRITE_BLOCK_ROWS]
+
+            for key, values, values_dtype in [
+                ('labels', labels.astype(object), h5py.string_dtype()),
+                ('groups', groups, np.int64)
+            ]:
+                group.create_dataset(
+                    key, data=values, dtype=values_dtype,
+                    chunks=(chunk_rows,) if chunk_rows else None, **filters
+                )
+
+            names.append(name)
+            logger.info(f'Converted {source!r} to {output}:{name} with shape {signals.shape}')
+
+    return names
+
+def _session_name(source: str, taken: list[str]) -> str:
+    """Group name of a session, from its file or directory name."""
+    base = os.path.splitext(os.path.basename(os.path.normpath(source)))[0] or 'session'
+    name, i = base, 1
+    while name in taken:
+        name, i = f'{base}_{i}', i + 1
+    return name
+
+class HDF5Sessions:
+    """
+    Reader of sessions converted with `convert_to_hdf5`.
+
+    Signals are only read from disk for the windows that are requested,
+    so datasets can be built from many sessions without loading them.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = h5py.File(path, 'r')
+
+    @property
+    def sessions(self) -> list[str]:
+        return list(self.file.keys())
+
+    def sampling_rate(self, session: str) -> float:
+        return float(self.file[session].attrs['sampling_rate'])
+
+    def channels(self, session: str) -> list[str]:
+        return [str(name) for name in self.file[session].attrs['channels']]
+
+    def signals(self, session: str) -> h5py.Dataset:
+        """(n_samples, n_channels) signals, read lazily when sliced."""
+        return self.file[session]['signals']
+
+    def labels(self, session: str) -> np.ndarray:
+        """Labels as strings, as `load_session_to_arrays` returns them."""
+        dataset = self.file[session]['labels']
+        if h5py.check_string_dtype(dataset.dtype):
+            return dataset.asstr()[:]
+        # Sessions converted before labels were loaded as strings
+        return dataset[:].astype(str)
+
+    def groups(self, session: str) -> np.ndarray:
+        return self.file[session]['groups'][:]
+
+    def batches(
+        self,
+        window_size: float,
+        step_size: float,
+        batch_size: int = 1024,
+        sessions: Optional[list[str]] = None
+    ) -> Iterator[WindowBatch]:
+        """
+        Iterate over the windows of the sessions in batches.
+
+        Each batch reads only the signal rows that its windows cover.
+
+        Args:
+            window_size: Window duration in seconds
+            step_size: Step duration in seconds
+            batch_size: Maximum number of windows of a batch
+            sessions: Sessions to read, all by default
+
+        Yields:
+            WindowBatch with the covered signal rows, a (n_windows, n_channels,
+            window_samples) view of the windows, and their labels and groups
+        """
+        for session in sessions or self.sessions:
+            signals = self.signals(session)
+            sampling_rate = self.sampling_rate(session)
+            plan = window_plan(len(signals), window_size, step_size, sampling_rate)
+            y = plan.at_centers(self.labels(session))
+            groups = plan.at_centers(self.groups(session))
+
+            for first in range(0, plan.n_windows, batch_size):
+                last = min(first + batch_size, plan.n_windows)
+                start = plan.starts[first]
+                rows = signals[start:plan.starts[last - 1] + plan.window_samples]
+
+                windows = window_plan(
+                    len(rows), window_size, step_size, sampling_rate
+                ).windows(rows)
+                yield WindowBatch(session, rows, windows, y[first:last], groups[first:last])
+
+    def build_dataset(
+        self,
+        processor: SignalProcessor,
+        window_size: float,
+        step_size: float,
+        chunk_size: Optional[float] = 60,
+        sessions: Optional[list[str]] = None,
+        ignore_labels: Optional[list] = None
+    ) -> Dataset:
+        """
+        Build a dataset from the sessions, reading their signals chunk by chunk.
+
+        Groups are renumbered so that they are unique across sessions.
+        All sessions must have the same channels.
+
+        Args:
+            processor: Signal processor that extracts the features
+            window_size: Feature window duration in seconds
+            step_size: Window step duration in seconds
+            chunk_size: Seconds of signal read and cleaned at a time,
+                see `SignalProcessor.process_signals`. None reads whole sessions
+            sessions: Sessions to include, all by default
+            ignore_labels: Labels to exclude from dataset, compared as strings
+
+        Returns:
+            Dataset with features (X), encoded labels (y), groups, and label mapping
+        """
+        blocks = []
+        group_offset = 0
+        sessions = sessions or self.sessions
+        expected_channels = self.channels(sessions[0]) if sessions else None
+
+        for session in sessions:
+            check_channels(session, self.channels(session), expected_channels)
+            signals = self.signals(session)
+            sampling_rate = self.sampling_rate(session)
+            plan = window_plan(len(signals), window_size, step_size, sampling_rate)
+            groups = self.groups(session)
+
+            if chunk_size is None:
+                signals = signals[:]
+
+            if plan.n_windows > 0:
+                X = processor.process_signals(
+                    signals, window_size, step_size, sampling_rate, chunk_size=chunk_size
+                )
+                blocks.append(FeatureBlock(
+                    X,
+                    plan.at_centers(self.labels(session)),
+                    plan.at_centers(groups) + group_offset
+                ))
+
+            if len(groups) > 0:
+                group_offset += int(groups.max()) + 1
+
+        if ignore_labels:
+            ignore_labels = [str(label) for label in ignore_labels]
+
+        return processor.build_dataset_from_blocks(blocks, ignore_labels)
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> 'HDF5Sessions':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __str__(self):
+        return f'{self.__class__.__name__}(path={self.path!r}, sessions={len(self.file)})'
+
+    def __repr__(self):
+        return self.__str__()
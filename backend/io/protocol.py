@@ -0,0 +1,115 @@
+"""
+Binary framing of predictions for serial links.
+
+A frame is a start byte, a one-byte class id, an optional one-byte
+confidence quantized to 0-255, and a checksum byte, the XOR of all the
+previous bytes of the frame:
+
+    0xA5 <class id> <checksum>
+    0xA6 <class id> <confidence> <checksum>
+
+The start byte tells the frame length, so frames with and without
+confidence can be mixed on the same link.
+"""
+from typing import NamedTuple, Optional
+
+START_BYTE = 0xA5
+START_BYTE_CONFIDENCE = 0xA6
+FRAME_LENGTHS = {START_BYTE: 3, START_BYTE_CONFIDENCE: 4}
+
+class Frame(NamedTuple):
+    class_id: int
+    confidence: Optional[float] = None
+
+def quantize_confidence(confidence: float) -> int:
+    """Confidence in [0, 1] as a byte."""
+    return min(max(round(confidence * 255), 0), 255)
+
+def encode_frame(class_id: int, confidence: Optional[float] = None) -> bytes:
+    """
+    Encode a prediction as a frame.
+
+    Args:
+        class_id: Class id, from 0 to 255
+        confidence: Probability of the class, omitted from the frame if None
+
+    Returns:
+        The encoded frame
+    """
+    if not 0 <= class_id <= 255:
+        raise ValueError(f'Class id {class_id} does not fit in a byte')
+
+    if confidence is None:
+        return bytes((START_BYTE, class_id, START_BYTE ^ class_id))
+
+    quantized = quantize_confidence(confidence)
+    return bytes((
+        START_BYTE_CONFIDENCE, class_id, quantized,
+        START_BYTE_CONFIDENCE ^ class_id ^ quantized
+    ))
+
+class FrameDecoder:
+    """
+    Streaming decoder of frames, as the receiving firmware would parse them.
+
+    Bytes can be fed in arbitrary pieces. Bytes that do not start a valid
+    frame are skipped, so the decoder resynchronizes after line noise.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.n_frames = 0
+        self.n_invalid = 0
+        self.n_skipped_bytes = 0
+
+    def feed(self, data: bytes) -> list[Frame]:
+        """
+        Decode the complete frames in the received bytes.
+
+        Args:
+            data: Received bytes
+
+        Returns:
+            Decoded frames, in order
+        """
+        self.buffer.extend(data)
+        frames = []
+        i = 0
+
+        while i < len(self.buffer):
+            length = FRAME_LENGTHS.get(self.buffer[i])
+            if length is None:
+                self.n_skipped_bytes += 1
+                i += 1
+                continue
+
+            if i + length > len(self.buffer):
+                break
+
+            body = self.buffer[i + 1:i + length - 1]
+            checksum = self.buffer[i]
+            for byte in body:
+                checksum ^= byte
+
+            if checksum != self.buffer[i + length - 1]:
+                # Resynchronize on the next start byte
+                self.n_invalid += 1
+                i += 1
+                continue
+
+            confidence = body[1] / 255 if len(body) > 1 else None
+            frames.append(Frame(body[0], confidence))
+            i += length
+
+        del self.buffer[:i]
+        self.n_frames += len(frames)
+        return frames
+
+    def __str__(self):
+        return (
+            f'{self.__class__.__name__}(n_frames={self.n_frames}, '
+            f'n_invalid={self.n_invalid}, n_skipped_bytes={self.n_skipped_bytes})'
+        )
+
+    def __repr__(self):
+        return self.__str__()
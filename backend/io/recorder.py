@@ -0,0 +1,192 @@
+import os
+import queue
+import shutil
+import threading
+import numpy as np
+from typing import Optional
+import logging
+from .ebr_file import _DATA_TYPES, _header_bytes
+
+logger = logging.getLogger(__name__)
+
+_END_HEADER = b'end_header\n'
+
+class SessionRecorder:
+    """
+    Streaming writer of RAW files.
+
+    Sample blocks and marks are queued by the caller and written to disk
+    by a background thread, so recording never blocks the live loop. The
+    header is written up front with the sample count and marks left blank,
+    followed by a reserved area that is patched on close. If the final
+    header does not fit in the reserved area, the file is rewritten.
+    """
+
+    def __init__(
+        self,
+        file: str,
+        channels: list[str],
+        sampling_rate: float,
+        data_type: str = 'double',
+        comments: Optional[list[str]] = None,
+        header_reserve: int = 1 << 16
+    ):
+        """
+        Args:
+            file: Path of the RAW file to create
+            channels: Names of the channels of each sample
+            sampling_rate: Sampling rate in Hz
+            data_type: RAW data type of the samples
+            comments: Comments of the file
+            header_reserve: Bytes reserved in the header for the sample
+                count and the marks
+        """
+        assert data_type in _DATA_TYPES, f'Unknown data type {data_type!r}'
+        file_path = os.path.dirname(file)
+        if file_path != '' and not os.path.exists(file_path):
+            raise ValueError(f'The directory of {file!r} does not exist')
+
+        self.file = file
+        self.channels = [str(name) for name in channels]
+        self.sampling_rate = float(sampling_rate)
+        self.data_type = data_type
+        self.comments = list(comments or [])
+        self.header_reserve = header_reserve
+
+        self.n_samples = 0
+        self.marks: list[tuple[int, str]] = []
+
+        self._dtype = np.dtype(_DATA_TYPES[data_type])
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._error: Optional[Exception] = None
+        self._closed = False
+        # Samples and marks are never queued after the end of the queue
+        self._lock = threading.Lock()
+
+        self._file = open(file, 'wb')
+        self._file.write(self._header(0, []) + self._padding(header_reserve) + _END_HEADER)
+        self._data_offset = self._file.tell()
+
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+        logger.info(f'Recording session to {file!r}')
+
+    @property
+    def is_active(self) -> bool:
+        return not self._closed
+
+    def _header(self, n_samples: int, marks: list[tuple[int, str]]) -> bytes:
+        """Header of `save_raw_file`, without the end of header line."""
+        return _header_bytes('raw binary 1.0', {
+            'data_type': self.data_type,
+            'sampling_rate': self.sampling_rate,
+            'number_of_samples': n_samples,
+            'number_of_channels': len(self.channels),
+            'channels': self.channels,
+            'number_of_comments': len(self.comments),
+            'comments': self.comments,
+            'number_of_marks': len(marks),
+            'marks': marks,
+        }, ['channels', 'comments'])
+
+    @staticmethod
+    def _padding(size: int) -> bytes:
+        # Blank lines are skipped by the header parser
+        return b' ' * (size - 1) + b'\n'
+
+    def write(self, data: np.ndarray) -> None:
+        """
+        Queue a block of samples. The block is written as is,
+        so it must not be modified afterwards.
+
+        Args:
+            data: (n_samples, n_channels) array of samples
+        """
+        with self._lock:
+            if self._closed:
+                return
+
+            self._check_error()
+            self.n_samples += len(data)
+            self._queue.put(data)
+
+    def mark(self, name: str, sample: Optional[int] = None) -> None:
+        """
+        Record an event.
+
+        Args:
+            name: Name of the event, in a single line
+            sample: Sample index of the event, the next sample by default
+        """
+        with self._lock:
+            if self._closed:
+                return
+
+            self.marks.append((self.n_samples if sample is None else sample, str(name)))
+
+    def _write_loop(self) -> None:
+        while (data := self._queue.get()) is not None:
+            if self._error is not None:
+                continue
+
+            try:
+                block = np.ascontiguousarray(data, dtype=self._dtype)
+                self._file.write(memoryview(block).cast('B'))
+            except Exception as e:
+                logger.error(f'Error recording session: {e}')
+                self._error = e
+
+    def _check_error(self) -> None:
+        if self._error is not None:
+            raise RuntimeError(f'Session recording failed: {self._error}')
+
+    def close(self) -> Optional[str]:
+        """
+        Wait for the queued samples and write the final header.
+
+        Returns:
+            Path of the recorded file, or None if it was already closed
+        """
+        with self._lock:
+            if self._closed:
+                return None
+
+            self._closed = True
+            self._queue.put(None)
+
+        self._thread.join()
+        self._file.close()
+        self._check_error()
+
+        self._finalize_header()
+        logger.info(f'Recorded {self.n_samples} samples and {len(self.marks)} marks to {self.file!r}')
+        return self.file
+
+    def _finalize_header(self) -> None:
+        header = self._header(self.n_samples, self.marks)
+        reserved = self._data_offset - len(_END_HEADER)
+
+        if len(header) < reserved:
+            # Patch in place, keeping the data offset
+            with open(self.file, 'r+b') as f:
+                f.write(header + self._padding(reserved - len(header)) + _END_HEADER)
+            return
+
+        # The marks overflow the reserved area, rewrite the file
+        logger.warning('Session header overflows its reserved area, rewriting file')
+        tmp_file = self.file + '.tmp'
+
+        with open(self.file, 'rb') as src, open(tmp_file, 'wb') as dst:
+            dst.write(header + _END_HEADER)
+            src.seek(self._data_offset)
+            shutil.copyfileobj(src, dst, 1 << 24)
+        os.replace(tmp_file, self.file)
+
+    def __str__(self):
+        return (
+            f'{self.__class__.__name__}(file={self.file!r}, '
+            f'n_samples={self.n_samples}, n_marks={len(self.marks)})'
+        )
+
+    def __repr__(self):
+        return self.__str__()
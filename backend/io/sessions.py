@@ -0,0 +1,184 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from typing import Optional, Any
+import logging
+from backend.signal_processing import SignalProcessor, Dataset, FeatureBlock
+from backend.signal_processing.feature_extractors import window_plan
+from .ebr_file import load_ebr_file_to_arrays, _TIMESTAMP_CHANNEL
+
+logger = logging.getLogger(__name__)
+
+# Files of an experiment directory saved by Trainer.save
+METADATA_FILE = 'metadata.json'
+SIGNAL_FILE = 'signal_data.csv'
+
+def is_experiment_dir(path: str) -> bool:
+    # Trainers trained on sessions are saved without signal data
+    return (
+        os.path.isdir(path)
+        and os.path.exists(os.path.join(path, METADATA_FILE))
+        and os.path.exists(os.path.join(path, SIGNAL_FILE))
+    )
+
+def load_experiment_to_arrays(
+    path: str,
+    dtype: str = 'float64'
+) -> tuple[np.ndarray, list[str], np.ndarray, np.ndarray, float]:
+    """
+    Load the signal data of an experiment directory saved by `Trainer.save`.
+
+    Args:
+        path: Experiment directory
+        dtype: Data type of the signals
+
+    Returns:
+        The (samples, channels) signals, the names of the signal channels,
+        the label and group of each sample, and the sampling rate
+    """
+    with open(os.path.join(path, METADATA_FILE)) as f:
+        metadata: dict[str, Any] = json.load(f)
+
+    df = pd.read_csv(os.path.join(path, SIGNAL_FILE), index_col=0)
+    channels = [
+        c for c in df.columns if c not in (_TIMESTAMP_CHANNEL, 'label', 'group')
+    ]
+
+    # Channels are contiguous columns of the (samples, channels) view
+    signals = np.asfortranarray(df[channels].to_numpy(dtype=dtype))
+    return (
+        signals,
+        channels,
+        df['label'].to_numpy(),
+        df['group'].to_numpy(dtype=np.int64),
+        metadata['sampling_rate']
+    )
+
+def load_session_to_arrays(
+    path: str,
+    dtype: str = 'float64'
+) -> tuple[np.ndarray, list[str], np.ndarray, np.ndarray, float]:
+    """
+    Load a recorded session, either an EBR file or an experiment directory.
+
+    EBR files label samples with integer marks and experiment directories
+    with the labels given during collection, so labels are returned as
+    strings for sessions of both kinds to be combined.
+
+    Args:
+        path: EBR file or experiment directory
+        dtype: Data type of the signals
+
+    Returns:
+        The (samples, channels) signals, the names of the signal channels,
+        the label and group of each sample, and the sampling rate
+    """
+    if is_experiment_dir(path):
+        signals, channels, labels, groups, sampling_rate = load_experiment_to_arrays(path, dtype)
+    elif os.path.isdir(path):
+        raise ValueError(
+            f'{path!r} is not an experiment directory with signal data ({SIGNAL_FILE})'
+        )
+    else:
+        signals, channels, labels, groups, sampling_rate = load_ebr_file_to_arrays(path, dtype)
+
+    return signals, channels, labels.astype(str), groups, sampling_rate
+
+def check_channels(
+    source: str,
+    channels: list[str],
+    expected: list[str]
+) -> None:
+    """Raise a ValueError if a session does not have the expected channels."""
+    if list(channels) != list(expected):
+        raise ValueError(
+            f'{source!r} has channels {list(channels)}, '
+            f'but previous sessions have {list(expected)}'
+        )
+
+def _process_session(
+    source: str,
+    processor: SignalProcessor,
+    window_size: float,
+    step_size: float,
+    chunk_size: Optional[float],
+    dtype: str
+) -> tuple[Optional[FeatureBlock], list[str], int]:
+    """Windowed features and channels of a session, with its groups numbered from 0."""
+    signals, channels, labels, groups, sampling_rate = load_session_to_arrays(source, dtype)
+    _, groups = np.unique(groups, return_inverse=True)
+    n_groups = int(groups.max()) + 1 if len(groups) > 0 else 0
+
+    plan = window_plan(len(signals), window_size, step_size, sampling_rate)
+    if plan.n_windows == 0:
+        logger.warning(f'Skipping {source!r}: shorter than a single window')
+        return None, channels, n_groups
+
+    X = processor.process_signals(
+        signals, window_size, step_size, sampling_rate, chunk_size=chunk_size
+    )
+    block = FeatureBlock(X, plan.at_centers(labels), plan.at_centers(groups))
+    return block, channels, n_groups
+
+def build_sessions_dataset(
+    sources: list[str],
+    processor: SignalProcessor,
+    window_size: float,
+    step_size: float,
+    ignore_labels: Optional[list] = None,
+    n_jobs: int = -1,
+    chunk_size: Optional[float] = None,
+    dtype: str = 'float64'
+) -> Dataset:
+    """
+    Build a single dataset from many recorded sessions.
+
+    Sessions are loaded and processed in a process pool, each with its own
+    sampling rate, and only their features are sent back. Groups are
+    renumbered so that they are unique across sessions. All sessions must
+    have the same channels.
+
+    Args:
+        sources: EBR files or experiment directories
+        processor: Signal processor that extracts the features
+        window_size: Feature window duration in seconds
+        step_size: Window step duration in seconds
+        ignore_labels: Labels to exclude from dataset, compared as strings
+        n_jobs: Number of worker processes
+        chunk_size: Chunk duration in seconds for chunked cleaning,
+            see `SignalProcessor.process_signals`
+        dtype: Data type of the signals
+
+    Returns:
+        Dataset with features (X), encoded labels (y), groups, and label mapping
+    """
+    logger.info(f'Building dataset from {len(sources)} sessions')
+
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_process_session)(
+            source, processor, window_size, step_size, chunk_size, dtype
+        )
+        for source in sources
+    )
+
+    blocks = []
+    group_offset = 0
+    expected_channels = results[0][1] if results else None
+    for source, (block, channels, n_groups) in zip(sources, results):
+        check_channels(source, channels, expected_channels)
+
+        if block is not None:
+            if blocks and block.X.shape[1] != blocks[0].X.shape[1]:
+                raise ValueError(
+                    f'{source!r} has {block.X.shape[1]} features, '
+                    f'but previous sessions have {blocks[0].X.shape[1]}'
+                )
+            blocks.append(block._replace(groups=block.groups + group_offset))
+        group_offset += n_groups
+
+    if ignore_labels:
+        ignore_labels = [str(label) for label in ignore_labels]
+
+    return processor.build_dataset_from_blocks(blocks, ignore_labels)
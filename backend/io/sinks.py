@@ -0,0 +1,159 @@
+import socket
+import struct
+import zmq
+import numpy as np
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Timestamp, class id and number of classes, followed by float32 probabilities
+_HEADER = struct.Struct('<dHH')
+
+def pack_prediction(
+    timestamp: float,
+    class_id: int,
+    probs: np.ndarray,
+    stream: Optional[str] = None
+) -> bytes:
+    """
+    Pack a prediction as little-endian binary: a float64 timestamp, a uint16
+    class id, a uint16 number of classes and the float32 probabilities,
+    followed by the UTF-8 key of the stream for predictions of a server.
+    """
+    probs = np.asarray(probs, dtype='<f4')
+    packet = _HEADER.pack(timestamp, class_id, len(probs)) + probs.tobytes()
+    return packet if stream is None else packet + stream.encode()
+
+def unpack_prediction(data: bytes) -> tuple[float, int, np.ndarray]:
+    """Unpack a prediction packed with `pack_prediction`, ignoring its stream."""
+    timestamp, class_id, n_classes = _HEADER.unpack_from(data)
+    probs = np.frombuffer(data, dtype='<f4', count=n_classes, offset=_HEADER.size)
+    return timestamp, class_id, probs
+
+def unpack_stream_prediction(data: bytes) -> tuple[Optional[str], float, int, np.ndarray]:
+    """Unpack a prediction packed with `pack_prediction`, with its stream key or None."""
+    timestamp, class_id, probs = unpack_prediction(data)
+    stream = data[_HEADER.size + probs.nbytes:]
+    return stream.decode() if stream else None, timestamp, class_id, probs
+
+class PredictionSink:
+    """
+    Output of the predictions of the live loop.
+
+    Sinks must never block: a prediction that cannot be
+    published immediately is dropped and counted.
+    """
+
+    def __init__(self):
+        self.n_published = 0
+        self.n_dropped = 0
+
+    def publish(
+        self,
+        timestamp: float,
+        class_id: int,
+        probs: np.ndarray,
+        stream: Optional[str] = None
+    ) -> None:
+        """
+        Publish a prediction.
+
+        Args:
+            timestamp: Time of the prediction, in seconds since the epoch
+            class_id: Predicted class
+            probs: Probability of each class
+            stream: Key of the stream of a server prediction
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def __str__(self):
+        return (
+            f'{self.__class__.__name__}(n_published={self.n_published}, '
+            f'n_dropped={self.n_dropped})'
+        )
+
+    def __repr__(self):
+        return self.__str__()
+
+class ZMQPublisher(PredictionSink):
+    def __init__(
+        self,
+        address: str = 'tcp://127.0.0.1:5556',
+        topic: bytes = b'prediction',
+        high_water_mark: int = 100
+    ):
+        """
+        Args:
+            address: Address the PUB socket binds to
+            topic: Topic frame sent before each prediction, for subscriber filtering
+            high_water_mark: Predictions queued per subscriber before dropping
+        """
+        super().__init__()
+        self.address = address
+        self.topic = topic
+
+        self._context = zmq.Context.instance()
+        self._socket = self._context.socket(zmq.PUB)
+        self._socket.setsockopt(zmq.SNDHWM, high_water_mark)
+        self._socket.setsockopt(zmq.LINGER, 0)
+        self._socket.bind(address)
+        logger.info(f'Publishing predictions on {address}')
+
+    def publish(
+        self,
+        timestamp: float,
+        class_id: int,
+        probs: np.ndarray,
+        stream: Optional[str] = None
+    ) -> None:
+        # Server predictions are published on topic/stream, so subscribers
+        # can filter a single stream
+        topic = self.topic if stream is None else self.topic + b'/' + stream.encode()
+        try:
+            self._socket.send_multipart(
+                [topic, pack_prediction(timestamp, class_id, probs, stream)],
+                flags=zmq.NOBLOCK
+            )
+            self.n_published += 1
+        except zmq.Again:
+            self.n_dropped += 1
+
+    def close(self) -> None:
+        self._socket.close()
+
+class UDPPublisher(PredictionSink):
+    def __init__(self, addresses: list[tuple[str, int]]):
+        """
+        Args:
+            addresses: (host, port) of each receiver
+        """
+        super().__init__()
+        self.addresses = [(host, int(port)) for host, port in addresses]
+
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.setblocking(False)
+        logger.info(f'Publishing predictions to {self.addresses}')
+
+    def publish(
+        self,
+        timestamp: float,
+        class_id: int,
+        probs: np.ndarray,
+        stream: Optional[str] = None
+    ) -> None:
+        packet = pack_prediction(timestamp, class_id, probs, stream)
+
+        for address in self.addresses:
+            try:
+                self._socket.sendto(packet, address)
+                self.n_published += 1
+            except OSError:
+                # Full send buffer, or no receiver on a local port
+                self.n_dropped += 1
+
+    def close(self) -> None:
+        self._socket.close()
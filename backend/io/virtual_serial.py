@@ -0,0 +1,309 @@
+"""
+Virtual serial device for measuring SerialCommunicator without a board.
+
+`VirtualSerialPort` creates a pseudo-terminal pair. SerialCommunicator opens
+the slave end by name, as it would open the board's port, and a reader
+thread drains the master end at an emulated baud rate. A pseudo-terminal
+has no baud rate of its own, so the reader only takes bytes as fast as the
+emulated link would transmit them. Once the kernel buffer is full, writes
+block as they would on the real link. The tests use it through the
+`virtual_serial_port` fixture.
+
+Run as a module to benchmark latency and sustainable message rates:
+
+    python -m backend.io.virtual_serial --rates 20 50 100 --chunk-sizes 1 4
+"""
+import os
+import tty
+import time
+import select
+import argparse
+import threading
+import numpy as np
+from typing import Optional, Any
+import logging
+from .communicator import SerialCommunicator
+from .protocol import FrameDecoder
+
+logger = logging.getLogger(__name__)
+
+# Start, data and stop bits of each byte
+_BITS_PER_BYTE = 10
+
+class VirtualSerialPort:
+    """
+    Pseudo-terminal stand-in for a serial device, with the arrival time
+    of every received byte.
+    """
+
+    def __init__(self, baudrate: Optional[int] = 9600, read_size: int = 64):
+        """
+        Args:
+            baudrate: Emulated baud rate, or None to read as fast as possible
+            read_size: Maximum number of bytes taken from the link at a time
+        """
+        self.baudrate = baudrate
+        self.read_size = read_size
+
+        self.received = bytearray()
+        self.arrival_times: list[float] = []
+
+        self._master: Optional[int] = None
+        self._slave: Optional[int] = None
+        self._stop = threading.Event()
+        self._reader: Optional[threading.Thread] = None
+        self.port: Optional[str] = None
+
+    def open(self) -> str:
+        """Create the pseudo-terminal and start reading it. Returns the port name."""
+        self._master, self._slave = os.openpty()
+
+        # Raw mode, so that newlines are not translated
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+
+        self._stop.clear()
+        self._reader = threading.Thread(
+            target=self._read_loop, name='virtual-serial', daemon=True
+        )
+        self._reader.start()
+        return self.port
+
+    def close(self) -> None:
+        if self._reader is None:
+            return
+
+        self._stop.set()
+        self._reader.join()
+        self._reader = None
+        os.close(self._master)
+        os.close(self._slave)
+
+    def _read_loop(self) -> None:
+        byte_time = _BITS_PER_BYTE / self.baudrate if self.baudrate else 0.0
+        line_free_at = 0.0
+
+        while not self._stop.is_set():
+            ready, _, _ = select.select([self._master], [], [], 0.05)
+            if not ready:
+                continue
+
+            try:
+                data = os.read(self._master, self.read_size)
+            except OSError:
+                break
+
+            # Each byte arrives one byte time after the previous one,
+            # or after it was written if the link was idle
+            start = max(time.perf_counter(), line_free_at)
+            times = start + byte_time * np.arange(1, len(data) + 1)
+            line_free_at = times[-1]
+
+            self.received.extend(data)
+            self.arrival_times.extend(times.tolist())
+
+            delay = line_free_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+    def wait_for(self, n_bytes: int, timeout: float = 5) -> bool:
+        """Wait until at least n_bytes have been received."""
+        deadline = time.perf_counter() + timeout
+        while len(self.received) < n_bytes:
+            if time.perf_counter() > deadline:
+                return False
+            time.sleep(0.001)
+        return True
+
+    def __enter__(self) -> 'VirtualSerialPort':
+        self.open()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __str__(self):
+        return (
+            f'{self.__class__.__name__}(port={self.port!r}, baudrate={self.baudrate}, '
+            f'received={len(self.received)})'
+        )
+
+    def __repr__(self):
+        return self.__str__()
+
+def _received_messages(
+    port: VirtualSerialPort,
+    protocol: str
+) -> list[tuple[int, float]]:
+    """Ids of the received messages and the arrival time of their last byte."""
+    data = bytes(port.received)
+    messages = []
+
+    if protocol == 'binary':
+        decoder = FrameDecoder()
+        frames = decoder.feed(data)
+        assert decoder.n_invalid == 0 and decoder.n_skipped_bytes == 0, 'Corrupted stream'
+        # Frames without confidence are 3 bytes long
+        for i, frame in enumerate(frames):
+            messages.append((frame.class_id, port.arrival_times[3 * i + 2]))
+        return messages
+
+    end = -1
+    while (end := data.find(b'\n', end + 1)) != -1:
+        start = data.rfind(b'\n', 0, end) + 1
+        messages.append((int(data[start:end]), port.arrival_times[end]))
+    return messages
+
+def benchmark_communicator(
+    rate: float,
+    chunk_size: int = 1,
+    baudrate: Optional[int] = 9600,
+    duration: float = 2,
+    protocol: str = 'text',
+    background: bool = True,
+    coalesce: bool = True
+) -> dict[str, Any]:
+    """
+    Send messages through SerialCommunicator to a virtual port at a fixed rate.
+
+    Messages are sequence numbers, as lines in the text protocol, or as
+    class ids modulo 256 in the binary protocol.
+
+    Args:
+        rate: Messages sent per second
+        chunk_size: Messages written at a time, see `SerialCommunicator`
+        baudrate: Emulated baud rate
+        duration: Seconds of sending
+        protocol: 'text' or 'binary'
+        background: Whether the communicator writes from a background thread
+        coalesce: Whether the communicator coalesces chunks when saturated
+
+    Returns:
+        Sent and received message counts, the received message rate, the
+        time spent in `send`, and the latency from `send` to the arrival of
+        the last byte of each message
+    """
+    with VirtualSerialPort(baudrate) as port:
+        communicator = SerialCommunicator(
+            port.port,
+            baudrate=baudrate or 9600,
+            chunk_size=chunk_size,
+            background=background,
+            coalesce=coalesce,
+            protocol=protocol,
+            include_confidence=False,
+        )
+        communicator.open()
+
+        n_messages = int(rate * duration)
+        sent_at = np.empty(n_messages)
+        send_times = np.empty(n_messages)
+        start = time.perf_counter()
+
+        for i in range(n_messages):
+            delay = start + i / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+            sent_at[i] = time.perf_counter()
+            communicator.send(str(i), class_id=i % 256)
+            send_times[i] = time.perf_counter() - sent_at[i]
+
+        # Write the last incomplete chunk
+        communicator._flush_buffer()
+        communicator.close()
+
+        # Let the emulated link drain
+        size = -1
+        while size != len(port.received):
+            size = len(port.received)
+            time.sleep(0.2)
+
+        messages = _received_messages(port, protocol)
+
+    # Match received ids to the next sent message with the same id
+    latencies = []
+    seq = 0
+    for message_id, arrived in messages:
+        while seq < n_messages and (seq if protocol == 'text' else seq % 256) != message_id:
+            seq += 1
+        if seq == n_messages:
+            break
+        latencies.append(arrived - sent_at[seq])
+        seq += 1
+
+    latencies = np.array(latencies)
+    received_span = messages[-1][1] - sent_at[0] if messages else 0
+    return {
+        'rate': rate,
+        'chunk_size': chunk_size,
+        'baudrate': baudrate,
+        'protocol': protocol,
+        'sent': n_messages,
+        'received': len(messages),
+        'received_rate': len(messages) / received_span if received_span > 0 else 0,
+        'send_max_ms': send_times.max() * 1e3,
+        'latency_mean_ms': latencies.mean() * 1e3 if len(latencies) else None,
+        'latency_p95_ms': np.percentile(latencies, 95) * 1e3 if len(latencies) else None,
+        'latency_max_ms': latencies.max() * 1e3 if len(latencies) else None,
+    }
+
+def sustainable_rate(
+    results: list[dict[str, Any]],
+    max_latency_ms: float = 100
+) -> Optional[float]:
+    """
+    Highest benchmarked rate where every message arrived, with 95% of them
+    within max_latency_ms.
+    """
+    rates = [
+        result['rate'] for result in results
+        if result['received'] == result['sent']
+        and result['latency_p95_ms'] is not None
+        and result['latency_p95_ms'] <= max_latency_ms
+    ]
+    return max(rates, default=None)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark SerialCommunicator on a virtual serial port')
+    parser.add_argument('--rates', type=float, nargs='+', default=[10, 20, 50, 100, 200])
+    parser.add_argument('--chunk-sizes', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--baudrate', type=int, default=9600)
+    parser.add_argument('--duration', type=float, default=2)
+    parser.add_argument('--protocol', choices=['text', 'binary'], default='text')
+    parser.add_argument('--blocking', action='store_true', help='Write from the sending thread')
+    parser.add_argument('--max-latency-ms', type=float, default=100)
+    args = parser.parse_args()
+
+    columns = [
+        'rate', 'chunk_size', 'sent', 'received', 'received_rate',
+        'send_max_ms', 'latency_mean_ms', 'latency_p95_ms', 'latency_max_ms'
+    ]
+    print(' '.join(f'{c:>15}' for c in columns))
+
+    for chunk_size in args.chunk_sizes:
+        results = []
+        for rate in args.rates:
+            result = benchmark_communicator(
+                rate,
+                chunk_size=chunk_size,
+                baudrate=args.baudrate,
+                duration=args.duration,
+                protocol=args.protocol,
+                background=not args.blocking,
+                # Every message is needed to measure its latency
+                coalesce=False,
+            )
+            results.append(result)
+            print(' '.join(
+                f'{result[c]:>15.2f}' if isinstance(result[c], float) else f'{str(result[c]):>15}'
+                for c in columns
+            ))
+
+        print(
+            f'Maximum sustainable rate with chunk size {chunk_size}: '
+            f'{sustainable_rate(results, args.max_latency_ms)} messages/s\n'
+        )
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,10 @@
 from .trainer import Trainer
 from .predictor import Predictor
+from .server import StreamServer, StreamPrediction
 
 __all__ = [
     'Trainer', 
     'Predictor',
-]
\ No newline at end of file
+    'StreamServer',
+    'StreamPrediction',
+]
@@ -0,0 +1,178 @@
+from typing import Optional
+import numpy as np
+from scipy.special import softmax
+from sklearn.pipeline import Pipeline
+from sklearn.feature_selection import SelectorMixin
+from sklearn.preprocessing import StandardScaler
+from xgboost import XGBClassifier
+import logging
+
+logger = logging.getLogger(__name__)
+
+class CompiledPipeline:
+    """
+    Inference-only form of a fitted selector, scaler and XGBoost pipeline.
+
+    Feature selection is reduced to an index array and scaling to the
+    scaler's mean and scale restricted to those indices, so a prediction
+    is a single gather, two in-place operations and one call to the
+    booster, without sklearn validation or DMatrix construction.
+    """
+
+    def __init__(
+        self,
+        model: XGBClassifier,
+        n_features_in: int,
+        support: np.ndarray,
+        mean: Optional[np.ndarray] = None,
+        scale: Optional[np.ndarray] = None,
+        nthread: int = 1
+    ):
+        self.n_features_in = n_features_in
+        self.support = support
+        self.mean = mean
+        self.scale = scale
+        self.nthread = nthread
+
+        self.objective = model.objective
+        self.n_classes = model.n_classes_
+        self.missing = model.missing
+
+        try:
+            self.iteration_range = (0, model.best_iteration + 1)
+        except AttributeError:
+            self.iteration_range = (0, 0)
+
+        # Own copy, so the thread count does not leak into the pipeline
+        self.booster = model.get_booster().copy()
+        self.booster.set_param({'nthread': nthread})
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        """Apply the folded feature selection and scaling."""
+        X = np.asarray(X)
+        if X.dtype not in (np.float32, np.float64):
+            X = X.astype(np.float64)
+
+        return self.scale_features(X[:, self.support])
+
+    def scale_features(self, X: np.ndarray) -> np.ndarray:
+        """Scale already selected features in place."""
+        # Same operations, order and precision as StandardScaler.transform
+        if self.mean is not None:
+            X -= self.mean.astype(X.dtype, copy=False)
+        if self.scale is not None:
+            X /= self.scale.astype(X.dtype, copy=False)
+        return X
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        if X.shape[1] != self.n_features_in:
+            raise ValueError(
+                f'X has {X.shape[1]} features, but the pipeline '
+                f'was fitted with {self.n_features_in} features'
+            )
+
+        return self._predict_scaled(self.transform(X))
+
+    def predict_proba_selected(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predict from the selected feature columns only, in support order.
+        X is scaled in place.
+        """
+        if X.dtype not in (np.float32, np.float64):
+            X = X.astype(np.float64)
+
+        return self._predict_scaled(self.scale_features(X))
+
+    def _predict_scaled(self, X: np.ndarray) -> np.ndarray:
+        if self.objective == 'multi:softmax':
+            margin = self.booster.inplace_predict(
+                X,
+                iteration_range=self.iteration_range,
+                predict_type='margin',
+                missing=self.missing,
+                validate_features=False
+            )
+            return softmax(margin, axis=1)
+
+        probs = self.booster.inplace_predict(
+            X,
+            iteration_range=self.iteration_range,
+            predict_type='value',
+            missing=self.missing,
+            validate_features=False
+        )
+
+        if probs.ndim == 2 and probs.shape[1] == self.n_classes:
+            return probs
+
+        # Binary objectives only return the probability of class one
+        return np.vstack((1.0 - probs, probs)).T
+
+    def __str__(self):
+        return (
+            f'{self.__class__.__name__}(n_features_in={self.n_features_in}, '
+            f'n_selected={len(self.support)}, nthread={self.nthread})'
+        )
+
+    def __repr__(self):
+        return self.__str__()
+
+
+def compile_pipeline(pipeline: Pipeline, nthread: int = 1) -> CompiledPipeline:
+    """
+    Compile a fitted pipeline into a CompiledPipeline.
+
+    Supported pipelines are any number of feature selectors followed by
+    at most one StandardScaler and a final XGBClassifier.
+
+    Args:
+        pipeline: Fitted sklearn pipeline
+        nthread: Number of threads used by the booster at inference
+
+    Returns:
+        CompiledPipeline producing the same probabilities as the pipeline
+    """
+    *transforms, (_, model) = pipeline.steps
+
+    if not isinstance(model, XGBClassifier):
+        raise ValueError(f'Cannot compile final estimator {model!r}')
+
+    n_features_in = None
+    support = None
+    mean = None
+    scale = None
+    scaled = False
+
+    for name, step in transforms:
+        if step is None or step == 'passthrough':
+            continue
+
+        if n_features_in is None:
+            n_features_in = step.n_features_in_
+            support = np.arange(n_features_in)
+
+        if isinstance(step, SelectorMixin) and not scaled:
+            support = support[step.get_support()]
+
+        elif isinstance(step, StandardScaler) and not scaled:
+            mean = step.mean_ if step.with_mean else None
+            scale = step.scale_ if step.with_std else None
+            scaled = True
+
+        else:
+            raise ValueError(f'Cannot compile step {name!r}: {step!r}')
+
+    if n_features_in is None:
+        n_features_in = model.n_features_in_
+        support = np.arange(n_features_in)
+
+    compiled = CompiledPipeline(
+        model=model,
+        n_features_in=n_features_in,
+        support=support,
+        mean=mean,
+        scale=scale,
+        nthread=nthread
+    )
+    logger.info(f'Compiled inference pipeline: {compiled}')
+    return compiled
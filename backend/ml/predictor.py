@@ -2,7 +2,11 @@ from typing import Optional
 import numpy as np
 from collections import deque
 from sklearn.pipeline import Pipeline
-from backend.signal_processing import SignalProcessor
+from backend.signal_processing import SignalProcessor, ChannelPlan
+from .compiler import CompiledPipeline, compile_pipeline
+import logging
+
+logger = logging.getLogger(__name__)
 
 class Predictor:
     def __init__(
@@ -12,15 +16,27 @@ class Predictor:
         window_size: float,
         step_size: float,
         sampling_rate: int,
+        dtype: str = 'float64',
+        compile_inference: bool = True,
+        inference_nthread: int = 1,
     ):
         self.pipeline = pipeline
         self.processor = processor
         self.window_size = window_size
         self.step_size = step_size
         self.sampling_rate = sampling_rate
+        self.dtype = np.dtype(dtype)
         self.window_samples = int(window_size * self.sampling_rate)
         self.step_samples = int(step_size * self.sampling_rate)
 
+        # The fitted pipeline is compiled on the first prediction
+        self.compile_inference = compile_inference
+        self.inference_nthread = inference_nthread
+        self._compiled: Optional[CompiledPipeline] = None
+        self._plan: Optional[list[ChannelPlan]] = None
+        # Set when the pipeline cannot be compiled, until the next reset
+        self._compile_failed = False
+
         self.readings = deque(maxlen=self.window_samples)
         self.remaining_steps = self.step_samples
         self.n_preds = 0
@@ -29,17 +45,58 @@ class Predictor:
         self.readings = deque(maxlen=self.window_samples)
         self.remaining_steps = self.step_samples
         self.n_preds = 0
+        self._compiled = None
+        self._plan = None
+        self._compile_failed = False
+
+    def _compile(self, n_channels: int) -> None:
+        """Compile the fitted pipeline and plan the feature columns it uses."""
+        try:
+            self._compiled = compile_pipeline(
+                self.pipeline, nthread=self.inference_nthread
+            )
+        except ValueError as e:
+            logger.warning(f'Falling back to the sklearn pipeline: {e}')
+            self._compile_failed = True
+            return
+
+        # Columns of process_signals surviving the NaN drop and the selector
+        columns = self._compiled.support
+        if self.processor.feature_mask is not None:
+            columns = np.flatnonzero(self.processor.feature_mask)[columns]
+
+        try:
+            self._plan = self.processor.plan_columns(
+                columns, n_channels, self.window_size, self.sampling_rate
+            )
+        except NotImplementedError:
+            logger.warning('Feature extractor has no feature schema, extracting all features')
+            self._plan = None
 
     def predict(self) -> tuple[int, np.ndarray]:
+        signals = np.array(self.readings, dtype=self.dtype)
+
+        if self.compile_inference and self._compiled is None and not self._compile_failed:
+            self._compile(n_channels=signals.shape[1])
+        use_compiled = self.compile_inference and not self._compile_failed
+
         # Clean the signals and extract features
         X = self.processor.process_signals(
-            signals=np.array(self.readings),
+            signals=signals,
             window_size=self.window_size,
             step_size=self.step_size,
-            sampling_rate=self.sampling_rate
+            sampling_rate=self.sampling_rate,
+            plan=self._plan if use_compiled else None
         )
 
-        probs = self.pipeline.predict_proba(X)[0]
+        if not use_compiled:
+            probs = self.pipeline.predict_proba(self.processor.select_features(X))
+        elif self._plan is not None:
+            probs = self._compiled.predict_proba_selected(X)
+        else:
+            probs = self._compiled.predict_proba(self.processor.select_features(X))
+
+        probs = probs[0]
         return np.argmax(probs), probs
 
     def update(self, row: np.ndarray) -> Optional[int]:
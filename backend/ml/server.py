@@ -0,0 +1,271 @@
+from typing import Optional, NamedTuple, Hashable, Any
+import time
+import numpy as np
+from sklearn.pipeline import Pipeline
+from backend.signal_processing import SignalProcessor
+from .compiler import CompiledPipeline, compile_pipeline
+import logging
+
+logger = logging.getLogger(__name__)
+
+class StreamPrediction(NamedTuple):
+    stream: Hashable
+    # Number of samples received from the stream when the prediction was due
+    sample: int
+    label: int
+    probs: np.ndarray
+
+class StreamState:
+    """Window buffer of a single stream."""
+
+    def __init__(self, window_samples: int):
+        self.window_samples = window_samples
+        self.tail: Optional[np.ndarray] = None
+        self.n_samples = 0
+        self.n_preds = 0
+        self.last_update = time.monotonic()
+
+    def append(self, rows: np.ndarray, step_samples: int) -> list[tuple[int, np.ndarray]]:
+        """
+        Append readings and return the windows that became due.
+
+        A window is due every step_samples readings once the buffer is full,
+        as in `Predictor.update`.
+
+        Returns:
+            (sample count, (window_samples, n_channels) window) of each due window
+        """
+        joined = rows if self.tail is None else np.concatenate((self.tail, rows))
+        offset = self.n_samples - (len(joined) - len(rows))
+
+        counts = self.n_samples + np.arange(1, len(rows) + 1)
+        full = counts - self.window_samples + 1
+        due = counts[(full > 0) & (full % step_samples == 0)]
+
+        # Windows are views of joined, which is never modified
+        windows = [
+            (int(count), joined[count - offset - self.window_samples:count - offset])
+            for count in due
+        ]
+
+        self.n_samples += len(rows)
+        self.n_preds += len(windows)
+        self.tail = joined[max(len(joined) - self.window_samples + 1, 0):]
+        self.last_update = time.monotonic()
+        return windows
+
+    def __str__(self):
+        return (
+            f'{self.__class__.__name__}(n_samples={self.n_samples}, '
+            f'n_preds={self.n_preds})'
+        )
+
+    def __repr__(self):
+        return self.__str__()
+
+class StreamServer:
+    """
+    Predictions for many streams sharing one fitted pipeline.
+
+    Each stream keeps its own window buffer. Windows that become due in
+    `update` are queued, and `tick` cleans, extracts and predicts all of
+    them at once: one `process_trials` call and one `predict_proba` call
+    per tick, whatever the number of streams. The fixed cost of those
+    calls is shared by all the due windows, so the cost per stream falls
+    as streams are added.
+    """
+
+    def __init__(
+        self,
+        pipeline: Pipeline,
+        processor: SignalProcessor,
+        window_size: float,
+        step_size: float,
+        sampling_rate: int,
+        dtype: str = 'float64',
+        compile_inference: bool = True,
+        inference_nthread: int = 1,
+        stream_timeout: Optional[float] = None,
+    ):
+        """
+        Args:
+            pipeline: Fitted pipeline shared by all streams
+            processor: Signal processor that extracts the features
+            window_size: Feature window duration in seconds
+            step_size: Window step duration in seconds
+            sampling_rate: Sampling frequency in Hz of every stream
+            dtype: Data type of the signals
+            compile_inference: Predict with the compiled pipeline
+            inference_nthread: Threads of the compiled booster
+            stream_timeout: Seconds without readings after which a stream
+                is removed on the next tick, None keeps streams forever
+        """
+        self.pipeline = pipeline
+        self.processor = processor
+        self.window_size = window_size
+        self.step_size = step_size
+        self.sampling_rate = sampling_rate
+        self.dtype = np.dtype(dtype)
+        self.window_samples = int(window_size * self.sampling_rate)
+        self.step_samples = int(step_size * self.sampling_rate)
+        self.stream_timeout = stream_timeout
+
+        # The fitted pipeline is compiled on the first tick
+        self.compile_inference = compile_inference
+        self.inference_nthread = inference_nthread
+        self._compiled: Optional[CompiledPipeline] = None
+        # Set when the pipeline cannot be compiled, until the next reset
+        self._compile_failed = False
+
+        self.streams: dict[Hashable, StreamState] = {}
+        self.n_channels: Optional[int] = None
+        self._pending: list[tuple[Hashable, int, np.ndarray]] = []
+        self.reset_stats()
+
+    def reset(self):
+        self.streams = {}
+        self.n_channels = None
+        self._pending = []
+        self._compiled = None
+        self._compile_failed = False
+        self.reset_stats()
+
+    def remove(self, stream: Hashable) -> None:
+        """Forget a stream and its pending windows."""
+        self.streams.pop(stream, None)
+        self._pending = [item for item in self._pending if item[0] != stream]
+        logger.info(f'Removed stream {stream!r}')
+
+    def update(self, stream: Hashable, data: np.ndarray) -> int:
+        """
+        Update a stream with new readings. Streams are created on their
+        first readings.
+
+        Args:
+            stream: Key of the stream, such as its source address
+            data: (n_samples, n_channels + 1) readings including the timestamp
+
+        Returns:
+            Number of windows of the stream waiting for the next tick
+        """
+        if data.ndim != 2:
+            raise ValueError('Data must be a 2D array')
+
+        # Remove the timestamp from the rows
+        rows = data[:, :-1].astype(self.dtype, copy=False)
+
+        if self.n_channels is None:
+            self.n_channels = rows.shape[1]
+        elif rows.shape[1] != self.n_channels:
+            raise ValueError(
+                f'Stream {stream!r} has {rows.shape[1]} channels, '
+                f'but the server expects {self.n_channels}'
+            )
+
+        state = self.streams.get(stream)
+        if state is None:
+            state = self.streams[stream] = StreamState(self.window_samples)
+            logger.info(f'New stream {stream!r}')
+
+        windows = state.append(rows, self.step_samples)
+        self._pending.extend((stream, count, window) for count, window in windows)
+        return len(windows)
+
+    def _compile(self) -> None:
+        try:
+            self._compiled = compile_pipeline(
+                self.pipeline, nthread=self.inference_nthread
+            )
+        except ValueError as e:
+            logger.warning(f'Falling back to the sklearn pipeline: {e}')
+            self._compile_failed = True
+
+    def predict_windows(self, windows: np.ndarray) -> np.ndarray:
+        """
+        Predict the class probabilities of a batch of windows.
+
+        Args:
+            windows: (n_windows, window_samples, n_channels) array of raw signals
+
+        Returns:
+            (n_windows, n_classes) array of probabilities
+        """
+        if self.compile_inference and self._compiled is None and not self._compile_failed:
+            self._compile()
+
+        # Every window is a trial with a single feature window
+        X = self.processor.process_trials(
+            windows.transpose(0, 2, 1),
+            self.window_size,
+            self.step_size,
+            self.sampling_rate
+        )[:, 0]
+        X = self.processor.select_features(X)
+
+        if self.compile_inference and not self._compile_failed:
+            return self._compiled.predict_proba(X)
+
+        return self.pipeline.predict_proba(X)
+
+    def tick(self) -> list[StreamPrediction]:
+        """
+        Predict all the windows that became due since the last tick.
+
+        Returns:
+            Predictions in the order their windows became due
+        """
+        if self.stream_timeout is not None:
+            now = time.monotonic()
+            for stream, state in list(self.streams.items()):
+                if now - state.last_update > self.stream_timeout:
+                    self.remove(stream)
+
+        if not self._pending:
+            return []
+
+        pending, self._pending = self._pending, []
+        start = time.perf_counter()
+
+        windows = np.stack([window for _, _, window in pending])
+        probs = self.predict_windows(windows)
+        labels = np.argmax(probs, axis=1)
+
+        self.n_ticks += 1
+        self.n_predictions += len(pending)
+        self.max_batch = max(self.max_batch, len(pending))
+        self.total_time += time.perf_counter() - start
+
+        return [
+            StreamPrediction(stream, count, int(label), row)
+            for (stream, count, _), label, row in zip(pending, labels, probs)
+        ]
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Counters of ticks and predictions, and batch sizes and times per prediction in seconds."""
+        return {
+            'streams': len(self.streams),
+            'ticks': self.n_ticks,
+            'predictions': self.n_predictions,
+            'pending': len(self._pending),
+            'mean_batch': self.n_predictions / self.n_ticks if self.n_ticks else None,
+            'max_batch': self.max_batch,
+            'time_per_prediction': (
+                self.total_time / self.n_predictions if self.n_predictions else None
+            ),
+        }
+
+    def reset_stats(self) -> None:
+        self.n_ticks = 0
+        self.n_predictions = 0
+        self.max_batch = 0
+        self.total_time = 0.0
+
+    def __str__(self):
+        return (
+            f'{self.__class__.__name__}(streams={len(self.streams)}, '
+            f'window_samples={self.window_samples}, step_samples={self.step_samples})'
+        )
+
+    def __repr__(self):
+        return self.__str__()
@@ -5,10 +5,12 @@ import joblib
 import numpy as np
 import pandas as pd
 from typing import Optional, Any
+from concurrent.futures import Future, ThreadPoolExecutor
 from sklearn.base import clone
 from sklearn.pipeline import Pipeline
 from sklearn.model_selection import cross_val_score, StratifiedGroupKFold
-from backend.signal_processing import SignalProcessor
+from backend.signal_processing import SignalProcessor, FeatureBlock, Dataset
+from backend.io import build_sessions_dataset
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,13 +25,19 @@ class Trainer:
         sampling_rate: int,
         cross_validate: bool = False,
         should_save: bool = True,
-        base_dir: str = './backend/ml/experiments'
+        base_dir: str = './backend/ml/experiments',
+        incremental_features: bool = False,
+        per_group_processing: bool = False,
+        processing_n_jobs: int = -1,
+        processing_chunk_size: Optional[float] = None,
+        dtype: str = 'float64'
     ):
         self.df = pd.DataFrame()
         self.processor = processor
         self.window_size = window_size
         self.step_size = step_size
         self.sampling_rate = sampling_rate
+        self.dtype = dtype
 
         self.pipeline = pipeline
         self.training = True
@@ -41,7 +49,41 @@ class Trainer:
         self.should_save = should_save
         self.base_dir = base_dir
 
+        # Features of finished groups are computed in the background
+        # so that training only has to assemble them
+        self.incremental_features = incremental_features
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending_blocks: list[Future] = []
+        self._feature_blocks: list[Optional[FeatureBlock]] = []
+        self._group_start = 0
+
+        # Dataset building outside of incremental mode
+        self.per_group_processing = per_group_processing
+        self.processing_n_jobs = processing_n_jobs
+        self.processing_chunk_size = processing_chunk_size
+
         self.label_mapping: Optional[dict[int, Any]] = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Threads and futures cannot be pickled, wait for their results
+        self._collect_feature_blocks()
+        state = self.__dict__.copy()
+        state['_executor'] = None
+        state['_pending_blocks'] = []
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        # Defaults for trainers pickled before incremental features existed
+        state.setdefault('incremental_features', False)
+        state.setdefault('_feature_blocks', [])
+        state.setdefault('_group_start', len(state['df']))
+        state.setdefault('per_group_processing', False)
+        state.setdefault('processing_n_jobs', -1)
+        state.setdefault('processing_chunk_size', None)
+        state.setdefault('dtype', 'float64')
+        self.__dict__.update(state)
+        self._executor = None
+        self._pending_blocks = []
     
     @classmethod
     def from_path(cls, path: str) -> 'Trainer':
@@ -55,6 +97,7 @@ class Trainer:
             'sampling_rate': self.sampling_rate,
             'window_size': self.window_size,
             'step_size': self.step_size,
+            'dtype': self.dtype,
             'processor': self.processor,
 
             # Model information
@@ -87,35 +130,94 @@ class Trainer:
             rows = np.expand_dims(rows, axis=0)
 
         self.curr_steps += rows.shape[0]
-        columns = [f'EBR_{i + 1}' for i in range(rows.shape[-1] - 1)] + ['TIMESTAMP']
+        columns = [f'EBR_{i + 1}' for i in range(rows.shape[-1] - 1)]
 
-        df_row = pd.DataFrame(rows, columns=columns)
+        # Epoch timestamps need double precision even when signals are float32
+        df_row = pd.DataFrame(rows[:, :-1].astype(self.dtype, copy=False), columns=columns)
+        df_row['TIMESTAMP'] = rows[:, -1].astype(np.float64, copy=False)
         df_row['label'] = label
         df_row['group'] = self.curr_group
 
         self.df = pd.concat([self.df, df_row], ignore_index=True)
     
     def switch_group(self) -> None:
+        if self.incremental_features:
+            self._submit_group()
+
         self.curr_group += 1
         self.curr_steps = 0
 
-    def train(self) -> None:
-        assert self.training, 'Cannot train if not in training mode'
+    def _submit_group(self) -> None:
+        """
+        Queue the rows collected since the last submission for feature extraction.
+        Must not run concurrently with `update`, see `Controller.switch_group`.
+        """
+        group_df = self.df.iloc[self._group_start:]
+        self._group_start = len(self.df)
 
-        if self.df.empty:
-            raise ValueError('Cannot train if no data has been collected')
+        if group_df.empty:
+            return
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix='feature-worker'
+            )
 
-        X, y, groups, label_mapping = self.processor.build_dataset(
-            df=self.df, 
+        future = self._executor.submit(
+            self.processor.process_group,
+            df=group_df,
             sampling_rate=self.sampling_rate,
-            window_size=self.window_size, 
-            step_size=self.step_size, 
+            window_size=self.window_size,
+            step_size=self.step_size,
+            chunk_size=self.processing_chunk_size,
+        )
+        self._pending_blocks.append(future)
+
+    def _collect_feature_blocks(self) -> list[Optional[FeatureBlock]]:
+        """Wait for the background worker and return all finished blocks."""
+        self._feature_blocks.extend(
+            future.result() for future in self._pending_blocks
         )
+        self._pending_blocks.clear()
+        return self._feature_blocks
+
+    def train(self, dataset: Optional[Dataset] = None) -> None:
+        """
+        Train the pipeline on the collected data, or on a given dataset.
+
+        Args:
+            dataset: Dataset built with this trainer's processor, window
+                and step size, for example with `build_sessions_dataset`
+        """
+        assert self.training, 'Cannot train if not in training mode'
+
+        if dataset is None and self.df.empty:
+            raise ValueError('Cannot train if no data has been collected')
+
+        if dataset is not None:
+            X, y, groups, label_mapping = dataset
+        elif self.incremental_features:
+            # Flush the current group in case it was not switched
+            self._submit_group()
+            X, y, groups, label_mapping = self.processor.build_dataset_from_blocks(
+                self._collect_feature_blocks()
+            )
+        else:
+            X, y, groups, label_mapping = self.processor.build_dataset(
+                df=self.df, 
+                sampling_rate=self.sampling_rate,
+                window_size=self.window_size, 
+                step_size=self.step_size, 
+                per_group=self.per_group_processing,
+                n_jobs=self.processing_n_jobs,
+                chunk_size=self.processing_chunk_size,
+            )
 
         self.label_mapping = label_mapping
 
         if self.cross_validate:
-            if groups.groupby(y).nunique().min() == 1:
+            label_groups = np.unique(np.column_stack([y, groups]), axis=0)
+            if np.bincount(label_groups[:, 0].astype(int)).min() == 1:
                 logger.warning(
                     'At least one label one unique group — this may cause uneven class '
                     'distribution in cross-validation folds and reduce reliability of results.'
@@ -142,8 +244,36 @@ class Trainer:
         if self.should_save:
             self.save()
 
+    def train_on_sessions(
+        self,
+        sources: list[str],
+        ignore_labels: Optional[list] = None
+    ) -> None:
+        """
+        Train the pipeline on recorded sessions instead of the collected data.
+
+        Sessions are processed in parallel with the processing settings of
+        the trainer, see `build_sessions_dataset`.
+
+        Args:
+            sources: EBR files or experiment directories
+            ignore_labels: Labels to exclude from training
+        """
+        dataset = build_sessions_dataset(
+            sources,
+            self.processor,
+            window_size=self.window_size,
+            step_size=self.step_size,
+            ignore_labels=ignore_labels,
+            n_jobs=self.processing_n_jobs,
+            chunk_size=self.processing_chunk_size,
+            dtype=self.dtype,
+        )
+        self.train(dataset)
+
     def save(self) -> Optional[str]:
-        if self.df.empty:
+        # Models trained on recorded sessions are saved without collected data
+        if self.df.empty and self.training:
             logger.warning('Model was not saved because no data has been collected')
             return
         
@@ -156,7 +286,8 @@ class Trainer:
             os.makedirs(new_exp_dir)
 
             # Save recovered data
-            self.df.to_csv(f'{new_exp_dir}/signal_data.csv')
+            if not self.df.empty:
+                self.df.to_csv(f'{new_exp_dir}/signal_data.csv')
 
             # Save the model if has been trained
             if not self.training:
@@ -191,7 +322,16 @@ class Trainer:
         """
         self.df = pd.DataFrame()
         self.label_mapping = None
+        self._discard_feature_blocks()
         self.curr_group = 0
         self.curr_steps = 0
         self.training = True
-        self.pipeline = clone(self.pipeline)
\ No newline at end of file
+        self.pipeline = clone(self.pipeline)
+
+    def _discard_feature_blocks(self) -> None:
+        for future in self._pending_blocks:
+            future.cancel()
+
+        self._pending_blocks = []
+        self._feature_blocks = []
+        self._group_start = 0
\ No newline at end of file
@@ -1,8 +1,10 @@
 from .processor import SignalProcessor
-from .config import Dataset, ChannelConfig
+from .config import Dataset, FeatureBlock, ChannelConfig, ChannelPlan
 
 __all__ = [
     'ChannelConfig',
+    'ChannelPlan',
     'SignalProcessor',
-    'Dataset'
+    'Dataset',
+    'FeatureBlock',
 ]
\ No newline at end of file
@@ -0,0 +1,114 @@
+"""
+Benchmark of the numba kernels against the NumPy path.
+
+Times BandpassNotchFilter and CustomFeatures with both backends on random
+signals, and reports the largest relative difference between their outputs.
+Kernels are compiled before timing.
+
+    python -m backend.signal_processing.benchmark --durations 1 10 100
+"""
+import time
+import argparse
+import numpy as np
+from typing import Callable, Any
+from .cleaners import BandpassNotchFilter
+from .feature_extractors import CustomFeatures
+
+def _time_ms(function: Callable[[], Any], repeats: int) -> float:
+    """Mean time of a call in milliseconds, after a warm-up call."""
+    function()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats * 1e3
+
+def _max_relative_difference(expected: np.ndarray, result: np.ndarray) -> float:
+    scale = np.maximum(np.abs(expected), 1e-12)
+    return float(np.max(np.abs(result - expected) / scale, initial=0))
+
+def benchmark_kernels(
+    duration: float,
+    sampling_rate: int = 1200,
+    window_size: float = 1,
+    step_size: float = 0.05,
+    repeats: int = 10,
+    seed: int = 0
+) -> list[dict[str, Any]]:
+    """
+    Time the NumPy and numba backends on a random signal.
+
+    Args:
+        duration: Seconds of signal
+        sampling_rate: Sampling frequency in Hz
+        window_size: Feature window duration in seconds
+        step_size: Window step duration in seconds
+        repeats: Timed calls of each backend
+        seed: Seed of the random signal
+
+    Returns:
+        For filtering, simple and advanced features: the time of each
+        backend in milliseconds, the speedup and the largest relative
+        difference between the outputs
+    """
+    signal = np.random.default_rng(seed).standard_normal(int(duration * sampling_rate))
+    clean = BandpassNotchFilter().clean_signal(signal, sampling_rate)
+
+    def stages(backend: str) -> dict[str, Callable[[], np.ndarray]]:
+        cleaner = BandpassNotchFilter(backend=backend)
+        simple = CustomFeatures(simple=True, backend=backend)
+        advanced = CustomFeatures(simple=False, backend=backend)
+        return {
+            'filter': lambda: cleaner.clean_signal(signal, sampling_rate),
+            'simple features': lambda: simple.extract_features(
+                clean, window_size, step_size, sampling_rate
+            ),
+            'advanced features': lambda: advanced.extract_features(
+                clean, window_size, step_size, sampling_rate
+            ),
+        }
+
+    numpy_stages, numba_stages = stages('numpy'), stages('numba')
+
+    results = []
+    for stage, numpy_call in numpy_stages.items():
+        numba_call = numba_stages[stage]
+        numpy_ms = _time_ms(numpy_call, repeats)
+        numba_ms = _time_ms(numba_call, repeats)
+
+        results.append({
+            'stage': stage,
+            'duration': duration,
+            'numpy_ms': numpy_ms,
+            'numba_ms': numba_ms,
+            'speedup': numpy_ms / numba_ms,
+            'max_rel_diff': _max_relative_difference(numpy_call(), numba_call()),
+        })
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark the numba kernels against NumPy')
+    parser.add_argument('--durations', type=float, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--sampling-rate', type=int, default=1200)
+    parser.add_argument('--window-size', type=float, default=1)
+    parser.add_argument('--step-size', type=float, default=0.05)
+    parser.add_argument('--repeats', type=int, default=10)
+    args = parser.parse_args()
+
+    columns = ['stage', 'duration', 'numpy_ms', 'numba_ms', 'speedup', 'max_rel_diff']
+    print(' '.join(f'{c:>18}' for c in columns))
+
+    for duration in args.durations:
+        for result in benchmark_kernels(
+            duration,
+            sampling_rate=args.sampling_rate,
+            window_size=args.window_size,
+            step_size=args.step_size,
+            repeats=args.repeats,
+        ):
+            print(' '.join(
+                f'{result[c]:>18.3g}' if isinstance(result[c], float) else f'{result[c]:>18}'
+                for c in columns
+            ))
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,13 @@
 from .base import SignalCleaner
-from .emg import EMGBiosppy
-from .eeg import EEGBiosppy
+from .emg import EMGBiosppy, EMGFilter
+from .eeg import EEGBiosppy, EEGFilter
 from .shared import BandpassNotchFilter
 
 __all__ = [
     'SignalCleaner',
     'EMGBiosppy',
     'EEGBiosppy',
+    'EMGFilter',
+    'EEGFilter',
     'BandpassNotchFilter',
 ]
\ No newline at end of file
@@ -1,4 +1,5 @@
 import numpy as np
+from scipy.signal import lfilter
 
 class SignalCleaner:
     def __init__(self):
@@ -20,9 +21,81 @@ class SignalCleaner:
             A numpy array of the cleaned signal.
         """
         raise NotImplementedError
+
+    def clean_signals(
+        self,
+        signals: np.ndarray,
+        sampling_rate: int
+    ) -> np.ndarray:
+        """
+        Clean several signals at once.
+
+        Cleaners that can filter along an axis should override this
+        method. By default each signal is cleaned independently.
+
+        Args:
+            signals: (..., n_samples) array of signals, with time along the last axis.
+            sampling_rate: The sampling rate of the signals.
+
+        Returns:
+            A numpy array of the cleaned signals, with the same shape.
+        """
+        flat = signals.reshape(-1, signals.shape[-1])
+        return np.stack([
+            self.clean_signal(signal, sampling_rate) for signal in flat
+        ]).reshape(signals.shape)
+
+    def settling_samples(self, sampling_rate: int) -> int:
+        """
+        Get the number of samples over which the cleaner is affected by
+        the edges of the signal, so that a signal can be cleaned in
+        chunks overlapping by that many samples.
+
+        Args:
+            sampling_rate: The sampling rate of the signal.
+
+        Returns:
+            The number of samples needed on each side of a chunk.
+        """
+        raise NotImplementedError
     
     def __str__(self):
-        return f'{self.__class__.__name__}({self.__dict__})'
+        # Private attributes are caches, not parameters
+        params = {k: v for k, v in self.__dict__.items() if not k.startswith('_')}
+        return f'{self.__class__.__name__}({params})'
 
     def __repr__(self):
-        return self.__str__()
\ No newline at end of file
+        return self.__str__()
+
+
+def iir_settling_samples(
+    filters: list[tuple[np.ndarray, np.ndarray]],
+    tol: float = 1e-12,
+    max_samples: int = 2 ** 22
+) -> int:
+    """
+    Length after which the impulse response of cascaded (b, a) filters
+    stays below tol times its peak.
+
+    The response is simulated rather than derived from the poles, since
+    the roots of high order denominators are numerically unreliable.
+    """
+    n_samples = 0
+    for b, a in filters:
+        length = 1024
+        while True:
+            impulse = np.zeros(length)
+            impulse[0] = 1.0
+            response = np.abs(lfilter(b, a, impulse))
+            if not np.all(np.isfinite(response)):
+                raise ValueError('Filter is numerically unstable')
+
+            last = np.flatnonzero(response > tol * response.max())[-1]
+
+            # Settled well before the end of the simulated response
+            if last < length // 2 or length >= max_samples:
+                break
+            length *= 2
+
+        n_samples += last + 1
+    return int(n_samples)
@@ -1,5 +1,7 @@
 from .biosppy import EEGBiosppy
+from .native import EEGFilter
 
 __all__ = [
-    'EEGBiosppy'
+    'EEGBiosppy',
+    'EEGFilter'
 ]
\ No newline at end of file
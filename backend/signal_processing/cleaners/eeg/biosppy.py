@@ -12,9 +12,15 @@ class EEGBiosppy(SignalCleaner):
         signal: np.ndarray, 
         sampling_rate: int
     ) -> np.ndarray:
-        return eeg.eeg(
+        filtered = eeg.eeg(
             signal=signal, 
             sampling_rate=sampling_rate, 
             show=self.show
         )['filtered']
+
+        # biosppy filters in double precision and returns (n_samples, 1)
+        # signals, they keep the input shape as the other cleaners do
+        return filtered.reshape(signal.shape).astype(
+            np.result_type(signal.dtype, np.float32), copy=False
+        )
     
\ No newline at end of file
@@ -1,5 +1,7 @@
 from .biosppy import EMGBiosppy
+from .native import EMGFilter
 
 __all__ = [
     'EMGBiosppy',
+    'EMGFilter',
 ]
\ No newline at end of file
@@ -12,9 +12,12 @@ class EMGBiosppy(SignalCleaner):
         signal: np.ndarray, 
         sampling_rate: int
     ) -> np.ndarray:
-        return emg.emg(
+        filtered = emg.emg(
             signal=signal, 
             sampling_rate=sampling_rate, 
             show=self.show
         )['filtered']
+
+        # biosppy filters in double precision
+        return filtered.astype(np.result_type(signal.dtype, np.float32), copy=False)
     
\ No newline at end of file
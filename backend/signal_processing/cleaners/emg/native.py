@@ -0,0 +1,59 @@
+import numpy as np
+from scipy.signal import butter, filtfilt
+from ..base import SignalCleaner, iir_settling_samples
+
+class EMGFilter(SignalCleaner):
+    """
+    Filtering stage of biosppy.signals.emg.emg, without onset detection.
+    Produces the same 'filtered' signal as EMGBiosppy.
+    """
+
+    def __init__(self, order: int = 4, frequency: float = 100):
+        """
+        Args:
+            order: Butterworth highpass order
+            frequency: Highpass cutoff in Hz
+        """
+        super().__init__()
+        self.order = order
+        self.frequency = frequency
+        self._filters: dict[float, tuple[np.ndarray, np.ndarray]] = {}
+
+    def _coefficients(self, sampling_rate: float) -> tuple[np.ndarray, np.ndarray]:
+        """Highpass (b, a) coefficients, computed once per sampling rate."""
+        if sampling_rate not in self._filters:
+            self._filters[sampling_rate] = butter(
+                self.order,
+                2.0 * self.frequency / float(sampling_rate),
+                btype='highpass'
+            )
+        return self._filters[sampling_rate]
+
+    def _filter(
+        self,
+        signal: np.ndarray,
+        sampling_rate: int,
+        axis: int
+    ) -> np.ndarray:
+        b, a = self._coefficients(sampling_rate)
+        filtered = filtfilt(b, a, signal, axis=axis)
+
+        # Filtered in double precision, as biosppy
+        return filtered.astype(np.result_type(signal.dtype, np.float32), copy=False)
+
+    def clean_signal(
+        self,
+        signal: np.ndarray,
+        sampling_rate: int
+    ) -> np.ndarray:
+        return self._filter(signal, sampling_rate, axis=0)
+
+    def clean_signals(
+        self,
+        signals: np.ndarray,
+        sampling_rate: int
+    ) -> np.ndarray:
+        return self._filter(signals, sampling_rate, axis=-1)
+
+    def settling_samples(self, sampling_rate: int) -> int:
+        return iir_settling_samples([self._coefficients(sampling_rate)])
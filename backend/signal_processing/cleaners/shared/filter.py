@@ -1,6 +1,7 @@
 import numpy as np
-from scipy.signal import butter, filtfilt, iirnotch
-from ..base import SignalCleaner
+from scipy.signal import butter, filtfilt, iirnotch, lfilter_zi
+from ..base import SignalCleaner, iir_settling_samples
+from ... import kernels
 
 class BandpassNotchFilter(SignalCleaner):
     def __init__(
@@ -9,33 +10,98 @@ class BandpassNotchFilter(SignalCleaner):
         high: int = 450,
         order: int = 2,
         freq: float = 50.0,
-        Q: int = 30
+        Q: int = 30,
+        backend: str = 'numpy'
     ):
+        """
+        Args:
+            low: Bandpass low cutoff in Hz
+            high: Bandpass high cutoff in Hz
+            order: Butterworth order of the bandpass
+            freq: Notch frequency in Hz
+            Q: Notch quality factor
+            backend: 'numpy' for scipy.signal.filtfilt, or 'numba' to run
+                each zero-phase filter as a single compiled kernel
+        """
         super().__init__()
+        assert backend in kernels.BACKENDS, f'Unknown backend {backend!r}'
         self.low = low
         self.high = high
         self.order = order
         self.freq = freq
         self.Q = Q
+        self.backend = backend
+        self._filters: dict[int, list[tuple[np.ndarray, np.ndarray, np.ndarray]]] = {}
+
+    def _coefficients(
+        self,
+        sampling_rate: int
+    ) -> list[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Bandpass and notch (b, a, zi) coefficients, normalized so that
+        a[0] == 1 and computed once per sampling rate.
+        """
+        if sampling_rate not in self._filters:
+            fs = sampling_rate
+            filters = [
+                butter(
+                    self.order,
+                    [self.low/(fs/2), self.high/(fs/2)],
+                    btype='band'
+                ),
+                iirnotch(self.freq, self.Q, fs)
+            ]
+            self._filters[sampling_rate] = [
+                (b / a[0], a / a[0], lfilter_zi(b, a)) for b, a in filters
+            ]
+        return self._filters[sampling_rate]
 
     def clean_signal(
-        self, 
-        signal: np.ndarray, 
+        self,
+        signal: np.ndarray,
         sampling_rate: int
     ) -> np.ndarray:
-        # Helper functions
-        def bandpass_filter(signal, fs):
-            b, a = butter(
-                self.order, 
-                [self.low/(fs/2), self.high/(fs/2)], 
-                btype='band'
-            )
-            return filtfilt(b, a, signal)
-
-        def notch_filter(signal, fs):
-            b, a = iirnotch(self.freq, self.Q, fs)
-            return filtfilt(b, a, signal)
-        
-        filtered = bandpass_filter(signal, sampling_rate)
-        filtered = notch_filter(filtered, sampling_rate)
-        return filtered
\ No newline at end of file
+        # Coefficients follow the signal precision so that float32 signals
+        # are filtered in single precision. The numba kernel accumulates in
+        # double precision, but returns the signal precision as well
+        dtype = np.result_type(signal.dtype, np.float32)
+        filtered = signal
+
+        for b, a, zi in self._coefficients(sampling_rate):
+            if self.backend == 'numba':
+                padlen = 3 * max(len(a), len(b))
+                if len(filtered) <= padlen:
+                    raise ValueError(
+                        'The length of the input vector x must be greater '
+                        f'than padlen, which is {padlen}.'
+                    )
+                filtered = kernels.filtfilt(
+                    b, a, zi, filtered.astype(dtype, copy=False), padlen
+                )
+            else:
+                filtered = filtfilt(b.astype(dtype), a.astype(dtype), filtered)
+
+        return filtered
+
+    def clean_signals(
+        self,
+        signals: np.ndarray,
+        sampling_rate: int
+    ) -> np.ndarray:
+        # The compiled kernel filters one signal at a time
+        if self.backend == 'numba':
+            return super().clean_signals(signals, sampling_rate)
+
+        # scipy filters along the last axis
+        return self.clean_signal(signals, sampling_rate)
+
+    def settling_samples(self, sampling_rate: int) -> int:
+        return iir_settling_samples(
+            [(b, a) for b, a, _ in self._coefficients(sampling_rate)]
+        )
+
+    def __setstate__(self, state: dict) -> None:
+        # Filters pickled before the backend was selectable
+        state.setdefault('backend', 'numpy')
+        state.setdefault('_filters', {})
+        self.__dict__.update(state)
@@ -1,4 +1,4 @@
-import pandas as pd
+import numpy as np
 from typing import NamedTuple, Optional
 from dataclasses import dataclass
 from .feature_extractors import FeatureExtractor
@@ -9,13 +9,25 @@ logger = logging.getLogger(__name__)
 
 class Dataset(NamedTuple):
     """Container for ML-ready dataset."""
-    X: pd.DataFrame
-    y: pd.Series
-    groups: pd.Series
+    X: np.ndarray
+    y: np.ndarray
+    groups: np.ndarray
     label_mapping: dict[int, str]
 
+class FeatureBlock(NamedTuple):
+    """Windowed features of a single group, before dataset assembly."""
+    X: np.ndarray
+    y: np.ndarray
+    groups: np.ndarray
+
 @dataclass
 class ChannelConfig:
     """Configuration for a single channel (EMG or EEG)."""
     signal_cleaner: SignalCleaner
-    feature_extractor: FeatureExtractor
\ No newline at end of file
+    feature_extractor: FeatureExtractor
+
+class ChannelPlan(NamedTuple):
+    """Features to extract from a single channel and their output columns."""
+    channel: int
+    config: ChannelConfig
+    positions: np.ndarray
\ No newline at end of file
@@ -1,11 +1,14 @@
-from .base import FeatureExtractor
+from .base import FeatureExtractor, SelectedFeatures
 from .shared import CustomFeatures, TsfelFeatures, TsfreshFeatures
-from .windowing import sliding_window_center
+from .windowing import WindowPlan, window_plan, sliding_window_center
 
 __all__ = [
     'FeatureExtractor',
+    'SelectedFeatures',
     'CustomFeatures',
     'TsfelFeatures',
     'TsfreshFeatures',
+    'WindowPlan',
+    'window_plan',
     'sliding_window_center'
 ]
\ No newline at end of file
@@ -1,14 +1,15 @@
 import numpy as np
+from typing import Optional
 
 class FeatureExtractor:
     def __init__(self):
         pass
 
     def extract_features(
-        self, 
-        signal: np.ndarray, 
-        window_size: float, 
-        step_size: float, 
+        self,
+        signal: np.ndarray,
+        window_size: float,
+        step_size: float,
         sampling_rate: int
     ) -> np.ndarray:
         """
@@ -24,9 +25,123 @@ class FeatureExtractor:
             A numpy array of features.
         """
         raise NotImplementedError
-    
+
+    def extract_channels(
+        self,
+        signals: np.ndarray,
+        window_size: float,
+        step_size: float,
+        sampling_rate: int,
+        channels: Optional[list[int]] = None
+    ) -> list[np.ndarray]:
+        """
+        Extract features from several channels.
+
+        Extractors that can process all channels at once should
+        override this method. By default each channel is extracted
+        independently.
+
+        Args:
+            signals: (n_samples, n_channels) array of signals.
+            window_size: The size of the window to extract features from.
+            step_size: The step size to extract features from.
+            sampling_rate: The sampling rate of the signal.
+            channels: The input channel of each signal, for extractors with
+                per-channel settings. Signal i is channel i by default.
+
+        Returns:
+            A list with the features of each channel.
+        """
+        return [
+            self.extract_features(signal, window_size, step_size, sampling_rate)
+            for signal in signals.T
+        ]
+
+    def feature_names(
+        self,
+        window_size: float,
+        sampling_rate: int
+    ) -> list[str]:
+        """
+        Get the names of the features returned by extract_features.
+
+        Args:
+            window_size: The size of the window to extract features from.
+            sampling_rate: The sampling rate of the signal.
+
+        Returns:
+            A list of feature names, in column order.
+        """
+        raise NotImplementedError
+
+    def select(
+        self,
+        names: list[str],
+        window_size: float,
+        sampling_rate: int
+    ) -> 'FeatureExtractor':
+        """
+        Get an extractor that only returns the given features.
+
+        Extractors that can skip the computation of unused features
+        should override this method. By default all features are
+        computed and the requested columns are kept.
+
+        Args:
+            names: The feature names to keep, in the desired column order.
+            window_size: The size of the window to extract features from.
+            sampling_rate: The sampling rate of the signal.
+
+        Returns:
+            A feature extractor returning only the requested features.
+        """
+        all_names = self.feature_names(window_size, sampling_rate)
+        return SelectedFeatures(self, [all_names.index(name) for name in names])
+
     def __str__(self):
-        return f'{self.__class__.__name__}({self.__dict__})'
+        # Private attributes are caches, not parameters
+        params = {k: v for k, v in self.__dict__.items() if not k.startswith('_')}
+        return f'{self.__class__.__name__}({params})'
 
     def __repr__(self):
-        return self.__str__()
\ No newline at end of file
+        return self.__str__()
+
+
+class SelectedFeatures(FeatureExtractor):
+    def __init__(self, extractor: FeatureExtractor, indices: list[int]):
+        super().__init__()
+        self.extractor = extractor
+        self.indices = indices
+
+    def extract_features(
+        self,
+        signal: np.ndarray,
+        window_size: float,
+        step_size: float,
+        sampling_rate: int
+    ) -> np.ndarray:
+        features = self.extractor.extract_features(
+            signal, window_size, step_size, sampling_rate
+        )
+        return features[:, self.indices]
+
+    def extract_channels(
+        self,
+        signals: np.ndarray,
+        window_size: float,
+        step_size: float,
+        sampling_rate: int,
+        channels: Optional[list[int]] = None
+    ) -> list[np.ndarray]:
+        channel_features = self.extractor.extract_channels(
+            signals, window_size, step_size, sampling_rate, channels=channels
+        )
+        return [features[:, self.indices] for features in channel_features]
+
+    def feature_names(
+        self,
+        window_size: float,
+        sampling_rate: int
+    ) -> list[str]:
+        names = self.extractor.feature_names(window_size, sampling_rate)
+        return [names[i] for i in self.indices]
@@ -1,8 +1,20 @@
 import numpy as np
-from ..windowing import sliding_windows
+from ..windowing import window_plan
 from ..base import FeatureExtractor
+from ... import kernels
 import scipy
 
+SIMPLE_FEATURE_NAMES = ['rms', 'mav', 'wl', 'zc', 'ssc']
+
+ADVANCED_FEATURE_NAMES = [
+    'rms', 'mav', 'wl', 'zc', 'ssc',
+    'var', 'iemg', 'std', 'skewness', 'kurtosis', 'wamp',
+    'activity', 'mobility', 'complexity',
+    'mnf', 'mdf', 'spectral_entropy'
+]
+
+WAMP_THRESHOLD = 0.05
+
 def get_simple_features(window, sampling_rate):
     rms = np.sqrt(np.mean(window**2))
     mav = np.mean(np.abs(window))
@@ -23,7 +35,7 @@ def get_advanced_features(window, sampling_rate):
     std = np.std(window)
     skewness = scipy.stats.skew(window)
     kurtosis = scipy.stats.kurtosis(window)
-    wamp = np.sum(np.abs(np.diff(window)) > 0.05)
+    wamp = np.sum(np.abs(np.diff(window)) > WAMP_THRESHOLD)
 
     # Hjorth Parameters
     activity = np.var(window)
@@ -45,11 +57,31 @@ def get_advanced_features(window, sampling_rate):
         mnf, mdf, spectral_entropy
     ]
 
+def get_frequency_features(windows, sampling_rate):
+    """mnf, mdf and spectral_entropy of all windows at once."""
+    fft_vals = np.abs(np.fft.rfft(windows, axis=1))
+    fft_freqs = np.fft.rfftfreq(windows.shape[1], d=1/sampling_rate)
+    total = np.sum(fft_vals, axis=1, keepdims=True)
+
+    mnf = fft_vals @ fft_freqs / total[:, 0]
+    mdf = fft_freqs[np.argmax(np.cumsum(fft_vals, axis=1) >= total / 2, axis=1)]
+    spectral_entropy = -np.sum((fft_vals / total) * np.log2(fft_vals / total + 1e-12), axis=1)
+
+    return np.column_stack([mnf, mdf, spectral_entropy])
+
 
 class CustomFeatures(FeatureExtractor):
-    def __init__(self, simple: bool = True):
+    def __init__(self, simple: bool = True, backend: str = 'numpy'):
+        """
+        Args:
+            simple: Extract SIMPLE_FEATURE_NAMES instead of ADVANCED_FEATURE_NAMES
+            backend: 'numpy', or 'numba' to compute the time domain
+                features of each window with fused compiled kernels
+        """
         super().__init__()
+        assert backend in kernels.BACKENDS, f'Unknown backend {backend!r}'
         self.simple = simple
+        self.backend = backend
         self.get_features = get_simple_features if simple else get_advanced_features
 
     def extract_features(
@@ -59,8 +91,45 @@ class CustomFeatures(FeatureExtractor):
         step_size: float, 
         sampling_rate: int
     ) -> np.ndarray:
-        
-        return np.array([
-            self.get_features(window, sampling_rate)
-            for window in sliding_windows(signal, window_size, step_size, sampling_rate)
-        ])
\ No newline at end of file
+        plan = window_plan(len(signal), window_size, step_size, sampling_rate)
+        dtype = np.result_type(signal.dtype, np.float32)
+
+        if self.backend == 'numba':
+            features = self._extract_compiled(plan.windows(signal), sampling_rate)
+            return features.astype(dtype, copy=False)
+
+        return np.array(
+            [
+                self.get_features(window, sampling_rate)
+                for window in plan.windows(signal)
+            ],
+            dtype=dtype
+        )
+
+    def _extract_compiled(
+        self,
+        windows: np.ndarray,
+        sampling_rate: int
+    ) -> np.ndarray:
+        if self.simple:
+            features = np.empty((len(windows), len(SIMPLE_FEATURE_NAMES)))
+            kernels.simple_features(windows, features)
+            return features
+
+        features = np.empty((len(windows), len(ADVANCED_FEATURE_NAMES)))
+        kernels.time_domain_features(windows, WAMP_THRESHOLD, features[:, :-3])
+        if len(windows):
+            features[:, -3:] = get_frequency_features(windows, sampling_rate)
+        return features
+
+    def feature_names(
+        self,
+        window_size: float,
+        sampling_rate: int
+    ) -> list[str]:
+        return list(SIMPLE_FEATURE_NAMES if self.simple else ADVANCED_FEATURE_NAMES)
+
+    def __setstate__(self, state: dict) -> None:
+        # Extractors pickled before the backend was selectable
+        state.setdefault('backend', 'numpy')
+        self.__dict__.update(state)
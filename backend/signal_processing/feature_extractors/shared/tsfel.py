@@ -1,33 +1,161 @@
+import os
 import numpy as np
 import tsfel
 import pandas as pd
-from tqdm import tqdm
+from typing import Optional, Union
 from ..base import FeatureExtractor
-from ..windowing import sliding_windows
+from ..windowing import window_plan
+
+def _tsfel_names(cfg: dict, window_size: float, sampling_rate: int) -> list[str]:
+    """Output names of a tsfel config, found by running it on a dummy window."""
+    window = np.random.default_rng(0).standard_normal(int(window_size * sampling_rate))
+    features = tsfel.time_series_features_extractor(
+        cfg, pd.DataFrame(window), verbose=0, fs=sampling_rate
+    )
+    # Drop the '0_' prefix given by the dataframe column
+    return [column.split('_', 1)[1] for column in features.columns]
 
 class TsfelFeatures(FeatureExtractor):
-    def __init__(self, verbose: bool = False):
+    def __init__(
+        self,
+        verbose: bool = False,
+        domain: Optional[Union[str, list[str]]] = None,
+        cfg: Optional[dict] = None,
+        features: Optional[list[str]] = None,
+        n_jobs: Optional[int] = None
+    ):
+        """
+        Args:
+            verbose: Show tsfel progress
+            domain: tsfel domain or list of domains to extract, all by default
+            cfg: Custom tsfel feature config, overrides domain
+            features: Output feature names to keep, in column order
+            n_jobs: Processes used by tsfel when extracting many windows,
+                None extracts them in the calling process
+        """
         super().__init__()
         self.verbose = verbose
+        self.domain = domain
+        self.cfg = cfg
+        self.features = features
+        self.n_jobs = n_jobs
+        self._configs: dict[tuple[float, int], tuple[dict, list[str], Optional[list[int]]]] = {}
+
+    def _config(
+        self,
+        window_size: float,
+        sampling_rate: int
+    ) -> tuple[dict, list[str], Optional[list[int]]]:
+        """
+        Build the tsfel config once per window size and sampling rate.
+
+        Returns:
+            The config, its output names, and the position of each
+            selected feature in the output, or None without a selection
+        """
+        key = (window_size, sampling_rate)
+
+        if key not in self._configs:
+            cfg = self.cfg or tsfel.get_features_by_domain(self.domain)
+            indices = None
+
+            if self.features is not None:
+                # Keep only the functions producing the selected features
+                selected = set(self.features)
+                subset_cfg = {}
+
+                for domain, domain_features in cfg.items():
+                    for name, params in domain_features.items():
+                        if params['use'] != 'yes':
+                            continue
+
+                        outputs = _tsfel_names(
+                            {domain: {name: params}}, window_size, sampling_rate
+                        )
+                        if selected.intersection(outputs):
+                            subset_cfg.setdefault(domain, {})[name] = params
+
+                cfg = subset_cfg
+
+            names = _tsfel_names(cfg, window_size, sampling_rate)
+            if self.features is not None:
+                indices = [names.index(name) for name in self.features]
+
+            self._configs[key] = (cfg, names, indices)
+
+        return self._configs[key]
+
+    def feature_names(
+        self,
+        window_size: float,
+        sampling_rate: int
+    ) -> list[str]:
+        if self.features is not None:
+            return list(self.features)
+
+        _, names, _ = self._config(window_size, sampling_rate)
+        return list(names)
+
+    def select(
+        self,
+        names: list[str],
+        window_size: float,
+        sampling_rate: int
+    ) -> FeatureExtractor:
+        return TsfelFeatures(
+            verbose=self.verbose,
+            domain=self.domain,
+            cfg=self.cfg,
+            features=list(names),
+            n_jobs=self.n_jobs
+        )
 
     def extract_features(
-        self, 
-        signal: np.ndarray, 
-        window_size: float, 
-        step_size: float, 
+        self,
+        signal: np.ndarray,
+        window_size: float,
+        step_size: float,
         sampling_rate: int
     ) -> np.ndarray:
-        features = []
-        pbar = tqdm(total=len(signal), desc='Extracting features', disable=not self.verbose)
-        step = int(window_size * sampling_rate)
+        cfg, names, indices = self._config(window_size, sampling_rate)
+        n_features = len(names) if indices is None else len(indices)
+
+        plan = window_plan(len(signal), window_size, step_size, sampling_rate)
+        window_samples = plan.window_samples
+        n_windows = plan.n_windows
+
+        if n_windows == 0:
+            return np.empty((0, n_features))
+
+        windows = plan.windows(signal)
+
+        # tsfel extracts the columns of a 2D window in a single call, so
+        # windows are stacked as columns into one block per process
+        if self.n_jobs is None:
+            n_blocks = 1
+        else:
+            n_blocks = min(n_windows, os.cpu_count() if self.n_jobs == -1 else self.n_jobs)
+
+        block_size = -(-n_windows // n_blocks)
+        padding = n_blocks * block_size - n_windows
+        if padding:
+            windows = np.concatenate([windows, np.repeat(windows[-1:], padding, axis=0)])
+
+        blocks = windows.reshape(n_blocks, block_size, window_samples).transpose(0, 2, 1)
 
-        for window in sliding_windows(signal, window_size, step_size, sampling_rate):
-            cfg = tsfel.get_features_by_domain()
-            window_features = tsfel.time_series_features_extractor(cfg, pd.DataFrame(window), verbose=0, fs=sampling_rate)
-            window_features = window_features.values[0]
-            features.append(window_features)
-            pbar.update(step)
+        features_df = tsfel.time_series_features_extractor(
+            cfg,
+            list(blocks) if n_blocks > 1 else blocks[0],
+            fs=sampling_rate,
+            verbose=int(self.verbose),
+            n_jobs=self.n_jobs if n_blocks > 1 else None,
+            header_names=range(block_size)
+        )
 
-        pbar.close()
+        # Columns are named '{window}_{feature}' and sorted by tsfel
+        columns = [f'{i}_{name}' for i in range(block_size) for name in names]
+        features = features_df[columns].values.reshape(-1, len(names))[:n_windows]
 
-        return np.array(features)
\ No newline at end of file
+        if indices is not None:
+            features = features[:, indices]
+        return features
@@ -1,42 +1,178 @@
 import numpy as np
 import pandas as pd
 import tsfresh
+from tsfresh import defaults
+from typing import Optional
+from tsfresh.feature_extraction.settings import from_columns, ComprehensiveFCParameters
 from ..base import FeatureExtractor
-from ..windowing import sliding_windows
+from ..windowing import window_plan
 
 class TsfreshFeatures(FeatureExtractor):
-    def __init__(self, verbose: bool = False):
+    def __init__(
+        self,
+        verbose: bool = False,
+        features: Optional[list[str]] = None,
+        default_fc_parameters: Optional[dict] = None,
+        kind_to_fc_parameters: Optional[dict[int, dict]] = None,
+        n_jobs: int = defaults.N_PROCESSES,
+        chunksize: Optional[int] = defaults.CHUNKSIZE
+    ):
+        """
+        Args:
+            verbose: Show the tsfresh progress bar
+            features: Output feature names to keep, in column order
+            default_fc_parameters: tsfresh feature calculators of the channels
+                without their own calculators, all of them by default
+            kind_to_fc_parameters: Feature calculators of specific channels,
+                keyed by the column of the channel in the input signals of
+                the processor
+            n_jobs: Processes used by tsfresh, 0 extracts in the calling process
+            chunksize: Number of (window, channel) series per tsfresh task
+        """
         super().__init__()
         self.verbose = verbose
+        self.features = features
+        self.default_fc_parameters = default_fc_parameters
+        self.kind_to_fc_parameters = kind_to_fc_parameters
+        self.n_jobs = n_jobs
+        self.chunksize = chunksize
+
+    def _fc_parameters(self, channels: list[int]) -> dict:
+        """tsfresh parameters of each kind, where kind k is the k-th signal of the given channels."""
+        # tsfresh matches kinds by their string representation
+        if self.features is not None:
+            fc_parameters = from_columns(
+                [f'signal__{name}' for name in self.features]
+            )['signal']
+            return {
+                'kind_to_fc_parameters': {
+                    str(kind): fc_parameters for kind in range(len(channels))
+                }
+            }
+
+        default_fc_parameters = self.default_fc_parameters
+        kind_to_fc_parameters = None
+        if self.kind_to_fc_parameters:
+            kind_to_fc_parameters = {
+                str(kind): self.kind_to_fc_parameters[channel]
+                for kind, channel in enumerate(channels)
+                if channel in self.kind_to_fc_parameters
+            }
+            # tsfresh extracts nothing from the kinds missing from the map
+            # when no defaults are given, so they get all the calculators
+            if default_fc_parameters is None:
+                default_fc_parameters = ComprehensiveFCParameters()
+
+        return {
+            'default_fc_parameters': default_fc_parameters,
+            'kind_to_fc_parameters': kind_to_fc_parameters
+        }
+
+    def feature_names(
+        self,
+        window_size: float,
+        sampling_rate: int
+    ) -> list[str]:
+        if self.features is not None:
+            return list(self.features)
+
+        if self.kind_to_fc_parameters:
+            raise NotImplementedError('Feature names differ between channels')
+
+        window = np.random.default_rng(0).standard_normal(int(window_size * sampling_rate))
+        features_df = tsfresh.extract_features(
+            pd.DataFrame({
+                'id': 0,
+                'time': np.arange(len(window)),
+                'signal': window
+            }),
+            column_id='id',
+            column_sort='time',
+            default_fc_parameters=self.default_fc_parameters,
+            disable_progressbar=True,
+            n_jobs=0
+        )
+        return [column.split('__', 1)[1] for column in features_df.columns]
+
+    def select(
+        self,
+        names: list[str],
+        window_size: float,
+        sampling_rate: int
+    ) -> FeatureExtractor:
+        return TsfreshFeatures(
+            verbose=self.verbose,
+            features=list(names),
+            default_fc_parameters=self.default_fc_parameters,
+            kind_to_fc_parameters=self.kind_to_fc_parameters,
+            n_jobs=self.n_jobs,
+            chunksize=self.chunksize
+        )
 
     def extract_features(
-        self, 
-        signal: np.ndarray, 
-        window_size: float, 
-        step_size: float, 
+        self,
+        signal: np.ndarray,
+        window_size: float,
+        step_size: float,
         sampling_rate: int
     ) -> np.ndarray:
-        
-        segments = []
-        segment_id = []
-        segment_time = []
+        return self.extract_channels(
+            signal[:, np.newaxis], window_size, step_size, sampling_rate
+        )[0]
 
-        for i, window in enumerate(sliding_windows(signal, window_size, step_size, sampling_rate)):
-            segments.extend(window)
-            segment_id.extend([i] * len(window))
-            segment_time.extend(list(range(len(window))))
+    def extract_channels(
+        self,
+        signals: np.ndarray,
+        window_size: float,
+        step_size: float,
+        sampling_rate: int,
+        channels: Optional[list[int]] = None
+    ) -> list[np.ndarray]:
+        plan = window_plan(len(signals), window_size, step_size, sampling_rate)
+        window_samples = plan.window_samples
+        n_windows = plan.n_windows
+        n_channels = signals.shape[1]
+
+        if channels is None:
+            channels = list(range(n_channels))
+        assert len(channels) == n_channels, 'One channel is required per signal'
+
+        if n_windows == 0:
+            n_features = len(self.feature_names(window_size, sampling_rate))
+            return [np.empty((0, n_features)) for _ in range(n_channels)]
+
+        # (n_channels, n_windows, window_samples) view, flattened
+        # channel by channel into the tsfresh long format
+        windows = plan.windows(signals).transpose(1, 0, 2)
 
         df = pd.DataFrame({
-            'id': segment_id,
-            'time': segment_time,
-            'signal': segments
+            'id': np.tile(np.repeat(np.arange(n_windows), window_samples), n_channels),
+            'time': np.tile(np.arange(window_samples), n_channels * n_windows),
+            'kind': np.repeat(np.arange(n_channels), n_windows * window_samples),
+            'value': windows.reshape(-1)
         })
 
         features_df = tsfresh.extract_features(
             df,
             column_id='id',
             column_sort='time',
-            disable_progressbar=not self.verbose
+            column_kind='kind',
+            column_value='value',
+            disable_progressbar=not self.verbose,
+            n_jobs=self.n_jobs,
+            chunksize=self.chunksize,
+            **self._fc_parameters(channels)
         )
 
-        return features_df.values
\ No newline at end of file
+        channel_features = []
+        for channel in range(n_channels):
+            if self.features is not None:
+                columns = [f'{channel}__{name}' for name in self.features]
+            else:
+                columns = [
+                    column for column in features_df.columns
+                    if column.startswith(f'{channel}__')
+                ]
+            channel_features.append(features_df[columns].values)
+
+        return channel_features
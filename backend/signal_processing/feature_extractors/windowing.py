@@ -1,37 +1,107 @@
 import numpy as np
+from functools import lru_cache
 from typing import Generator
 
+class WindowPlan:
+    """
+    Sliding window layout of a signal with a given length.
+
+    Window starts and centers are computed once as index arrays, and
+    windows are returned as strided views of the signal without copies.
+    Use `window_plan` to get a cached instance.
+    """
+
+    def __init__(
+        self,
+        n_samples: int,
+        window_size: float,
+        step_size: float,
+        sampling_rate: int
+    ):
+        self.n_samples = n_samples
+        self.window_samples = int(window_size * sampling_rate)
+        self.step_samples = int(step_size * sampling_rate)
+
+        self.starts = np.arange(
+            0, n_samples - self.window_samples + 1, self.step_samples
+        )
+        self.centers = self.starts + self.window_samples // 2
+        self.n_windows = len(self.starts)
+
+        # Plans are shared through the cache
+        self.starts.setflags(write=False)
+        self.centers.setflags(write=False)
+
+    def windows(self, array: np.ndarray) -> np.ndarray:
+        """
+        Read-only view of the windows of an array.
+
+        Args:
+            array: (n_samples,) signal or (n_samples, n_channels) signals
+
+        Returns:
+            (n_windows, window_samples) view for a signal, or
+            (n_windows, n_channels, window_samples) view for signals
+        """
+        if self.n_windows == 0:
+            shape = (0, *array.shape[1:], self.window_samples)
+            return np.empty(shape, dtype=array.dtype)
+
+        return np.lib.stride_tricks.sliding_window_view(
+            array[:self.n_samples], self.window_samples, axis=0
+        )[::self.step_samples]
+
+    def at_centers(self, array: np.ndarray) -> np.ndarray:
+        """Values of an array at the center of each window."""
+        return array[self.centers]
+
+    def __str__(self):
+        return (
+            f'{self.__class__.__name__}(n_samples={self.n_samples}, '
+            f'window_samples={self.window_samples}, '
+            f'step_samples={self.step_samples}, n_windows={self.n_windows})'
+        )
+
+    def __repr__(self):
+        return self.__str__()
+
+@lru_cache(maxsize=128)
+def window_plan(
+    n_samples: int,
+    window_size: float,
+    step_size: float,
+    sampling_rate: int
+) -> WindowPlan:
+    """Get the cached WindowPlan of a signal length and window layout."""
+    return WindowPlan(n_samples, window_size, step_size, sampling_rate)
+
 def sliding_windows_indices(
-    signal: np.ndarray, 
-    window_size: float, 
-    step_size: float, 
+    signal: np.ndarray,
+    window_size: float,
+    step_size: float,
     sampling_rate: int
 ) -> Generator[tuple[int, int], None, None]:
-    window_samples = int(window_size * sampling_rate)
-    step_samples = int(step_size * sampling_rate)
+    plan = window_plan(len(signal), window_size, step_size, sampling_rate)
 
-    for start in range(0, len(signal) - window_samples + 1, step_samples):
-        yield start, start + window_samples
+    for start in plan.starts.tolist():
+        yield start, start + plan.window_samples
 
 def sliding_windows(
-    signal: np.ndarray, 
-    window_size: float, 
-    step_size: float, 
+    signal: np.ndarray,
+    window_size: float,
+    step_size: float,
     sampling_rate: int
 ) -> Generator[np.ndarray, None, None]:
-    for start, end in sliding_windows_indices(signal, window_size, step_size, sampling_rate):
-        yield signal[start:end]
+    plan = window_plan(len(signal), window_size, step_size, sampling_rate)
+    yield from plan.windows(signal)
 
 def sliding_window_center(
-    array: np.ndarray, 
-    window_size: float, 
-    step_size: float, 
+    array: np.ndarray,
+    window_size: float,
+    step_size: float,
     sampling_rate: int
 ) -> np.ndarray:
     """
     Get the center of each sliding window.
     """
-    indices = list(sliding_windows_indices(array, window_size, step_size, sampling_rate))
-    center_indices = [start + (end - start) // 2 for start, end in indices]
-
-    return array[center_indices]
\ No newline at end of file
+    return window_plan(len(array), window_size, step_size, sampling_rate).at_centers(array)
@@ -1,8 +1,9 @@
 import numpy as np
 import pandas as pd
+from joblib import Parallel, delayed, effective_n_jobs
 from typing import Optional
-from .feature_extractors import sliding_window_center
-from .config import ChannelConfig, Dataset
+from .feature_extractors import FeatureExtractor, window_plan
+from .config import ChannelConfig, ChannelPlan, Dataset, FeatureBlock
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,6 +20,7 @@ class SignalProcessor:
         self.emg_config = emg_config
         self.eeg_config = eeg_config
         self.emg_column_indices = emg_column_indices
+        self.feature_mask: Optional[np.ndarray] = None
         self._validate()
 
     def _validate(self):
@@ -28,50 +30,54 @@ class SignalProcessor:
             assert self.emg_column_indices is not None, \
                 'emg_column_indices required when using both EMG and EEG'
 
-    def _process_emg(
+    def _channel_configs(
         self,
-        signal: np.ndarray,
-        window_size: float,
-        step_size: float,
-        sampling_rate: int
-    ) -> np.ndarray:
-        emg_features = []
-        for signal in signal.T:
-            clean = self.emg_config.signal_cleaner.clean_signal(
-                signal, sampling_rate
-            )
-            features = self.emg_config.feature_extractor.extract_features(
-                clean, window_size, step_size, sampling_rate
-            )
-            emg_features.append(features)
-            
-        return emg_features
+        n_channels: int
+    ) -> list[tuple[ChannelConfig, list[int]]]:
+        """Config and signal columns of each channel type, in feature order."""
+        channel_configs = []
+
+        if self.emg_config:
+            emg_cols = self.emg_column_indices or list(range(n_channels))
+            channel_configs.append((self.emg_config, emg_cols))
 
-    def _process_eeg(
+        if self.eeg_config:
+            if self.emg_column_indices:
+                all_cols = set(range(n_channels))
+                eeg_cols = sorted(all_cols - set(self.emg_column_indices))
+            else:
+                eeg_cols = list(range(n_channels))
+            channel_configs.append((self.eeg_config, eeg_cols))
+
+        return channel_configs
+
+    def _process_channels(
         self,
+        config: ChannelConfig,
         signal: np.ndarray,
         window_size: float,
         step_size: float,
-        sampling_rate: int
-    ) -> np.ndarray:
-        eeg_features = []
-        for signal in signal.T:
-            clean = self.eeg_config.signal_cleaner.clean_signal(
-                signal, sampling_rate
-            )
-            features = self.eeg_config.feature_extractor.extract_features(
-                clean, window_size, step_size, sampling_rate
-            )
-            eeg_features.append(features)
+        sampling_rate: int,
+        channels: list[int],
+        keep: slice = slice(None)
+    ) -> list[np.ndarray]:
+        clean = np.column_stack([
+            config.signal_cleaner.clean_signal(signal, sampling_rate)[keep]
+            for signal in signal.T
+        ])
 
-        return eeg_features
+        return config.feature_extractor.extract_channels(
+            clean, window_size, step_size, sampling_rate, channels=channels
+        )
 
     def process_signals(
         self, 
         signals: np.ndarray,
         window_size: float,
         step_size: float,
-        sampling_rate: int
+        sampling_rate: int,
+        plan: Optional[list[ChannelPlan]] = None,
+        chunk_size: Optional[float] = None
     ) -> np.ndarray:
         """
         Process multi-channel signals through cleaning and feature extraction.
@@ -81,53 +87,268 @@ class SignalProcessor:
             window_size: Window duration in seconds
             step_size: Step duration in seconds
             sampling_rate: Sampling frequency in Hz
+            plan: Column plan from `plan_columns` to extract only part of the features
+            chunk_size: Clean and extract chunks of about this many seconds at a time,
+                to bound memory on long recordings. Chunks overlap by the settling 
+                length of the cleaners, so the result matches whole-signal cleaning.
+                Signals can then be any array that reads rows when sliced, such 
+                as a memory map or an HDF5 dataset
             
         Returns:
             (n_windows, n_features) array of extracted features
         """
-        all_features = []
+        # Keep float32 signals in single precision even if an
+        # extractor returns double precision features
+        dtype = np.result_type(signals.dtype, np.float32)
 
-        if self.emg_config:
-            emg_signals = (
-                signals[:, self.emg_column_indices]
-                if self.emg_column_indices
-                else signals
+        if plan is not None:
+            return self._process_planned(
+                signals, plan, window_size, step_size, sampling_rate, dtype
             )
-            
-            features = self._process_emg(
-                emg_signals, 
+
+        if chunk_size is not None:
+            return self._process_chunked(
+                signals, window_size, step_size, sampling_rate, chunk_size, dtype
+            )
+
+        all_features = []
+
+        for config, channels in self._channel_configs(signals.shape[1]):
+            features = self._process_channels(
+                config,
+                signals[:, channels], 
                 window_size, 
                 step_size, 
-                sampling_rate
+                sampling_rate,
+                channels
             )
             all_features.extend(features)
+        
+        return np.hstack(all_features).astype(dtype, copy=False)
 
-        if self.eeg_config:
-            if self.emg_column_indices:
-                all_cols = set(range(signals.shape[1]))
-                eeg_cols = sorted(all_cols - set(self.emg_column_indices))
-                eeg_signals = signals[:, eeg_cols]
-            else:
-                eeg_signals = signals
+    def _process_chunked(
+        self,
+        signals: np.ndarray,
+        window_size: float,
+        step_size: float,
+        sampling_rate: int,
+        chunk_size: float,
+        dtype: np.dtype
+    ) -> np.ndarray:
+        windows = window_plan(len(signals), window_size, step_size, sampling_rate)
+        channel_configs = self._channel_configs(signals.shape[1])
 
-            features = self._process_eeg(
-                eeg_signals, 
-                window_size, 
-                step_size, 
-                sampling_rate
+        try:
+            overlap = max(
+                config.signal_cleaner.settling_samples(sampling_rate)
+                for config, _ in channel_configs
             )
+        except NotImplementedError:
+            logger.warning('Signal cleaner cannot be chunked, cleaning whole signals')
+            return self.process_signals(np.asarray(signals), window_size, step_size, sampling_rate)
 
-            all_features.extend(features)
+        if windows.n_windows == 0:
+            return self.process_signals(np.asarray(signals), window_size, step_size, sampling_rate)
+
+        windows_per_chunk = max(1, int(chunk_size * sampling_rate) // windows.step_samples)
+        X = None
+
+        for first in range(0, windows.n_windows, windows_per_chunk):
+            last = min(first + windows_per_chunk, windows.n_windows)
+            start = windows.starts[first]
+            stop = windows.starts[last - 1] + windows.window_samples
+
+            # Clean with enough context on each side for the edge effects
+            # of the chunk to settle before the samples that are kept
+            lo = max(0, start - overlap)
+            hi = min(len(signals), stop + overlap)
+
+            features = []
+            for config, channels in channel_configs:
+                features.extend(self._process_channels(
+                    config,
+                    signals[lo:hi, channels],
+                    window_size,
+                    step_size,
+                    sampling_rate,
+                    channels,
+                    keep=slice(start - lo, stop - lo)
+                ))
+            chunk_X = np.hstack(features)
+
+            if X is None:
+                X = np.empty((windows.n_windows, chunk_X.shape[1]), dtype=dtype)
+            X[first:last] = chunk_X
+
+        return X
+
+    def _process_planned(
+        self,
+        signals: np.ndarray,
+        plan: list[ChannelPlan],
+        window_size: float,
+        step_size: float,
+        sampling_rate: int,
+        dtype: np.dtype
+    ) -> np.ndarray:
+        n_columns = sum(len(channel_plan.positions) for channel_plan in plan)
+        X = None
+
+        for channel_plan in plan:
+            config = channel_plan.config
+            clean = config.signal_cleaner.clean_signal(
+                signals[:, channel_plan.channel], sampling_rate
+            )
+            features = config.feature_extractor.extract_features(
+                clean, window_size, step_size, sampling_rate
+            )
+
+            if X is None:
+                X = np.empty((len(features), n_columns), dtype=dtype)
+            X[:, channel_plan.positions] = features
+
+        return X
+
+    def _schema(
+        self,
+        n_channels: int,
+        window_size: float,
+        sampling_rate: int
+    ) -> list[tuple[ChannelConfig, int, str]]:
+        schema = []
+        for config, channels in self._channel_configs(n_channels):
+            names = config.feature_extractor.feature_names(window_size, sampling_rate)
+            schema.extend(
+                (config, channel, name) for channel in channels for name in names
+            )
+        return schema
+
+    def feature_schema(
+        self,
+        n_channels: int,
+        window_size: float,
+        sampling_rate: int
+    ) -> list[tuple[int, str]]:
+        """
+        Describe the columns returned by `process_signals`.
         
-        return np.hstack(all_features)
-    
+        Args:
+            n_channels: Number of channels in the input signals
+            window_size: Window duration in seconds
+            sampling_rate: Sampling frequency in Hz
+            
+        Returns:
+            (channel, feature name) pair of each column, in column order,
+            where channel is the column of the channel in the input signals
+        """
+        return [
+            (channel, name) 
+            for _, channel, name in self._schema(n_channels, window_size, sampling_rate)
+        ]
+
+    def plan_columns(
+        self,
+        columns: np.ndarray,
+        n_channels: int,
+        window_size: float,
+        sampling_rate: int
+    ) -> list[ChannelPlan]:
+        """
+        Plan the extraction of a subset of the `process_signals` columns.
+        
+        Channels without selected columns are neither cleaned nor processed, 
+        and extractors only compute the selected features where supported.
+        
+        Args:
+            columns: Indices of the `process_signals` columns to extract, in output order
+            n_channels: Number of channels in the input signals
+            window_size: Window duration in seconds
+            sampling_rate: Sampling frequency in Hz
+            
+        Returns:
+            Column plan to pass to `process_signals`
+        """
+        schema = self._schema(n_channels, window_size, sampling_rate)
+
+        # Selected feature names and output positions of each channel
+        selected: dict[tuple[int, int], tuple[ChannelConfig, int, list, list]] = {}
+        for position, column in enumerate(columns):
+            config, channel, name = schema[column]
+            _, _, names, positions = selected.setdefault(
+                (id(config), channel), (config, channel, [], [])
+            )
+            names.append(name)
+            positions.append(position)
+
+        # Channels selecting the same features share one extractor
+        extractors: dict[tuple, FeatureExtractor] = {}
+        plan = []
+
+        for config, channel, names, positions in selected.values():
+            key = (id(config), tuple(names))
+            if key not in extractors:
+                extractors[key] = config.feature_extractor.select(
+                    names, window_size, sampling_rate
+                )
+
+            plan.append(ChannelPlan(
+                channel=channel,
+                config=ChannelConfig(config.signal_cleaner, extractors[key]),
+                positions=np.array(positions)
+            ))
+
+        return plan
+
+    def _signal_columns(self, df: pd.DataFrame) -> pd.Index:
+        return df.columns.difference(['TIMESTAMP', 'label', 'group'])
+
+    def process_group(
+        self,
+        df: pd.DataFrame,
+        sampling_rate: int,
+        window_size: float,
+        step_size: float,
+        chunk_size: Optional[float] = None
+    ) -> Optional[FeatureBlock]:
+        """
+        Extract windowed features from the rows of a single group.
+        
+        Windows never cross the group boundaries, so a group can be 
+        processed as soon as its data is complete.
+        
+        Args:
+            df: DataFrame with signal columns, 'label', 'group', and optionally 'TIMESTAMP'
+            sampling_rate: Signal sampling rate in Hz
+            window_size: Feature window duration in seconds
+            step_size: Window step duration in seconds
+            chunk_size: Chunk duration in seconds for chunked cleaning, see `process_signals`
+            
+        Returns:
+            FeatureBlock with features, window labels and window groups, 
+            or None if the group is shorter than a single window
+        """
+        if len(df) < int(window_size * sampling_rate):
+            return None
+
+        signals = df[self._signal_columns(df)].values
+        X = self.process_signals(
+            signals, window_size, step_size, sampling_rate, chunk_size=chunk_size
+        )
+        plan = window_plan(len(df), window_size, step_size, sampling_rate)
+        return FeatureBlock(
+            X, plan.at_centers(df['label'].values), plan.at_centers(df['group'].values)
+        )
+
     def build_dataset(
         self,
         df: pd.DataFrame,
         sampling_rate: int,
         window_size: float,
         step_size: float,
-        ignore_labels: Optional[list] = None
+        ignore_labels: Optional[list] = None,
+        per_group: bool = False,
+        n_jobs: int = -1,
+        chunk_size: Optional[float] = None
     ) -> Dataset:
         """
         Build a dataset from a labeled dataframe.
@@ -138,51 +359,264 @@ class SignalProcessor:
             window_size: Feature window duration in seconds
             step_size: Window step duration in seconds
             ignore_labels: Labels to exclude from dataset
+            per_group: Process each group independently in a process pool,
+                so that windows never cross group boundaries
+            n_jobs: Number of worker processes used when per_group is set
+            chunk_size: Chunk duration in seconds for chunked cleaning, see `process_signals`
             
         Returns:
             Dataset with features (X), encoded labels (y), groups, and label mapping
         """
         logger.info(f'Building dataset from shape {df.shape}')
+
+        if per_group:
+            # Groups are sorted so the result does not depend on scheduling
+            blocks = Parallel(n_jobs=n_jobs)(
+                delayed(self.process_group)(
+                    group_df, sampling_rate, window_size, step_size, chunk_size
+                )
+                for _, group_df in df.groupby('group', sort=True)
+            )
+            return self.build_dataset_from_blocks(blocks, ignore_labels)
         
         # Extract signals
-        signal_cols = df.columns.difference(['TIMESTAMP', 'label', 'group'])
+        signal_cols = self._signal_columns(df)
         signals = df[signal_cols].values
         
+        return self.build_dataset_from_arrays(
+            signals=signals,
+            labels=df['label'].values,
+            groups=df['group'].values,
+            sampling_rate=sampling_rate,
+            window_size=window_size,
+            step_size=step_size,
+            ignore_labels=ignore_labels,
+            chunk_size=chunk_size
+        )
+
+    def build_dataset_from_arrays(
+        self,
+        signals: np.ndarray,
+        labels: np.ndarray,
+        groups: np.ndarray,
+        sampling_rate: int,
+        window_size: float,
+        step_size: float,
+        ignore_labels: Optional[list] = None,
+        chunk_size: Optional[float] = None
+    ) -> Dataset:
+        """
+        Build a dataset from signal, label and group arrays, without a dataframe.
+        
+        Args:
+            signals: (n_samples, n_channels) array of raw signals
+            labels: (n_samples,) label of each sample
+            groups: (n_samples,) group of each sample
+            sampling_rate: Signal sampling rate in Hz
+            window_size: Feature window duration in seconds
+            step_size: Window step duration in seconds
+            ignore_labels: Labels to exclude from dataset
+            chunk_size: Chunk duration in seconds for chunked cleaning, see `process_signals`
+            
+        Returns:
+            Dataset with features (X), encoded labels (y), groups, and label mapping
+        """
         # Process signals
         X = self.process_signals(
-            signals, window_size, step_size, sampling_rate
+            signals, window_size, step_size, sampling_rate, chunk_size=chunk_size
         )
         
         # Apply windowing to labels and groups
-        y_windowed = sliding_window_center(
-            df['label'].values, window_size, step_size, sampling_rate
-        )
-        groups_windowed = sliding_window_center(
-            df['group'].values, window_size, step_size, sampling_rate
+        plan = window_plan(len(signals), window_size, step_size, sampling_rate)
+        y_windowed = plan.at_centers(labels)
+        groups_windowed = plan.at_centers(groups)
+        
+        return self._assemble_dataset(
+            X, y_windowed, groups_windowed, ignore_labels
         )
+
+    def process_trials(
+        self,
+        trials: np.ndarray,
+        window_size: float,
+        step_size: float,
+        sampling_rate: int
+    ) -> np.ndarray:
+        """
+        Process equally long trials through cleaning and feature extraction.
         
-        # Create dataframe and clean
-        dataset_df = pd.DataFrame(X)
-        dataset_df.dropna(axis=1, inplace=True)
-        dataset_df['label'] = y_windowed
-        dataset_df['group'] = groups_windowed
+        The signals of all trials are cleaned in a single call per channel 
+        type, and all their windows are extracted in a single call, treating
+        each (trial, channel) pair as one channel.
         
-        # Filter ignored labels
-        if ignore_labels:
-            dataset_df = dataset_df[~dataset_df['label'].isin(ignore_labels)]
+        Args:
+            trials: (n_trials, n_channels, n_samples) array of raw signals
+            window_size: Window duration in seconds
+            step_size: Step duration in seconds
+            sampling_rate: Sampling frequency in Hz
+            
+        Returns:
+            (n_trials, n_windows, n_features) array of extracted features, 
+            with the columns of `process_signals` for each trial
+        """
+        n_trials, n_channels, n_samples = trials.shape
+        dtype = np.result_type(trials.dtype, np.float32)
+        n_windows = window_plan(n_samples, window_size, step_size, sampling_rate).n_windows
+        all_features = []
+
+        for config, channels in self._channel_configs(n_channels):
+            signals = trials[:, channels].reshape(-1, n_samples)
+            clean = config.signal_cleaner.clean_signals(signals, sampling_rate)
+
+            # Signals are (trial, channel) pairs, trial by trial
+            channel_features = config.feature_extractor.extract_channels(
+                clean.T, window_size, step_size, sampling_rate,
+                channels=channels * n_trials
+            )
+
+            # (trial, channel, window, feature) to (trial, window, channel features)
+            features = np.stack(channel_features).reshape(
+                n_trials, len(channels), n_windows, -1
+            )
+            all_features.append(
+                features.transpose(0, 2, 1, 3).reshape(n_trials, n_windows, -1)
+            )
+
+        return np.concatenate(all_features, axis=2).astype(dtype, copy=False)
+
+    def build_dataset_from_trials(
+        self,
+        trials: np.ndarray,
+        labels: np.ndarray,
+        sampling_rate: int,
+        window_size: float,
+        step_size: float,
+        ignore_labels: Optional[list] = None,
+        n_jobs: int = -1
+    ) -> Dataset:
+        """
+        Build a dataset from equally long trials, with one group per trial.
+        
+        Trials are split into one chunk per worker and processed
+        in a process pool with `process_trials`.
+        
+        Args:
+            trials: (n_trials, n_channels, n_samples) array of raw signals
+            labels: (n_trials,) label of each trial, or (n_trials, n_samples) 
+                label of each sample
+            sampling_rate: Signal sampling rate in Hz
+            window_size: Feature window duration in seconds
+            step_size: Window step duration in seconds
+            ignore_labels: Labels to exclude from dataset
+            n_jobs: Number of worker processes
+            
+        Returns:
+            Dataset with features (X), encoded labels (y), groups, and label mapping
+        """
+        n_trials, _, n_samples = trials.shape
+        logger.info(f'Building dataset from {n_trials} trials of shape {trials.shape[1:]}')
+
+        plan = window_plan(n_samples, window_size, step_size, sampling_rate)
+        if plan.n_windows == 0:
+            raise ValueError('Trials are shorter than a single window')
+
+        n_chunks = min(n_trials, effective_n_jobs(n_jobs))
+        bounds = np.linspace(0, n_trials, n_chunks + 1).astype(int)
+
+        chunks = Parallel(n_jobs=n_jobs)(
+            delayed(self.process_trials)(
+                trials[start:stop], window_size, step_size, sampling_rate
+            )
+            for start, stop in zip(bounds[:-1], bounds[1:])
+        )
+        X = np.concatenate(chunks).reshape(n_trials * plan.n_windows, -1)
+
+        labels = np.asarray(labels)
+        if labels.ndim == 1:
+            y_windowed = np.repeat(labels, plan.n_windows)
+        else:
+            y_windowed = labels[:, plan.centers].ravel()
+        groups_windowed = np.repeat(np.arange(n_trials), plan.n_windows)
+
+        return self._assemble_dataset(X, y_windowed, groups_windowed, ignore_labels)
+
+    def build_dataset_from_blocks(
+        self,
+        blocks: list[Optional[FeatureBlock]],
+        ignore_labels: Optional[list] = None
+    ) -> Dataset:
+        """
+        Build a dataset from feature blocks computed with `process_group`.
         
+        Args:
+            blocks: Feature blocks in group order, None entries are skipped
+            ignore_labels: Labels to exclude from dataset
+            
+        Returns:
+            Dataset with features (X), encoded labels (y), groups, and label mapping
+        """
+        blocks = [block for block in blocks if block is not None]
+
+        if not blocks:
+            raise ValueError('No group is long enough to extract a window')
+
+        logger.info(f'Building dataset from {len(blocks)} feature blocks')
+
+        return self._assemble_dataset(
+            np.vstack([block.X for block in blocks]),
+            np.concatenate([block.y for block in blocks]),
+            np.concatenate([block.groups for block in blocks]),
+            ignore_labels
+        )
+
+    def _assemble_dataset(
+        self,
+        X: np.ndarray,
+        y_windowed: np.ndarray,
+        groups_windowed: np.ndarray,
+        ignore_labels: Optional[list] = None
+    ) -> Dataset:
+        # Drop feature columns with missing values, the mask is kept 
+        # so that the same columns are dropped at prediction time
+        self.feature_mask = ~np.isnan(X).any(axis=0)
+
+        # Filter ignored labels
+        rows = (
+            ~np.isin(y_windowed, ignore_labels)
+            if ignore_labels
+            else np.ones(len(y_windowed), dtype=bool)
+        )
+
+        # Copy the feature matrix at most once
+        if rows.all():
+            X_final = X if self.feature_mask.all() else X[:, self.feature_mask]
+        elif self.feature_mask.all():
+            X_final = X[rows]
+        else:
+            X_final = X[np.ix_(rows, self.feature_mask)]
+
         # Encode labels
-        X_final = dataset_df.drop(columns=['label', 'group'])
-        label_cat = dataset_df['label'].astype('category')
-        y_encoded = label_cat.cat.codes
-        groups_final = dataset_df['group']
-        label_mapping = dict(enumerate(label_cat.cat.categories))
+        categories, y_encoded = np.unique(y_windowed[rows], return_inverse=True)
+        groups_final = groups_windowed[rows]
+        label_mapping = dict(enumerate(categories.tolist()))
         
-        logger.info(f'Final dataset shape: {dataset_df.shape}')
+        logger.info(f'Final dataset shape: {X_final.shape}')
         logger.info(f'Label mapping: {label_mapping}')
         
         return Dataset(X_final, y_encoded, groups_final, label_mapping)
 
+    def select_features(self, X: np.ndarray) -> np.ndarray:
+        """Drop the feature columns that were dropped when building the dataset."""
+        if self.feature_mask is None:
+            return X
+
+        return X[:, self.feature_mask]
+
+    def __setstate__(self, state: dict) -> None:
+        # Processors pickled before the feature mask was recorded
+        state.setdefault('feature_mask', None)
+        self.__dict__.update(state)
+
     def __str__(self):
         return f'{self.__class__.__name__}({self.__dict__})'
 
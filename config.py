@@ -1,4 +1,4 @@
-from typing import Optional, Any
+from typing import Optional, Any, Literal
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -11,6 +11,13 @@ class Settings(BaseSettings):
     window_size: float = 1
     step_size: float = 0.05
     sampling_rate: int = 1200
+    # 'float32' halves the memory of signals and features, TIMESTAMP stays in double precision
+    float_dtype: Literal['float32', 'float64'] = 'float64'
+    # 'numba' runs filtering and custom features as compiled kernels
+    kernel_backend: Literal['numpy', 'numba'] = 'numpy'
+    # Cleaner of new models: 'bandpass_notch', or the biosppy EMG filtering as
+    # 'biosppy' or its faster 'native' equivalent, which returns the same signal
+    emg_cleaner: Literal['bandpass_notch', 'biosppy', 'native'] = 'bandpass_notch'
 
     # Serial
     serial_port: str = '/dev/cu.usbserial-210'
@@ -18,12 +25,25 @@ class Settings(BaseSettings):
     serial_timeout: float = 1
     serial_chunk_size: int = 1
     message_mapping: Optional[dict[Any, Any]] = None
+    # Write from a background thread, keeping only the newest messages when the link is saturated
+    serial_background: bool = True
+    serial_queue_size: int = 8
+    serial_coalesce: bool = True
+    # 'binary' sends 3-4 byte frames of class id and confidence instead of label lines
+    serial_protocol: Literal['text', 'binary'] = 'text'
+    serial_include_confidence: bool = True
+    serial_send_on_change: bool = False
 
     # Model training
     cross_validate: bool = True
     should_save: bool = True
     experiments_base_dir: str = './backend/ml/experiments'
     trainer_path: Optional[str] = './backend/ml/experiments/2/trainer.pkl'
+    incremental_features: bool = False
+    per_group_processing: bool = False
+    processing_n_jobs: int = -1
+    # Seconds of signal cleaned at a time, None cleans whole recordings
+    processing_chunk_size: Optional[float] = None
 
     # Model hyperparameters
     feature_selector_percentile: int = 90
@@ -32,6 +52,32 @@ class Settings(BaseSettings):
     model_max_depth: int = 40
     model_n_estimators: int = 300
 
+    # Inference
+    compile_inference: bool = True
+    inference_nthread: int = 1
+
+    # Prediction publishing, each prediction is sent as packed binary
+    # (timestamp, class id, probabilities) to every configured sink
+    zmq_publish_address: Optional[str] = None
+    udp_publish_addresses: list[tuple[str, int]] = []
+
+    # Multi-stream serving
+    # Serve every stream sent to the socket with the shared model, instead of the CLI
+    server_mode: bool = False
+    # Streams are keyed by 'address', their source address, or by 'header', a
+    # little-endian uint32 stream id at the start of every packet
+    stream_key: Literal['address', 'header'] = 'address'
+    # Seconds between batched predictions of all due windows
+    server_tick: float = 0.01
+    # Seconds without packets after which a stream is dropped, None keeps streams forever
+    stream_timeout: Optional[float] = 10
+    # Bytes of the socket receive buffer, capped by the operating system
+    server_receive_buffer: int = 1 << 22
+
+    # Recording
+    # Directory where streamed sessions are recorded as RAW files, None disables recording
+    recording_dir: Optional[str] = None
+
     # Interface
     show_probs: bool = True
     
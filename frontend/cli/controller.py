@@ -9,7 +9,7 @@ from ..shared.controller import Controller
 from .modes import MODES_INFO
 from .commands import Command, CLICommandHandler, get_cli_command_mapping
 from backend.ml import Trainer, Predictor
-from backend.io import SerialCommunicator
+from backend.io import SerialCommunicator, SessionRecorder, PredictionSink
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +20,9 @@ class CLIController(Controller):
         trainer: Trainer,
         predictor: Predictor,
         communicator: Optional[SerialCommunicator] = None,
-        show_probs: bool = True
+        show_probs: bool = True,
+        recorder: Optional[SessionRecorder] = None,
+        sinks: Optional[list[PredictionSink]] = None
     ):
         command_handler = CLICommandHandler(self)
         commands = get_cli_command_mapping(command_handler)
@@ -30,7 +32,9 @@ class CLIController(Controller):
             command_handler,
             commands,
             communicator,
-            show_probs
+            show_probs,
+            recorder,
+            sinks
         )
         
         # Status management
@@ -28,8 +28,7 @@ class CommandHandler:
         self.controller.trainer.save()
     
     def quit_data_collection(self):
-        self.controller.trainer.switch_group()
-        self.controller.current_label = None
+        self.controller.switch_group()
     
     def reset_all(self):
         self.confirm('Are you sure you want to reset all data and the model?')
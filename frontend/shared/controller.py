@@ -1,11 +1,14 @@
 import numpy as np
 import threading
+import time
+import logging
 from typing import Optional, Any
 from .modes import Modes
 from .commands import Command, CommandHandler, get_command_mapping
 from backend.ml import Trainer, Predictor
-from backend.io import SerialCommunicator
+from backend.io import SerialCommunicator, SessionRecorder, PredictionSink
 
+logger = logging.getLogger(__name__)
 
 class Controller:
     def __init__(
@@ -16,12 +19,22 @@ class Controller:
         commands: dict[Modes, dict[str, Command]],
         communicator: Optional[SerialCommunicator] = None,
         show_probs: bool = True,
+        recorder: Optional[SessionRecorder] = None,
+        sinks: Optional[list[PredictionSink]] = None,
     ):
         self.trainer = trainer
         self.predictor = predictor
         self.communicator = communicator
         self.show_probs = show_probs
 
+        # Streamed samples are recorded with label changes and predictions as marks
+        self.recorder = recorder
+        self._recorded_label = None
+        self._recorded_pred = None
+
+        # Every prediction is published to all sinks, without blocking
+        self.sinks = sinks or []
+
         self.current_label = None
         self.current_mode = (
             Modes.MAIN if trainer.training else Modes.PREDICTION
@@ -38,6 +51,12 @@ class Controller:
             self.current_mode = mode
             self.handle_switch_mode()
 
+    def switch_group(self):
+        # Rows streamed while the group is switched would land in the next group
+        with self._mode_lock:
+            self.trainer.switch_group()
+            self.current_label = None
+
     def execute_command(self, command_key: str):
         command = self.commands[self.current_mode].get(command_key)
 
@@ -59,6 +78,9 @@ class Controller:
     def update(self, data: np.ndarray) -> Optional[Any]:
         # Use a lock to ensure that the mode is not changed while updating
         with self._mode_lock:
+            if self.recorder:
+                self.record(data)
+
             match self.current_mode:
                 case Modes.DATA_COLLECTION:
                     return self.update_data_collection(data)
@@ -66,14 +88,41 @@ class Controller:
                 case Modes.PREDICTION:
                     return self.update_prediction(data)
 
+    def record(self, data: np.ndarray):
+        label = (
+            self.current_label 
+            if self.current_mode == Modes.DATA_COLLECTION 
+            else None
+        )
+
+        if label != self._recorded_label:
+            self.recorder.mark('label_end' if label is None else f'label {label}')
+            self._recorded_label = label
+
+        try:
+            self.recorder.write(data)
+        except RuntimeError as e:
+            # A recording failure must not stop the predictions
+            logger.error(f'{e}, recording disabled')
+            self.close_recorder()
+
+    def close_recorder(self):
+        recorder, self.recorder = self.recorder, None
+
+        try:
+            recorder.close()
+        except Exception as e:
+            logger.error(f'Error closing the session recording: {e}')
+
     def update_data_collection(self, data: np.ndarray):
         self.trainer.update(data, self.current_label)
         self.update_data_collection_status()
 
     def update_prediction(self, data: np.ndarray):
         mapped_pred = None
+        first_sample = self.recorder.n_samples - len(data) if self.recorder else 0
 
-        for row in data:
+        for i, row in enumerate(data):
             result = self.predictor.update(row)
 
             if result is None:
@@ -95,8 +144,19 @@ class Controller:
 
             self.update_prediction_status(f_pred)
 
+            if self.recorder and mapped_pred != self._recorded_pred:
+                self.recorder.mark(f'prediction {mapped_pred}', first_sample + i)
+                self._recorded_pred = mapped_pred
+
+            if self.sinks:
+                timestamp = time.time()
+                for sink in self.sinks:
+                    sink.publish(timestamp, int(pred), probs)
+
             if self.communicator and self.communicator.is_active:
-                self.communicator.send(mapped_pred)
+                self.communicator.send(
+                    mapped_pred, class_id=int(pred), confidence=float(probs[pred])
+                )
 
         return mapped_pred
     
@@ -107,7 +167,17 @@ class Controller:
     def stop(self):
         if self.running:
             self.running = False
-            self.handle_stop()
+
+            try:
+                # update may be recording from another thread
+                with self._mode_lock:
+                    if self.recorder:
+                        self.close_recorder()
+            finally:
+                for sink in self.sinks:
+                    sink.close()
+
+                self.handle_stop()
 
     def handle_switch_mode(self):
         raise NotImplementedError
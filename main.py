@@ -1,9 +1,11 @@
+import os
 import socket
 import numpy as np
 import time
 import threading
 import queue
 import logging
+from typing import Any
 
 from sklearn.pipeline import Pipeline
 from sklearn.feature_selection import SelectPercentile, f_classif
@@ -13,10 +15,14 @@ from xgboost import XGBClassifier
 from config import settings, Settings
 from frontend.cli.controller import CLIController
 
-from backend.ml import Trainer, Predictor
-from backend.io import SerialCommunicator
+from backend.ml import Trainer, Predictor, StreamServer
+from backend.io import (
+    SerialCommunicator, SessionRecorder, PredictionSink, ZMQPublisher, UDPPublisher
+)
 from backend.signal_processing import SignalProcessor, ChannelConfig
-from backend.signal_processing.cleaners import BandpassNotchFilter
+from backend.signal_processing.cleaners import (
+    SignalCleaner, BandpassNotchFilter, EMGBiosppy, EMGFilter
+)
 from backend.signal_processing.feature_extractors import CustomFeatures
 
 
@@ -43,18 +49,69 @@ def receive_packets(sock, queue, stop_event):
             logger.error(f'Error receiving packet: {e}')
             break
 
+def receive_stream_packets(sock, queue, stop_event):
+    logger.info('Starting stream receiver thread')
+    while not stop_event.is_set():
+        try:
+            pkt, address = sock.recvfrom(65535)
+            queue.put((address, pkt))
+        except socket.timeout:
+            continue
+        except Exception as e:
+            logger.error(f'Error receiving packet: {e}')
+            break
+
+def split_stream_packet(
+    pkt: bytes, 
+    address: tuple[str, int], 
+    stream_key: str
+) -> tuple[Any, bytes]:
+    if stream_key == 'header':
+        return int.from_bytes(pkt[:4], 'little'), pkt[4:]
+    return address, pkt
+
+def stream_name(stream: Any) -> str:
+    if isinstance(stream, tuple):
+        return ':'.join(str(part) for part in stream)
+    return str(stream)
+
+def update_stream(
+    server: StreamServer,
+    address: tuple[str, int],
+    pkt: bytes,
+    settings: Settings
+) -> None:
+    stream, pkt = split_stream_packet(pkt, address, settings.stream_key)
+
+    # A malformed packet is dropped without affecting the other streams
+    try:
+        data = process_packet(pkt, settings.n_channels)
+        server.update(stream, data)
+    except ValueError as e:
+        logger.warning(f'Dropped packet of stream {stream_name(stream)}: {e}')
+
 def process_packet(pkt: bytes, n_channels: int) -> np.ndarray:
     if len(pkt) % 8 != 0:
         logger.warning(f'{len(pkt)} bytes (excess {len(pkt) % 8}); truncating.')
         pkt = pkt[:-len(pkt) % 8]
 
+    # Packets stay in double precision for the TIMESTAMP column, the trainer,
+    # predictor and server cast the signal columns to the trainer's dtype
     data = np.frombuffer(pkt, dtype='<f8')
     n_package_samples = len(data) // n_channels
-    data = np.array(data).reshape(n_package_samples, n_channels)
+    data = data.reshape(n_package_samples, n_channels)
     return data
 
 
-def create_app(settings: Settings):
+def create_emg_cleaner(settings: Settings) -> SignalCleaner:
+    if settings.emg_cleaner == 'biosppy':
+        return EMGBiosppy()
+    if settings.emg_cleaner == 'native':
+        return EMGFilter()
+    return BandpassNotchFilter(backend=settings.kernel_backend)
+
+
+def create_trainer(settings: Settings) -> Trainer:
     # If trainer_path is provided, the trainer will be loaded from the path.
     # Otherwise, a new trainer will be created.
     if settings.trainer_path is not None:
@@ -78,8 +135,10 @@ def create_app(settings: Settings):
         processor = SignalProcessor(
             emg_config=(
                 ChannelConfig(
-                    signal_cleaner=BandpassNotchFilter(),
-                    feature_extractor=CustomFeatures()
+                    signal_cleaner=create_emg_cleaner(settings),
+                    feature_extractor=CustomFeatures(
+                        backend=settings.kernel_backend
+                    )
                 )
             )
         )
@@ -93,14 +152,37 @@ def create_app(settings: Settings):
             cross_validate=settings.cross_validate,
             should_save=settings.should_save,
             base_dir=settings.experiments_base_dir,
+            incremental_features=settings.incremental_features,
+            per_group_processing=settings.per_group_processing,
+            processing_n_jobs=settings.processing_n_jobs,
+            processing_chunk_size=settings.processing_chunk_size,
+            dtype=settings.float_dtype,
         )
 
+    return trainer
+
+
+def create_sinks(settings: Settings) -> list[PredictionSink]:
+    sinks = []
+    if settings.zmq_publish_address is not None:
+        sinks.append(ZMQPublisher(settings.zmq_publish_address))
+    if settings.udp_publish_addresses:
+        sinks.append(UDPPublisher(settings.udp_publish_addresses))
+    return sinks
+
+
+def create_app(settings: Settings):
+    trainer = create_trainer(settings)
+
     predictor = Predictor(
         pipeline=trainer.pipeline,
         processor=trainer.processor,
         window_size=trainer.window_size,
         step_size=trainer.step_size,
         sampling_rate=trainer.sampling_rate,
+        dtype=trainer.dtype,
+        compile_inference=settings.compile_inference,
+        inference_nthread=settings.inference_nthread,
     )
 
     communicator = SerialCommunicator(
@@ -109,13 +191,35 @@ def create_app(settings: Settings):
         timeout=settings.serial_timeout,
         chunk_size=settings.serial_chunk_size,
         message_mapping=settings.message_mapping,
+        background=settings.serial_background,
+        queue_size=settings.serial_queue_size,
+        coalesce=settings.serial_coalesce,
+        protocol=settings.serial_protocol,
+        include_confidence=settings.serial_include_confidence,
+        send_on_change=settings.serial_send_on_change,
     )
 
+    recorder = None
+    if settings.recording_dir is not None:
+        os.makedirs(settings.recording_dir, exist_ok=True)
+        recorder = SessionRecorder(
+            file=os.path.join(
+                settings.recording_dir, 
+                f'session_{time.strftime("%Y%m%d_%H%M%S")}.raw'
+            ),
+            channels=[f'EBR_{i + 1}' for i in range(settings.n_channels - 1)] + ['TIMESTAMP'],
+            sampling_rate=settings.sampling_rate,
+            # RAW files have a single data type, single precision would truncate TIMESTAMP
+            data_type='double',
+        )
+
     controller = CLIController(
         trainer=trainer, 
         predictor=predictor,
         communicator=communicator,
         show_probs=settings.show_probs,
+        recorder=recorder,
+        sinks=create_sinks(settings),
     )
 
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -134,7 +238,82 @@ def create_app(settings: Settings):
     return controller, data_queue, stop_event, sock, receiver_thread
 
 
-if __name__ == '__main__':
+def create_server(settings: Settings):
+    trainer = create_trainer(settings)
+    assert not trainer.training, 'Server mode requires a trained model'
+
+    server = StreamServer(
+        pipeline=trainer.pipeline,
+        processor=trainer.processor,
+        window_size=trainer.window_size,
+        step_size=trainer.step_size,
+        sampling_rate=trainer.sampling_rate,
+        dtype=trainer.dtype,
+        compile_inference=settings.compile_inference,
+        inference_nthread=settings.inference_nthread,
+        stream_timeout=settings.stream_timeout,
+    )
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    # Room for the packets of every stream arriving during a tick
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, settings.server_receive_buffer)
+    sock.bind((settings.udp_ip, settings.udp_port))
+    sock.settimeout(1)
+
+    data_queue = queue.Queue()
+    stop_event = threading.Event()
+    receiver_thread = threading.Thread(
+        target=receive_stream_packets, 
+        args=(sock, data_queue, stop_event), 
+        daemon=True
+    )
+    receiver_thread.start()
+
+    return trainer, server, create_sinks(settings), data_queue, stop_event, sock, receiver_thread
+
+
+def serve(settings: Settings):
+    trainer, server, sinks, data_queue, stop_event, sock, receiver_thread = create_server(settings)
+    logger.info(f'Serving streams on {settings.udp_ip}:{settings.udp_port}')
+
+    try:
+        while True:
+            # Gather packets until the tick, then predict all due windows at once
+            deadline = time.monotonic() + settings.server_tick
+            while (timeout := deadline - time.monotonic()) > 0:
+                try:
+                    address, pkt = data_queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+
+                update_stream(server, address, pkt, settings)
+
+            timestamp = time.time()
+            for prediction in server.tick():
+                name = stream_name(prediction.stream)
+                logger.info(
+                    f'{name}: '
+                    f'{trainer.label_mapping.get(prediction.label, prediction.label)}'
+                )
+
+                for sink in sinks:
+                    sink.publish(timestamp, prediction.label, prediction.probs, name)
+
+    except KeyboardInterrupt:
+        logger.info('Keyboard interrupt detected. Exiting...')
+
+    finally:
+        logger.info(f'Shutting down... Stats: {server.stats}')
+        stop_event.set()
+        # The receiver stops within the socket timeout
+        receiver_thread.join()
+        sock.close()
+
+        for sink in sinks:
+            sink.close()
+
+
+def run(settings: Settings):
     controller, data_queue, stop_event, sock, receiver_thread = create_app(settings)
 
     controller.start()
@@ -151,9 +330,17 @@ if __name__ == '__main__':
     except Exception as e:
         logger.error(f'Error: {e}')
         raise ValueError(e)
-    
-    logger.info('Shutting down...')
-    stop_event.set()
-    sock.close()
-    receiver_thread.join()
-    controller.stop()
\ No newline at end of file
+
+    finally:
+        logger.info('Shutting down...')
+        stop_event.set()
+        sock.close()
+        receiver_thread.join()
+        controller.stop()
+
+
+if __name__ == '__main__':
+    if settings.server_mode:
+        serve(settings)
+    else:
+        run(settings)
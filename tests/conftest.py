@@ -0,0 +1,8 @@
+import pytest
+from backend.io.virtual_serial import VirtualSerialPort
+
+@pytest.fixture
+def virtual_serial_port():
+    """Open virtual serial device, read as fast as possible."""
+    with VirtualSerialPort(baudrate=None) as port:
+        yield port
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+from backend.signal_processing.cleaners import EMGBiosppy, EMGFilter, EEGBiosppy, EEGFilter
+
+SAMPLING_RATE = 1000
+
+@pytest.mark.parametrize('native, reference', [
+    (EMGFilter(), EMGBiosppy()),
+    (EEGFilter(), EEGBiosppy()),
+])
+def test_native_matches_biosppy(native, reference):
+    signals = np.random.default_rng(0).standard_normal((3, 4 * SAMPLING_RATE))
+
+    for signal in signals:
+        expected = reference.clean_signal(signal, SAMPLING_RATE)
+        result = native.clean_signal(signal, SAMPLING_RATE)
+
+        assert result.shape == expected.shape == signal.shape
+        np.testing.assert_array_equal(result, expected)
+
+    np.testing.assert_array_equal(
+        native.clean_signals(signals, SAMPLING_RATE),
+        reference.clean_signals(signals, SAMPLING_RATE)
+    )
+
+@pytest.mark.parametrize('cleaner', [EMGFilter(), EEGFilter(), EMGBiosppy(), EEGBiosppy()])
+def test_keeps_single_precision(cleaner):
+    signal = np.random.default_rng(0).standard_normal(4 * SAMPLING_RATE).astype(np.float32)
+
+    result = cleaner.clean_signal(signal, SAMPLING_RATE)
+    assert result.dtype == np.float32
+    assert result.shape == signal.shape
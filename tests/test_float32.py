@@ -0,0 +1,87 @@
+import numpy as np
+from sklearn.pipeline import Pipeline
+from sklearn.feature_selection import SelectPercentile, f_classif
+from sklearn.preprocessing import StandardScaler
+from xgboost import XGBClassifier
+from backend.ml import Trainer, Predictor
+from backend.signal_processing import SignalProcessor, ChannelConfig
+from backend.signal_processing.cleaners import BandpassNotchFilter
+from backend.signal_processing.feature_extractors import CustomFeatures
+
+SAMPLING_RATE = 1200
+LABELS = ['rest', 'open', 'close']
+# Accuracy that float32 processing may lose on held-out groups
+MAX_ACCURACY_LOSS = 0.02
+
+def make_trainer(dtype):
+    pipeline = Pipeline([
+        ('feature_selector', SelectPercentile(f_classif, percentile=90)),
+        ('scaler', StandardScaler()),
+        ('model', XGBClassifier(
+            objective='multi:softmax', seed=1, n_estimators=20, max_depth=4
+        )),
+    ])
+    processor = SignalProcessor(
+        emg_config=ChannelConfig(BandpassNotchFilter(), CustomFeatures(simple=False))
+    )
+    return Trainer(
+        pipeline=pipeline,
+        processor=processor,
+        window_size=0.25,
+        step_size=0.05,
+        sampling_rate=SAMPLING_RATE,
+        should_save=False,
+        dtype=dtype,
+    )
+
+def make_group(rng, label, seconds=1.0, n_channels=4):
+    """Rows of a group, with amplitudes that depend on the label and an epoch timestamp column."""
+    n_samples = int(seconds * SAMPLING_RATE)
+    signals = rng.standard_normal((n_samples, n_channels)) * (1 + LABELS.index(label) * 0.5)
+    timestamps = 1.7e9 + np.arange(n_samples) / SAMPLING_RATE
+    return np.column_stack([signals, timestamps])
+
+def held_out_accuracy(dtype, train_groups, test_groups):
+    trainer = make_trainer(dtype)
+    for label, rows in train_groups:
+        trainer.update(rows, label)
+        trainer.switch_group()
+    trainer.train()
+
+    predictor = Predictor(
+        trainer.pipeline, trainer.processor, trainer.window_size,
+        trainer.step_size, trainer.sampling_rate, dtype=dtype
+    )
+
+    correct, total = 0, 0
+    for label, rows in test_groups:
+        predictor.reset()
+        for row in rows:
+            result = predictor.update(row)
+            if result is not None:
+                correct += trainer.label_mapping[result[0]] == label
+                total += 1
+
+    return correct / total
+
+def test_float32_accuracy_loss():
+    rng = np.random.default_rng(0)
+    train_groups = [(label, make_group(rng, label)) for label in LABELS * 4]
+    test_groups = [(label, make_group(rng, label)) for label in LABELS * 2]
+
+    accuracy64 = held_out_accuracy('float64', train_groups, test_groups)
+    accuracy32 = held_out_accuracy('float32', train_groups, test_groups)
+
+    assert accuracy64 > 0.8
+    assert accuracy64 - accuracy32 <= MAX_ACCURACY_LOSS
+
+def test_float32_keeps_timestamps():
+    rng = np.random.default_rng(0)
+    rows = make_group(rng, 'open')
+
+    trainer = make_trainer('float32')
+    trainer.update(rows, 'open')
+
+    assert trainer.df['EBR_1'].dtype == np.float32
+    assert trainer.df['TIMESTAMP'].dtype == np.float64
+    np.testing.assert_array_equal(trainer.df['TIMESTAMP'].to_numpy(), rows[:, -1])
@@ -0,0 +1,67 @@
+import threading
+import numpy as np
+from types import SimpleNamespace
+from backend.io import SessionRecorder
+from backend.io.ebr_file import load_raw_file
+from frontend.shared.controller import Controller
+
+class QuietController(Controller):
+    def handle_start(self):
+        self.stopped = False
+
+    def handle_stop(self):
+        self.stopped = True
+
+class CountingSink:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+def make_controller(recorder, sinks=()):
+    predictor = SimpleNamespace(n_rows=0)
+
+    def update(row):
+        predictor.n_rows += 1
+
+    predictor.update = update
+    trainer = SimpleNamespace(training=False, label_mapping={})
+    return QuietController(trainer, predictor, None, {}, recorder=recorder, sinks=list(sinks))
+
+def test_close_while_writing_keeps_header_consistent(tmp_path):
+    file = str(tmp_path / 'session.raw')
+    recorder = SessionRecorder(file, ['A', 'B'], 1200)
+    block = np.ones((10, 2))
+    started = threading.Event()
+
+    def write_loop():
+        while recorder.is_active:
+            recorder.write(block)
+            started.set()
+
+    writer = threading.Thread(target=write_loop)
+    writer.start()
+    started.wait()
+    recorder.close()
+    writer.join()
+
+    data = load_raw_file(file)
+    assert data['number_of_samples'] == recorder.n_samples
+    assert data['data'].shape[-1] == recorder.n_samples
+
+def test_recording_failure_keeps_predicting(tmp_path):
+    recorder = SessionRecorder(str(tmp_path / 'session.raw'), ['A'], 1200)
+    recorder._error = OSError('No space left on device')
+    sink = CountingSink()
+    controller = make_controller(recorder, [sink])
+    controller.start()
+
+    controller.update(np.zeros((5, 2)))
+    controller.update(np.zeros((5, 2)))
+
+    assert controller.recorder is None
+    assert controller.predictor.n_rows == 10
+
+    controller.stop()
+    assert sink.closed and controller.stopped
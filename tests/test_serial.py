@@ -0,0 +1,70 @@
+import pytest
+from backend.io import SerialCommunicator, FrameDecoder, Frame, encode_frame
+from backend.io.protocol import quantize_confidence
+
+def make_communicator(port, **kwargs):
+    communicator = SerialCommunicator(port.port, **kwargs)
+    communicator.open()
+    return communicator
+
+@pytest.mark.parametrize('background', [True, False])
+def test_text_lines_round_trip(virtual_serial_port, background):
+    communicator = make_communicator(
+        virtual_serial_port,
+        chunk_size=2,
+        message_mapping={'open': 'O'},
+        background=background,
+        coalesce=False,
+    )
+    for message in ['open', 'close', 'rest', 'open']:
+        communicator.send(message)
+    communicator.close()
+
+    expected = b'O\nclose\nrest\nO\n'
+    assert virtual_serial_port.wait_for(len(expected))
+    assert bytes(virtual_serial_port.received) == expected
+    assert communicator.stats['dropped'] == 0
+
+def test_frames_round_trip(virtual_serial_port):
+    communicator = make_communicator(
+        virtual_serial_port, protocol='binary', chunk_size=3, coalesce=False
+    )
+    predictions = [(0, 0.9), (2, 0.51), (1, 1.0), (255, 0.0), (3, 0.25), (2, 0.75)]
+    for class_id, confidence in predictions:
+        communicator.send(str(class_id), class_id=class_id, confidence=confidence)
+    communicator.close()
+
+    assert virtual_serial_port.wait_for(4 * len(predictions))
+    decoder = FrameDecoder()
+    frames = decoder.feed(bytes(virtual_serial_port.received))
+
+    assert [frame.class_id for frame in frames] == [c for c, _ in predictions]
+    assert [round(frame.confidence * 255) for frame in frames] == [
+        quantize_confidence(confidence) for _, confidence in predictions
+    ]
+    assert decoder.n_invalid == 0 and decoder.n_skipped_bytes == 0
+
+def test_send_on_change_skips_repeats(virtual_serial_port):
+    communicator = make_communicator(
+        virtual_serial_port, protocol='binary', include_confidence=False,
+        send_on_change=True, background=False
+    )
+    for class_id in [1, 1, 2, 2, 2, 1]:
+        communicator.send(str(class_id), class_id=class_id)
+    communicator.close()
+
+    assert virtual_serial_port.wait_for(9)
+    frames = FrameDecoder().feed(bytes(virtual_serial_port.received))
+    assert frames == [Frame(1), Frame(2), Frame(1)]
+
+def test_decoder_resynchronizes_after_noise():
+    stream = b'\x00\xff' + encode_frame(7) + b'\xa5\x01\x00' + encode_frame(3, 0.5)
+    decoder = FrameDecoder()
+
+    # Bytes arrive in arbitrary pieces
+    frames = []
+    for i in range(0, len(stream), 2):
+        frames.extend(decoder.feed(stream[i:i + 2]))
+
+    assert [frame.class_id for frame in frames] == [7, 3]
+    assert decoder.n_invalid >= 1 and decoder.n_skipped_bytes > 0
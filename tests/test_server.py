@@ -0,0 +1,57 @@
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from backend.ml import StreamServer
+from backend.io import pack_prediction, unpack_prediction, unpack_stream_prediction
+from backend.signal_processing import SignalProcessor, ChannelConfig
+from backend.signal_processing.cleaners import BandpassNotchFilter
+from backend.signal_processing.feature_extractors import CustomFeatures
+from config import settings
+from main import update_stream
+
+SAMPLING_RATE = 1200
+N_CHANNELS = 2
+
+def make_server():
+    processor = SignalProcessor(
+        emg_config=ChannelConfig(BandpassNotchFilter(), CustomFeatures(simple=True))
+    )
+    rng = np.random.default_rng(0)
+    X = np.concatenate([
+        processor.process_signals(
+            rng.standard_normal((SAMPLING_RATE, N_CHANNELS)) * scale, 0.25, 0.05, SAMPLING_RATE
+        )
+        for scale in (1, 3)
+    ])
+    y = np.repeat([0, 1], len(X) // 2)
+    return StreamServer(
+        LogisticRegression().fit(X, y), processor, 0.25, 0.05, SAMPLING_RATE,
+        compile_inference=False
+    )
+
+def packet(n_samples, n_columns):
+    return np.random.default_rng(1).standard_normal((n_samples, n_columns)).astype('<f8').tobytes()
+
+def test_malformed_packets_are_dropped_per_stream():
+    server = make_server()
+    stream_settings = settings.model_copy(
+        update={'n_channels': N_CHANNELS + 1, 'stream_key': 'address'}
+    )
+
+    update_stream(server, ('10.0.0.1', 1), packet(SAMPLING_RATE // 2, N_CHANNELS + 1), stream_settings)
+    # Streams with fewer and more channels than the server
+    update_stream(server, ('10.0.0.2', 1), packet(1, N_CHANNELS), stream_settings)
+    update_stream(server, ('10.0.0.3', 1), packet(2, N_CHANNELS + 2), stream_settings)
+
+    predictions = server.tick()
+
+    assert list(server.streams) == [('10.0.0.1', 1)]
+    assert predictions and all(p.stream == ('10.0.0.1', 1) for p in predictions)
+
+def test_stream_key_round_trips_through_packing():
+    data = pack_prediction(1.5, 2, np.array([0.1, 0.2, 0.7]), '10.0.0.1:5000')
+    stream, timestamp, class_id, probs = unpack_stream_prediction(data)
+
+    assert (stream, timestamp, class_id) == ('10.0.0.1:5000', 1.5, 2)
+    np.testing.assert_allclose(probs, [0.1, 0.2, 0.7], rtol=1e-6)
+    assert unpack_prediction(data)[1] == 2
+    assert unpack_stream_prediction(pack_prediction(1.5, 2, probs))[0] is None
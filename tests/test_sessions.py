@@ -0,0 +1,109 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from backend.io import (
+    ebr_file, build_sessions_dataset, load_session_to_arrays, convert_to_hdf5, HDF5Sessions,
+    SessionCatalog
+)
+from backend.io.sessions import METADATA_FILE, SIGNAL_FILE
+from backend.signal_processing import SignalProcessor, ChannelConfig
+from backend.signal_processing.cleaners import BandpassNotchFilter
+from backend.signal_processing.feature_extractors import CustomFeatures
+
+SAMPLING_RATE = 1200
+N_SAMPLES = 2 * SAMPLING_RATE
+
+def make_processor():
+    return SignalProcessor(
+        emg_config=ChannelConfig(BandpassNotchFilter(), CustomFeatures(simple=True))
+    )
+
+def write_ebr_session(path, channels=('EBR_1', 'EBR_2')):
+    rng = np.random.default_rng(0)
+    data = ebr_file.ebr_data(
+        1, list(channels) + ['MARK', 'TIMESTAMP'], 1, N_SAMPLES, SAMPLING_RATE
+    )
+    data['data'][0, :len(channels), 0] = rng.standard_normal((len(channels), N_SAMPLES))
+
+    marks = np.zeros(N_SAMPLES)
+    marks[0] = 101
+    marks[1] = 1
+    marks[N_SAMPLES // 2] = 2
+    data['data'][0, len(channels), 0] = marks
+
+    ebr_file.save_ebr_file(str(path), data)
+    return str(path)
+
+def write_experiment_dir(path, channels=('EBR_1', 'EBR_2')):
+    rng = np.random.default_rng(1)
+    path.mkdir()
+    df = pd.DataFrame(
+        rng.standard_normal((N_SAMPLES, len(channels))), columns=list(channels)
+    )
+    df['TIMESTAMP'] = np.arange(N_SAMPLES) / SAMPLING_RATE
+    df['label'] = np.where(np.arange(N_SAMPLES) < N_SAMPLES // 2, 'open', 'close')
+    df['group'] = 0
+    df.to_csv(path / SIGNAL_FILE)
+
+    with open(path / METADATA_FILE, 'w') as f:
+        json.dump({'sampling_rate': SAMPLING_RATE}, f)
+    return str(path)
+
+def test_labels_are_strings(tmp_path):
+    ebr = write_ebr_session(tmp_path / 'session.ebr')
+    experiment = write_experiment_dir(tmp_path / 'experiment')
+
+    assert load_session_to_arrays(ebr)[2].dtype.kind == 'U'
+    assert load_session_to_arrays(experiment)[2].dtype.kind == 'U'
+
+def test_mixed_sources(tmp_path):
+    sources = [
+        write_experiment_dir(tmp_path / 'experiment'),
+        write_ebr_session(tmp_path / 'session.ebr'),
+    ]
+
+    dataset = build_sessions_dataset(
+        sources, make_processor(), 0.25, 0.05, ignore_labels=[0], n_jobs=1
+    )
+
+    assert set(dataset.label_mapping.values()) == {'open', 'close', '1', '2'}
+    assert len(np.unique(dataset.groups)) == 2
+    assert len(dataset.X) == len(dataset.y) == len(dataset.groups)
+
+def test_mixed_sources_hdf5(tmp_path):
+    sources = [
+        write_experiment_dir(tmp_path / 'experiment'),
+        write_ebr_session(tmp_path / 'session.ebr'),
+    ]
+    convert_to_hdf5(sources, str(tmp_path / 'sessions.h5'), 0.25, 0.05)
+
+    with HDF5Sessions(str(tmp_path / 'sessions.h5')) as sessions:
+        dataset = sessions.build_dataset(make_processor(), 0.25, 0.05)
+
+    expected = build_sessions_dataset(sources, make_processor(), 0.25, 0.05, n_jobs=1)
+    assert dataset.label_mapping == expected.label_mapping
+    np.testing.assert_array_equal(dataset.y, expected.y)
+    np.testing.assert_allclose(dataset.X, expected.X)
+
+def test_mismatched_channels(tmp_path):
+    sources = [
+        write_experiment_dir(tmp_path / 'experiment'),
+        write_ebr_session(tmp_path / 'session.ebr', channels=('EBR_2', 'EBR_1')),
+    ]
+
+    with pytest.raises(ValueError, match='channels'):
+        build_sessions_dataset(sources, make_processor(), 0.25, 0.05, n_jobs=1)
+
+def test_metadata_only_directory(tmp_path):
+    # Trainers trained on sessions are saved without signal data
+    path = tmp_path / 'trainer'
+    path.mkdir()
+    with open(path / METADATA_FILE, 'w') as f:
+        json.dump({'sampling_rate': SAMPLING_RATE}, f)
+
+    sources = [write_experiment_dir(tmp_path / 'experiment'), str(path)]
+
+    with pytest.raises(ValueError, match=SIGNAL_FILE):
+        build_sessions_dataset(sources, make_processor(), 0.25, 0.05, n_jobs=2)
+    assert SessionCatalog().index(str(tmp_path))['added'] == 1
@@ -0,0 +1,47 @@
+import socket
+import time
+import numpy as np
+import zmq
+from backend.io import UDPPublisher, ZMQPublisher, unpack_prediction, unpack_stream_prediction
+
+PROBS = np.array([0.1, 0.6, 0.3])
+
+def test_udp_publisher():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(('127.0.0.1', 0))
+    receiver.settimeout(1)
+    sink = UDPPublisher([receiver.getsockname()])
+
+    sink.publish(12.5, 1, PROBS)
+    sink.publish(13.0, 2, PROBS, stream='10.0.0.1:5000')
+    sink.close()
+
+    timestamp, class_id, probs = unpack_prediction(receiver.recv(1024))
+    assert (timestamp, class_id) == (12.5, 1)
+    np.testing.assert_allclose(probs, PROBS, rtol=1e-6)
+
+    assert unpack_stream_prediction(receiver.recv(1024))[:3] == ('10.0.0.1:5000', 13.0, 2)
+    assert sink.n_published == 2 and sink.n_dropped == 0
+    receiver.close()
+
+def test_zmq_publisher_stream_topics():
+    sink = ZMQPublisher('tcp://127.0.0.1:0')
+    address = sink._socket.getsockopt(zmq.LAST_ENDPOINT).decode()
+
+    subscriber = zmq.Context.instance().socket(zmq.SUB)
+    subscriber.setsockopt(zmq.LINGER, 0)
+    subscriber.setsockopt(zmq.SUBSCRIBE, b'prediction/a')
+    subscriber.connect(address)
+
+    # Subscriptions reach the publisher asynchronously
+    deadline = time.monotonic() + 5
+    while not subscriber.poll(50) and time.monotonic() < deadline:
+        sink.publish(1.0, 0, PROBS, stream='b')
+        sink.publish(1.0, 1, PROBS, stream='a')
+
+    topic, data = subscriber.recv_multipart()
+    assert topic == b'prediction/a'
+    assert unpack_stream_prediction(data)[:3] == ('a', 1.0, 1)
+
+    subscriber.close()
+    sink.close()
@@ -0,0 +1,64 @@
+import numpy as np
+from backend.signal_processing import SignalProcessor, ChannelConfig
+from backend.signal_processing.cleaners import BandpassNotchFilter
+from backend.signal_processing.feature_extractors import TsfreshFeatures
+
+SAMPLING_RATE = 1200
+
+def make_processor(**kwargs):
+    extractor = TsfreshFeatures(
+        default_fc_parameters={'minimum': None},
+        kind_to_fc_parameters={1: {'maximum': None}},
+        n_jobs=0,
+        **kwargs
+    )
+    return SignalProcessor(emg_config=ChannelConfig(BandpassNotchFilter(), extractor))
+
+def test_kind_parameters_follow_channels():
+    signals = np.random.default_rng(0).standard_normal((SAMPLING_RATE // 2, 3))
+    processor = make_processor()
+
+    X = processor.process_signals(signals, 0.25, 0.05, SAMPLING_RATE)
+    clean = BandpassNotchFilter().clean_signals(signals.T, SAMPLING_RATE)
+    windows = np.lib.stride_tricks.sliding_window_view(clean, 300, axis=1)[:, ::60]
+
+    np.testing.assert_allclose(X[:, 0], windows[0].min(axis=1))
+    np.testing.assert_allclose(X[:, 1], windows[1].max(axis=1))
+    np.testing.assert_allclose(X[:, 2], windows[2].min(axis=1))
+
+def test_process_trials_matches_process_signals():
+    trials = np.random.default_rng(0).standard_normal((4, 3, SAMPLING_RATE // 2))
+    processor = make_processor()
+
+    X = processor.process_trials(trials, 0.25, 0.05, SAMPLING_RATE)
+
+    for trial, features in zip(trials, X):
+        np.testing.assert_allclose(
+            features, processor.process_signals(trial.T, 0.25, 0.05, SAMPLING_RATE)
+        )
+
+def test_select_keeps_parameters():
+    extractor = make_processor().emg_config.feature_extractor
+    selected = extractor.select(['minimum'], 0.25, SAMPLING_RATE)
+
+    assert selected.default_fc_parameters == extractor.default_fc_parameters
+    assert selected.kind_to_fc_parameters == extractor.kind_to_fc_parameters
+
+def test_unmapped_channels_use_all_calculators():
+    signals = np.random.default_rng(0).standard_normal((SAMPLING_RATE // 4, 3))
+    extractor = TsfreshFeatures(kind_to_fc_parameters={1: {'maximum': None}}, n_jobs=0)
+    n_features = len(TsfreshFeatures().feature_names(0.25, SAMPLING_RATE))
+
+    features = extractor.extract_channels(signals, 0.25, 0.05, SAMPLING_RATE)
+
+    assert [f.shape[1] for f in features] == [n_features, 1, n_features]
+    assert all(len(f) == len(features[1]) > 0 for f in features)
+
+def test_unmatched_kind_parameters_use_all_calculators():
+    signals = np.random.default_rng(0).standard_normal((SAMPLING_RATE // 4, 2))
+    extractor = TsfreshFeatures(kind_to_fc_parameters={5: {'maximum': None}}, n_jobs=0)
+    n_features = len(TsfreshFeatures().feature_names(0.25, SAMPLING_RATE))
+
+    features = extractor.extract_channels(signals, 0.25, 0.05, SAMPLING_RATE)
+
+    assert [f.shape[1] for f in features] == [n_features, n_features]